@@ -1,3 +1,4 @@
+from DVSModule.DVSEvt import decodeEvt2, decodeEvt3, DECODED_MASKS
 
 __author__ = "Saulquin Aurélie"
 __copyright__ = ""
@@ -16,6 +17,12 @@ class AERVersion:
         Only ReadMode, AELen (len of data in byte) and FileExtension depends to version
         ReadMode depends to struct python library https://docs.python.org/3/library/struct.html 
 
+        Versions where records are stored in packets also give PacketHeaderLen, EventType
+        and AddressMasks (see AEDAT31)
+
+        Versions made of stateful words give Stateful = True and a bulk decoder
+        decode(words, state) -> (records, state) (see EVT2, EVT3)
+
         Use this interface to add a new AER Version
     """
 
@@ -31,6 +38,46 @@ class AERVersion:
     def FileExtension(self):
         raise NotImplementedError
 
+    @property
+    def PacketHeaderLen(self):
+        # 0 : records follow each other after file header
+        return 0
+
+    @property
+    def EventType(self):
+        # type of packets which contain records (packet versions only)
+        return None
+
+    @property
+    def AddressMasks(self):
+        # (xmask, xshift, ymask, yshift, pmask, pshift) of address, None : masks of camera are used
+        return None
+
+    @property
+    def HeaderPrefix(self):
+        # first byte of header lines
+        return b'#'
+
+    @property
+    def Stateful(self):
+        # True : file is made of words of AELen bytes decoded by decode, not of (addr, ts) records
+        return False
+
+    def decode(self, words, state):
+        """
+            Decode words of a stateful version (Stateful = True)
+
+            Parameters
+            ----------
+                * words : numpy array of words (ReadMode)
+                * state : state of decoder before words, None at the beginning of file
+
+            Returns
+            -------
+                records (numpy array with fields addr and ts, ts is 64 bits time), state after words
+        """
+        raise NotImplementedError
+
 
 class AERV1(AERVersion):
     """ 
@@ -76,3 +123,135 @@ class AERV2(AERVersion):
     @property
     def FileExtension(self):
         return ".aedat"
+
+
+
+
+class AEDAT31(AERVersion):
+    """
+        AEDAT 3.1 format (jAER / cAER DAVIS recordings)
+
+        Records are stored in packets. Each packet starts with a 28 bytes header
+        (eventType, eventSource, eventSize, eventTSOffset, eventTSOverflow, eventCapacity,
+        eventNumber, eventValid, little endian) followed by eventCapacity records of eventSize bytes.
+        Only polarity packets (EventType = 1) are read, other packets are skipped by size.
+
+        ReadMode = <II : < little endian, I data (x, y, polarity, valid bit), I timestamp
+        AELen = 8
+        FileExtension = .aedat
+        Address: valid = bit 0, polarity = bit 1, y = bits 2-16, x = bits 17-31
+        Time = eventTSOverflow << 31 | timestamp
+    """
+
+    @property
+    def ReadMode(self):
+        return '<II' # little endian, unsigned long, unsigned long
+
+    @property
+    def AELen(self):
+        return 8
+
+    @property
+    def FileExtension(self):
+        return ".aedat"
+
+    @property
+    def PacketHeaderLen(self):
+        return 28
+
+    @property
+    def EventType(self):
+        return 1 # polarity event
+
+    @property
+    def AddressMasks(self):
+        return (0xfffe0000, 17, 0x0001fffc, 2, 0x2, 1)
+
+
+
+
+class _Evt(AERVersion):
+    # Prophesee formats: header lines start with '%', records are decoded in records of 64 bits time
+
+    @property
+    def FileExtension(self):
+        return ".raw"
+
+    @property
+    def AddressMasks(self):
+        return DECODED_MASKS
+
+    @property
+    def HeaderPrefix(self):
+        return b'%'
+
+    @property
+    def Stateful(self):
+        return True
+
+
+class EVT2(_Evt):
+    """
+        Prophesee EVT 2.0 format
+
+        ReadMode = <I : < little endian, I 32 bits word
+        AELen = 4 (len of a word)
+        FileExtension = .raw
+        Words : CD_OFF / CD_ON (time low, x, y), EVT_TIME_HIGH (time high), see DVSModule.DVSEvt.decodeEvt2
+    """
+
+    @property
+    def ReadMode(self):
+        return '<I'
+
+    @property
+    def AELen(self):
+        return 4
+
+    def decode(self, words, state):
+        return decodeEvt2(words, state)
+
+
+class EVT3(_Evt):
+    """
+        Prophesee EVT 3.0 format
+
+        ReadMode = <H : < little endian, H 16 bits word
+        AELen = 2 (len of a word)
+        FileExtension = .raw
+        Words : y, x, vector base x, 12 and 8 bits vectors, time low, time high, see DVSModule.DVSEvt.decodeEvt3
+    """
+
+    @property
+    def ReadMode(self):
+        return '<H'
+
+    @property
+    def AELen(self):
+        return 2
+
+    def decode(self, words, state):
+        return decodeEvt3(words, state)
+
+
+# versions by name (name of class)
+VERSIONS = {v.__name__: v for v in (AERV1, AERV2, AEDAT31, EVT2, EVT3)}
+
+
+def getVersion(name):
+    """
+        Version of a name of class ("AERV1", "EVT3"...)
+
+        Parameters
+        ----------
+            * name : string
+
+        Returns
+        -------
+            AERVersion
+    """
+
+    if name not in VERSIONS:
+        raise ValueError("unknown version {}, versions are {}".format(name, sorted(VERSIONS)))
+
+    return VERSIONS[name]()
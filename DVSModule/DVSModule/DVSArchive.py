@@ -0,0 +1,581 @@
+import os
+import json
+import lzma
+import zlib
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from DVSModule.DVSCamera import *
+from DVSModule.AERVersion import *
+from DVSModule.DVSReader import DVSEvents, _nbWorkers, _newEvents
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+_logger = logging.getLogger(__name__)
+
+
+# archive file:
+#   MAGIC
+#   blocks, each one compressed : x bitpacked | y bitpacked | p bitpacked | t delta zigzag varint
+#   block table (_blockType array)
+#   metadata (json)
+#   footer : offset of table, number of blocks, len of metadata, MAGIC
+
+MAGIC = b"DVSA\x01"
+
+FILE_EXTENSION = ".dvsa"
+
+_blockType = np.dtype([
+    ("n", "<u4"),           # number of events
+    ("tmin", "<u8"),        # smallest time of block
+    ("tmax", "<u8"),        # greatest time of block
+    ("t0", "<u8"),          # time of the first event of block
+    ("offset", "<u8"),      # position of block in file
+    ("size", "<u8"),        # size of compressed block
+])
+
+_FOOTER = struct.Struct("<QQI")
+
+_CODECS = {
+    "none": (lambda data, level: data, lambda data: data),
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+
+def _bitLen(n):
+    # number of bits to write values from 0 to n-1
+
+    return max(1, int(n - 1).bit_length())
+
+
+def _bitPack(values, bits):
+    # pack each value on bits bits, least significant bit first
+
+    values = values.astype(np.uint64)
+    shifts = np.arange(bits, dtype=np.uint64)
+
+    return np.packbits(((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8), axis=None, bitorder='little').tobytes()
+
+
+def _bitUnpack(data, n, bits):
+    # values of n bits packed values
+
+    if bits > 25:
+        b = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=n * bits, bitorder='little').reshape(n, bits)
+        return b.astype(np.uint64) @ (np.uint64(1) << np.arange(bits, dtype=np.uint64))
+
+    # each value is in the 4 bytes from its first bit: one gather by byte
+    b = np.zeros(len(data) + 4, dtype=np.uint32)
+    b[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+
+    pos = np.arange(n, dtype=np.int64) * bits
+    first = pos >> 3
+
+    window = b[first] | (b[first + 1] << 8) | (b[first + 2] << 16) | (b[first + 3] << 24)
+
+    return (window >> (pos & 7).astype(np.uint32)) & np.uint32((1 << bits) - 1)
+
+
+def _varintEncode(values):
+    # unsigned LEB128 encoding of each value, 7 bits by byte
+
+    values = values.astype(np.uint64)
+
+    nbBytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbBytes += rest > 0
+        rest >>= np.uint64(7)
+
+    item = np.repeat(np.arange(len(values)), nbBytes)
+    first = np.cumsum(nbBytes) - nbBytes
+    k = np.arange(len(item)) - first[item]
+
+    data = ((values[item] >> (np.uint64(7) * k.astype(np.uint64))) & np.uint64(0x7f)).astype(np.uint8)
+    data[k < nbBytes[item] - 1] |= 0x80
+
+    return data.tobytes()
+
+
+def _varintDecode(data):
+    # values of LEB128 encoded bytes
+
+    b = np.frombuffer(data, dtype=np.uint8)
+
+    if b.size == 0:
+        return np.empty(0, dtype=np.uint64)
+
+    last = (b & 0x80) == 0
+    first = np.concatenate(([0], np.nonzero(last)[0][:-1] + 1))
+
+    item = np.cumsum(last) - last
+    k = (np.arange(b.size) - first[item]).astype(np.uint64)
+
+    return np.bitwise_or.reduceat((b & 0x7f).astype(np.uint64) << (np.uint64(7) * k), first)
+
+
+def _encodeBlock(events, xbits, ybits):
+    # columns of events as bytes, times are stored as differences with previous event
+
+    t = events['t'].astype(np.int64)
+    delta = np.diff(t, prepend=t[0])
+
+    # zigzag: small negative differences stay small (events not sorted by time)
+    zigzag = (delta << 1) ^ (delta >> 63)
+
+    return b"".join((
+        _bitPack(events['x'], xbits),
+        _bitPack(events['y'], ybits),
+        _bitPack(events['p'], 1),
+        _varintEncode(zigzag.view(np.uint64)),
+    ))
+
+
+def _decodeBlock(data, n, t0, xbits, ybits, out):
+    # write events of a block in out
+
+    xlen = (n * xbits + 7) // 8
+    ylen = (n * ybits + 7) // 8
+    plen = (n + 7) // 8
+
+    out['x'] = _bitUnpack(data[:xlen], n, xbits)
+    out['y'] = _bitUnpack(data[xlen:xlen + ylen], n, ybits)
+    out['p'] = _bitUnpack(data[xlen + ylen:xlen + ylen + plen], n, 1)
+
+    zigzag = _varintDecode(data[xlen + ylen + plen:])
+    delta = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+
+    out['t'] = np.cumsum(delta) + np.int64(t0)
+
+
+class ArchiveWriter:
+    """
+        Write events in a DVSModule archive (.dvsa)
+
+        Columns t, x, y, p are stored separately by block of block_size events: times as differences
+        with previous event (varint), x, y and p bitpacked on the number of bits of camera Width, Height
+        and polarity. Each block is compressed and indexed by its times.
+
+            with ArchiveWriter("file.dvsa", DVS128()) as writer:
+                writer.write(events)
+
+        Methods
+        -------
+
+            * write(events) : add events (event_type array)
+            * close() : write last block and index of blocks
+    """
+
+    def __init__(self, path, camera = DVS128(), block_size = 65536, codec = "zlib", level = 6):
+        """
+            Parameters
+            ----------
+                * path : string, path of archive
+                * camera : CameraFamily, DVS128 by default
+                * block_size : int, number of events by block (65536 by default)
+                * codec : string, "zlib", "lzma" or "none", "zlib" by default
+                * level : int, compression level (6 by default)
+        """
+
+        if not isinstance(camera, CameraFamily):
+            raise TypeError("camera must be a CameraFamily, not {}".format(type(camera).__name__))
+
+        if codec not in _CODECS:
+            raise ValueError("codec must be one of {}, not {}".format(tuple(_CODECS), codec))
+
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+
+        self.path = path
+        self.blockSize = int(block_size)
+        self.codec = codec
+        self.level = level
+
+        self._meta = {
+            "format": 1,
+            "camera": type(camera).__name__,
+            "width": camera.Width,
+            "height": camera.Height,
+            "xbits": _bitLen(camera.Width),
+            "ybits": _bitLen(camera.Height),
+            "codec": codec,
+            "blockSize": self.blockSize,
+        }
+
+        self._compress = _CODECS[codec][0]
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+        self._pending = []      # events of the next block
+        self._nbPending = 0
+        self._blocks = []
+        self._nbEvents = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, events):
+        """
+            Add events
+
+            Parameters
+            ----------
+                * events : numpy array of event_type data
+        """
+
+        if self._file is None:
+            raise ValueError("write on a closed archive")
+
+        self._pending.append(events)
+        self._nbPending += len(events)
+
+        if self._nbPending < self.blockSize:
+            return
+
+        events = np.concatenate(self._pending)
+
+        n = len(events) - len(events) % self.blockSize
+        for a in range(0, n, self.blockSize):
+            self._writeBlock(events[a:a + self.blockSize])
+
+        self._pending = [events[n:]]
+        self._nbPending = len(events) - n
+
+    def _writeBlock(self, events):
+        # compress and write one block
+
+        data = self._compress(_encodeBlock(events, self._meta["xbits"], self._meta["ybits"]), self.level)
+
+        t = events['t']
+        self._blocks.append((len(events), int(t.min()), int(t.max()), int(t[0]), self._file.tell(), len(data)))
+        self._nbEvents += len(events)
+
+        self._file.write(data)
+
+    def close(self):
+        """
+            Write last block and index of blocks, then close file
+        """
+
+        if self._file is None:
+            return
+
+        if self._nbPending:
+            self._writeBlock(np.concatenate(self._pending))
+            self._pending = []
+            self._nbPending = 0
+
+        table = np.array(self._blocks, dtype=_blockType)
+        offset = self._file.tell()
+
+        self._meta["nbEvents"] = self._nbEvents
+        meta = json.dumps(self._meta).encode()
+
+        self._file.write(table.tobytes())
+        self._file.write(meta)
+        self._file.write(_FOOTER.pack(offset, len(table), len(meta)))
+        self._file.write(MAGIC)
+
+        self._file.close()
+        self._file = None
+
+
+def convertFile(file, path, camera = DVS128(), version = AERV1(), block_size = 65536, codec = "zlib", level = 6, workers = 1, verbose = 0):
+    """
+        Write all events of an aer file in a DVSModule archive
+
+        Parameters
+        ----------
+            * file : string, path of aer file
+            * path : string, path of archive
+            * camera : CameraFamily, DVS128 by default
+            * version : AERVersion, AERV1 by default
+            * block_size, codec, level : see ArchiveWriter
+            * workers : int, number of threads which decode aer file (1 by default)
+            * verbose : int, 0 by default, messages of DVSModule logger are printed if verbose > 0
+
+        Returns
+        -------
+            DVSArchive of the new archive
+    """
+
+    with DVSEvents(file, camera, version, verbose) as dvsEvents, \
+            ArchiveWriter(path, camera, block_size, codec, level) as writer:
+        for chunk in dvsEvents.iter_chunks(block_size, workers):
+            writer.write(chunk)
+
+    archive = DVSArchive(path)
+
+    _logger.info("%d events : %d bytes -> %d bytes (%.2f bytes/event)", archive.nb_events, os.path.getsize(file),
+        archive.size, archive.size / max(1, archive.nb_events))
+
+    return archive
+
+
+class DVSArchive:
+    """
+        Read a DVSModule archive (.dvsa), written by ArchiveWriter
+
+        Blocks are decompressed in parallel directly in event_type arrays (or EventBatch),
+        time range queries only decompress blocks which contain the range.
+
+        Attributes
+        ----------
+
+            * nb_events : number of events
+            * nb_blocks : number of blocks
+            * width, height : size of camera
+            * camera : name of camera class
+            * start_us, end_us, duration_us : times of archive in micro-second
+            * size : size of file in byte
+
+        Methods
+        -------
+
+            * getAllData(workers) : read all events
+            * getBlockData(k) : read events of block k
+            * getRangeData(start, stop, workers) : read events n° start to n° stop (excluded)
+            * getTimeRangeData(start_us, end_us, workers) : read events where start_us <= time event < end_us
+            * iter_blocks() : iterate over events block by block
+            * close() : close file
+    """
+
+    def __init__(self, path, batch = False):
+        """
+            Parameters
+            ----------
+                * path : string, path of archive
+                * batch : bool, False by default
+                    if True, events are given as EventBatch (structure of arrays) instead of event_type arrays
+        """
+
+        self.path = path
+        self._batch = batch
+
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()
+
+        self.size = os.fstat(self._file.fileno()).st_size
+
+        footer = len(MAGIC) + _FOOTER.size
+        if self.size < len(MAGIC) + footer or self._readBytes(0, len(MAGIC)) != MAGIC \
+                or self._readBytes(self.size - len(MAGIC), len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError("{} is not a DVSModule archive or is incomplete".format(path))
+
+        offset, nbBlocks, metaLen = _FOOTER.unpack(self._readBytes(self.size - footer, _FOOTER.size))
+
+        self._table = np.frombuffer(self._readBytes(offset, nbBlocks * _blockType.itemsize), dtype=_blockType)
+        self._meta = json.loads(self._readBytes(offset + nbBlocks * _blockType.itemsize, metaLen))
+
+        self._decompress = _CODECS[self._meta["codec"]][1]
+
+        # position of first event of each block
+        self._starts = np.concatenate(([0], np.cumsum(self._table["n"], dtype=np.int64)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def nb_events(self):
+        return int(self._starts[-1])
+
+    @property
+    def nb_blocks(self):
+        return len(self._table)
+
+    @property
+    def width(self):
+        return self._meta["width"]
+
+    @property
+    def height(self):
+        return self._meta["height"]
+
+    @property
+    def camera(self):
+        return self._meta["camera"]
+
+    @property
+    def start_us(self):
+        return int(self._table["tmin"].min()) if len(self._table) else 0
+
+    @property
+    def end_us(self):
+        return int(self._table["tmax"].max()) if len(self._table) else 0
+
+    @property
+    def duration_us(self):
+        return self.end_us - self.start_us
+
+    @property
+    def duration_s(self):
+        return self.duration_us * 1e-6
+
+    def close(self):
+        """
+            Close file
+        """
+
+        self._file.close()
+
+    def _readBytes(self, offset, size):
+        # read size bytes at offset, several threads can read
+
+        if not hasattr(os, "pread"):
+            with self._lock:
+                self._file.seek(offset)
+                return self._file.read(size)
+
+        fd = self._file.fileno()
+        parts = []
+
+        while size > 0:
+            s = os.pread(fd, size, offset)
+            if not s:
+                break
+            parts.append(s)
+            offset += len(s)
+            size -= len(s)
+
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def _decodeBlock(self, k, out):
+        # decompress block k in out
+
+        block = self._table[k]
+        data = self._decompress(self._readBytes(int(block["offset"]), int(block["size"])))
+
+        _decodeBlock(data, int(block["n"]), int(block["t0"]), self._meta["xbits"], self._meta["ybits"], out)
+
+    def _readBlocks(self, first, last, workers):
+        # decompress blocks first to last (excluded) in one array
+
+        events = _newEvents(int(self._starts[last] - self._starts[first]), self._batch)
+        base = int(self._starts[first])
+
+        def decode(k):
+            a = int(self._starts[k]) - base
+            self._decodeBlock(k, events[a:a + int(self._table["n"][k])])
+
+        workers = min(_nbWorkers(workers), max(1, last - first))
+
+        if workers <= 1:
+            for k in range(first, last):
+                decode(k)
+        else:
+            # zlib and lzma release the GIL while they decompress
+            with ThreadPoolExecutor(workers) as pool:
+                list(pool.map(decode, range(first, last)))
+
+        return events
+
+    def getAllData(self, workers = None):
+        """
+            Read all events
+
+            Parameters
+            ----------
+                * workers : int, number of threads which decompress blocks, None for the number of cpu
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+
+        return self._readBlocks(0, self.nb_blocks, workers)
+
+    def getBlockData(self, k):
+        """
+            Read events of block k
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+
+        if not (0 <= k < self.nb_blocks):
+            raise ValueError("block {} does not exist".format(k))
+
+        return self._readBlocks(k, k + 1, 1)
+
+    def getRangeData(self, start, stop, workers = None):
+        """
+            Read events n° start to n° stop (excluded), only blocks of these events are decompressed
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+
+        start = max(0, start)
+        stop = min(stop, self.nb_events)
+
+        if start >= stop:
+            return _newEvents(0, self._batch)
+
+        first = int(np.searchsorted(self._starts, start, side='right')) - 1
+        last = int(np.searchsorted(self._starts, stop, side='left'))
+
+        events = self._readBlocks(first, last, workers)
+        base = int(self._starts[first])
+
+        return events[start - base:stop - base]
+
+    def getTimeRangeData(self, start_us, end_us, workers = None):
+        """
+            Read events where start_us <= time event < end_us,
+            only blocks which contain times of range are decompressed
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+
+        if end_us <= start_us or not self.nb_blocks:
+            return _newEvents(0, self._batch)
+
+        # blocks which contain a time of range, they follow each other when events are sorted by time
+        touched = (self._table["tmax"] >= max(start_us, 0)) & (self._table["tmin"] < end_us)
+
+        blocks = np.nonzero(touched)[0]
+        if blocks.size == 0:
+            return _newEvents(0, self._batch)
+
+        events = self._readBlocks(int(blocks[0]), int(blocks[-1]) + 1, workers)
+
+        t = events['t']
+
+        return events[(t >= start_us) & (t < end_us)]
+
+    def iter_blocks(self):
+        """
+            Iterate over events block by block
+
+            Yields
+            ------
+                numpy array of event_type data
+        """
+
+        for k in range(self.nb_blocks):
+            yield self._readBlocks(k, k + 1, 1)
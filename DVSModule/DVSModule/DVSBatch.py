@@ -0,0 +1,171 @@
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+# define type for event
+event_type = np.dtype(
+    [ ("t", "u8"), ("x", "u2"), ("y", "u2"), ("p", "u1") ]
+)
+
+
+class EventBatch:
+    """
+        Events stored as a structure of arrays: one contiguous array by field (t, x, y, p)
+
+        Fields of an event_type array are strided views, each operation on a field reads
+        the whole records. Fields of a batch are contiguous and can be given to other
+        array libraries without copy. Batch is used like an event_type array:
+
+            batch['t'], batch.t     # contiguous array of times
+            batch[10:20]            # batch of views, no copy
+            batch[batch.p == 1]     # batch of copies
+            np.asarray(batch)       # event_type array
+
+        Attributes
+        ----------
+
+            * t, x, y, p : numpy arrays of fields, same len
+            * size : number of events
+            * nbytes : size of fields in byte
+
+        Methods
+        -------
+
+            * EventBatch.empty(n) : batch of n events, not initialized
+            * EventBatch.fromEvents(events) : batch of an event_type array
+            * EventBatch.concatenate(batches) : batch of all events of batches
+            * toEvents() : event_type array of events
+            * copy() : batch with a copy of fields
+    """
+
+    __slots__ = ("t", "x", "y", "p")
+
+    fields = event_type.names
+
+    def __init__(self, t, x, y, p):
+        """
+            Parameters
+            ----------
+                * t, x, y, p : numpy arrays of fields, same len
+        """
+
+        t, x, y, p = (np.asarray(c) for c in (t, x, y, p))
+
+        if t.ndim != 1 or not (len(t) == len(x) == len(y) == len(p)):
+            raise ValueError("fields of a batch must be 1-D arrays of the same len")
+
+        self.t = t
+        self.x = x
+        self.y = y
+        self.p = p
+
+    @classmethod
+    def empty(cls, n):
+        """
+            Batch of n events, fields are not initialized
+        """
+
+        return cls(*(np.empty(n, dtype=event_type.fields[f][0]) for f in cls.fields))
+
+    @classmethod
+    def fromEvents(cls, events):
+        """
+            Batch of an event_type array, each field is copied in a contiguous array
+        """
+
+        if isinstance(events, EventBatch):
+            return events
+
+        return cls(*(np.ascontiguousarray(events[f], dtype=event_type.fields[f][0]) for f in cls.fields))
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+            Batch of all events of batches (EventBatch or event_type arrays), in order
+        """
+
+        batches = [cls.fromEvents(b) for b in batches]
+
+        if not batches:
+            return cls.empty(0)
+
+        return cls(*(np.concatenate([getattr(b, f) for b in batches]) for f in cls.fields))
+
+    @property
+    def size(self):
+        return len(self.t)
+
+    @property
+    def nbytes(self):
+        return self.t.nbytes + self.x.nbytes + self.y.nbytes + self.p.nbytes
+
+    def toEvents(self):
+        """
+            event_type array of events
+        """
+
+        events = np.empty(len(self.t), dtype=event_type)
+
+        events['t'] = self.t
+        events['x'] = self.x
+        events['y'] = self.y
+        events['p'] = self.p
+
+        return events
+
+    def copy(self):
+        """
+            Batch with a copy of fields
+        """
+
+        return EventBatch(self.t.copy(), self.x.copy(), self.y.copy(), self.p.copy())
+
+    def __array__(self, dtype = None, copy = None):
+        events = self.toEvents()
+
+        return events if dtype is None else events.astype(dtype)
+
+    def __len__(self):
+        return len(self.t)
+
+    def __iter__(self):
+        return iter(self.toEvents())
+
+    def __getitem__(self, key):
+        # field name : field array, integer : one event_type event, else : batch of events
+
+        if isinstance(key, str):
+            if key not in self.fields:
+                raise KeyError(key)
+            return getattr(self, key)
+
+        if isinstance(key, (int, np.integer)):
+            n = len(self)
+            if not (-n <= key < n):
+                raise IndexError("index {} is out of bounds for batch of size {}".format(key, n))
+            key %= n
+            return self[key:key + 1].toEvents()[0]
+
+        return EventBatch(self.t[key], self.x[key], self.y[key], self.p[key])
+
+    def __setitem__(self, key, value):
+        # field name : write a field, else : write events (EventBatch or event_type) at key
+
+        if isinstance(key, str):
+            if key not in self.fields:
+                raise KeyError(key)
+            getattr(self, key)[...] = value
+            return
+
+        for f in self.fields:
+            getattr(self, f)[key] = value[f]
+
+    def __repr__(self):
+        return "EventBatch(size={})".format(len(self))
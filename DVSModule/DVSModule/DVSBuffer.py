@@ -0,0 +1,409 @@
+import time
+import threading
+from enum import Enum
+
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+class OverflowPolicy(Enum):
+    """
+
+    What a ring buffer does with events pushed when it is full.
+
+    BLOCK : push waits until events are popped
+    DROP_OLDEST : oldest events of buffer are removed
+    DROP_NEWEST : pushed events which do not fit are ignored
+
+    """
+    BLOCK = 0
+    DROP_OLDEST = 1
+    DROP_NEWEST = 2
+
+
+class EventRingBuffer:
+    """
+        Ring buffer of events with a fixed capacity, preallocated once
+
+        Events are pushed and popped by block, with numpy copies. Events are kept sorted by
+        time (field t): popUntil takes the events of a time window with a binary search.
+        Each push is expected sorted by time, a push older than the newest event of buffer
+        (datagrams received out of order) is merged with the newer buffered events.
+        Buffer can be shared by a producer thread and a consumer thread.
+
+        Attributes
+        ----------
+
+            * capacity : maximum number of events
+            * policy : OverflowPolicy
+            * free : number of events which can be pushed without overflow
+            * firstTime, lastTime : time of the oldest and of the newest event, None if buffer is empty
+            * closed : True when no more event will be pushed
+
+        Counters
+        --------
+
+            * pushed, popped : number of events pushed and popped
+            * droppedOldest, droppedNewest : number of events lost by overflow
+            * waits : number of times push waited for free space (BLOCK policy)
+            * highWater : greatest number of events in buffer
+            * merges : number of pushes older than the newest event, merged in time order
+
+        Methods
+        -------
+
+            * push(events, timeout) : add events
+            * pop(n) : take at most n oldest events
+            * popUntil(time) : take oldest events where time event < time
+            * wait(timeout) : wait until buffer is not empty or is closed
+            * close() : no more event will be pushed, waiting threads are woken up
+            * clear() : remove all events
+            * counters() : all counters as a dict
+    """
+
+    def __init__(self, capacity, dtype, policy = OverflowPolicy.BLOCK):
+        """
+            Parameters
+            ----------
+                * capacity : int, maximum number of events
+                * dtype : numpy dtype of events, with a time field t
+                * policy : OverflowPolicy, OverflowPolicy.BLOCK by default
+        """
+
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        if not isinstance(policy, OverflowPolicy):
+            raise TypeError("policy must be an OverflowPolicy, not {}".format(type(policy).__name__))
+
+        self.capacity = int(capacity)
+        self.policy = policy
+
+        self._data = np.empty(self.capacity, dtype=dtype)
+        self._t = self._data['t']
+
+        self._head = 0      # position of the oldest event
+        self._len = 0
+        self._closed = False
+
+        self._cond = threading.Condition()
+
+        self.pushed = 0
+        self.popped = 0
+        self.droppedOldest = 0
+        self.droppedNewest = 0
+        self.waits = 0
+        self.highWater = 0
+        self.merges = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def free(self):
+        return self.capacity - self._len
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def firstTime(self):
+        with self._cond:
+            return int(self._t[self._head]) if self._len else None
+
+    @property
+    def lastTime(self):
+        with self._cond:
+            return int(self._t[(self._head + self._len - 1) % self.capacity]) if self._len else None
+
+    def _write(self, events):
+        # copy events after the newest event, len(events) <= free
+        # events older than the newest event are merged: buffer stays sorted by time
+
+        if self._len and len(events):
+            first = int(events['t'][0])
+
+            if first < self._t[(self._head + self._len - 1) % self.capacity]:
+                # buffered events newer than the first pushed event are written again with events,
+                # on equal times buffered events stay first
+                k = self._search(first + 1)
+                events = np.concatenate((self._copy(k, self._len - k), events))
+                events = events[np.argsort(events['t'], kind='stable')]
+
+                self._len = k
+                self.merges += 1
+
+        n = len(events)
+        tail = (self._head + self._len) % self.capacity
+        n1 = min(n, self.capacity - tail)
+
+        self._data[tail:tail + n1] = events[:n1]
+        self._data[:n - n1] = events[n1:]
+
+        self._len += n
+
+    def _copy(self, k, n):
+        # copy of n events from the k-th oldest event
+
+        start = (self._head + k) % self.capacity
+        n1 = min(n, self.capacity - start)
+
+        if n1 == n:
+            return self._data[start:start + n].copy()
+
+        return np.concatenate((self._data[start:], self._data[:n - n1]))
+
+    def _read(self, n):
+        # copy and remove the n oldest events
+
+        events = self._copy(0, n)
+
+        self._skip(n)
+        self.popped += n
+
+        return events
+
+    def _skip(self, n):
+        # remove the n oldest events
+
+        self._head = (self._head + n) % self.capacity
+        self._len -= n
+
+        # next writes are contiguous
+        if self._len == 0:
+            self._head = 0
+
+    def _search(self, time):
+        # number of oldest events where time event < time, binary search on time
+
+        t = self._t
+        head = self._head
+        capacity = self.capacity
+
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if t[(head + mid) % capacity] < time:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def push(self, events, timeout = None):
+        """
+            Add events sorted by time, merged with buffered events if they are older than the newest event
+
+            Parameters
+            ----------
+                * events : numpy array of events
+                * timeout : float, BLOCK policy only, maximum waiting time in second
+                    - None : wait until all events are pushed or buffer is closed
+                    - 0 : push events which fit and return
+
+            Returns
+            -------
+                number of events pushed
+        """
+
+        n = len(events)
+
+        with self._cond:
+            if self._closed:
+                raise ValueError("push on a closed buffer")
+
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                k = min(n, self.free)
+                self._write(events[:k])
+                self.droppedNewest += n - k
+
+            elif self.policy == OverflowPolicy.DROP_OLDEST:
+                # oldest pushed events are dropped first
+                if n > self.capacity:
+                    self.droppedOldest += n - self.capacity
+                    events = events[n - self.capacity:]
+
+                over = len(events) - self.free
+                if over > 0:
+                    self._skip(over)
+                    self.droppedOldest += over
+
+                k = len(events)
+                self._write(events)
+
+            else:
+                deadline = None if timeout is None else time.monotonic() + timeout
+
+                k = 0
+                while True:
+                    m = min(n - k, self.free)
+                    if m:
+                        self._write(events[k:k + m])
+                        k += m
+                        self._cond.notify_all()
+
+                    if k == n or self._closed or timeout == 0:
+                        break
+
+                    self.waits += 1
+
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if not self._cond.wait_for(lambda: self.free or self._closed, wait):
+                        break
+
+            self.pushed += k
+            self.highWater = max(self.highWater, self._len)
+
+            self._cond.notify_all()
+
+        return k
+
+    def pop(self, n = None):
+        """
+            Take at most n oldest events, does not wait
+
+            Parameters
+            ----------
+                * n : int, maximum number of events, all events by default
+
+            Returns
+            -------
+                numpy array of events, sorted from oldest
+        """
+
+        with self._cond:
+            n = self._len if n is None else min(n, self._len)
+            events = self._read(n)
+            self._cond.notify_all()
+
+        return events
+
+    def popUntil(self, time):
+        """
+            Take oldest events where time event < time, does not wait
+
+            Parameters
+            ----------
+                * time : time in micro-second
+
+            Returns
+            -------
+                numpy array of events, sorted from oldest
+        """
+
+        # times are integers: t < time <=> t < ceil(time)
+        time = int(np.ceil(time))
+
+        with self._cond:
+            events = self._read(self._search(time))
+            self._cond.notify_all()
+
+        return events
+
+    def wait(self, timeout = None):
+        """
+            Wait until buffer is not empty or is closed
+
+            Parameters
+            ----------
+                * timeout : float, maximum waiting time in second, None to wait without limit
+
+            Returns
+            -------
+                True if buffer is not empty
+        """
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._len or self._closed, timeout)
+            return self._len > 0
+
+    def close(self):
+        """
+            No more event will be pushed, waiting threads are woken up
+        """
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def clear(self):
+        """
+            Remove all events, buffer can be used again after close
+        """
+
+        with self._cond:
+            self._head = 0
+            self._len = 0
+            self._closed = False
+            self._cond.notify_all()
+
+    def counters(self):
+        """
+            All counters as a dict
+        """
+
+        with self._cond:
+            return {
+                "size": self._len,
+                "capacity": self.capacity,
+                "pushed": self.pushed,
+                "popped": self.popped,
+                "droppedOldest": self.droppedOldest,
+                "droppedNewest": self.droppedNewest,
+                "waits": self.waits,
+                "highWater": self.highWater,
+                "merges": self.merges,
+            }
+
+
+class _EventFeed:
+    # events of an iterator of blocks, staged in a ring buffer and taken by time window
+    # the iterator is read only when the buffer does not contain the end of the window
+
+    def __init__(self, blocks, buffer):
+        self._blocks = blocks
+        self._buffer = buffer
+        self._block = None      # part of last block not pushed yet
+        self.exhausted = False
+
+    def popUntil(self, time):
+        # events where time event < time, as a list of arrays
+
+        buffer = self._buffer
+        pieces = []
+
+        while True:
+            while not self.exhausted and buffer.free and (not len(buffer) or buffer.lastTime < time):
+                if self._block is None or not len(self._block):
+                    self._block = next(self._blocks, None)
+
+                    if self._block is None:
+                        self.exhausted = True
+                        break
+
+                k = buffer.push(self._block, timeout=0)
+                self._block = self._block[k:]
+
+            pieces.append(buffer.popUntil(time))
+
+            # buffer contains the end of the window, or there is no more event
+            if len(buffer) or self.exhausted:
+                return pieces
+
+    @property
+    def empty(self):
+        # no more event
+
+        return self.exhausted and not len(self._buffer)
+
+    def close(self):
+        self._blocks.close()
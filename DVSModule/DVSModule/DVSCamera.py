@@ -1,3 +1,7 @@
+import numpy as np
+
+from DVSModule.DVSBatch import event_type
+
 __author__ = "Saulquin Aurélie"
 __copyright__ = ""
 __credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
@@ -22,6 +26,10 @@ class CameraFamily:
             - Pshift
             - Width (pixel)
             - Height (pixel)
+
+        Optional property are:
+            - Name : name of camera in registry, name of class by default
+            - Types : type bits of address, None if all addresses are polarity events (see CameraSpec)
     """
 
     @property
@@ -56,103 +64,404 @@ class CameraFamily:
     def Height(self):
         raise NotImplementedError
 
+    @property
+    def Name(self):
+        return type(self).__name__
 
+    @property
+    def Types(self):
+        return None
 
 
-class DVS128(CameraFamily):
+class CameraSpec(CameraFamily):
     """
-        DVS128 camera
+        Camera declared as data
 
-        Camera property are:
-            - Xmask = 0x00fe
-            - Xshift = 1
-            - Ymask = 0x7f00
-            - Yshift = 8
-            - Pmask = x01
-            - Pshift = 0
-            - Width (pixel) = 128
-            - Height (pixel) = 128
+            CameraSpec("DVS128", 128, 128, 0x00fe, 1, 0x7f00, 8, 0x1, 0)
+
+        types gives the kind of each address: {name: (mask, value, fields)}.
+        An address is of kind name when address & mask == value, fields are the values
+        read in addresses of this kind {field: (mask, shift)}. Kind "polarity" is the kind of
+        events, its fields are x, y and p. Addresses of no kind are ignored.
+
+            types = {
+                "polarity": (0x80000400, 0x0, {}),
+                "trigger": (0x80000400, 0x400, {"addr": (0xffffffff, 0)}),
+            }
+
+        Without types, all addresses are polarity events.
     """
 
+    def __init__(self, name, width, height, xmask, xshift, ymask, yshift, pmask, pshift, types = None):
+        """
+            Parameters
+            ----------
+                * name : string, name of camera
+                * width, height : int, size of camera in pixel
+                * xmask, xshift, ymask, yshift, pmask, pshift : int, masks and shifts of polarity events
+                * types : dict, optional, kinds of addresses {name: (mask, value, {field: (mask, shift)})}
+        """
+
+        if types is not None and "polarity" not in types:
+            raise ValueError("types of camera {} must contain polarity".format(name))
+
+        self._name = name
+        self._size = (width, height)
+        self._masks = (xmask, xshift, ymask, yshift, pmask, pshift)
+        self._types = types
 
     @property
     def Xmask(self):
-        return 0x00fe
+        return self._masks[0]
 
     @property
     def Xshift(self):
-        return 1
+        return self._masks[1]
 
     @property
     def Ymask(self):
-        return 0x7f00
+        return self._masks[2]
 
     @property
     def Yshift(self):
-        return 8
+        return self._masks[3]
 
     @property
     def Pmask(self):
-        return 0x1
+        return self._masks[4]
 
     @property
     def Pshift(self):
-        return 0 
+        return self._masks[5]
 
     @property
     def Width(self):
-        return 128
+        return self._size[0]
 
     @property
     def Height(self):
-        return 128
+        return self._size[1]
 
+    @property
+    def Name(self):
+        return self._name
+
+    @property
+    def Types(self):
+        return self._types
 
-class DAVIS240(CameraFamily):
+    def __repr__(self):
+        return "{}({}x{})".format(self._name, *self._size)
+
+
+class DVS128(CameraSpec):
+    """
+        DVS128 camera
+
+        Camera property are:
+            - Xmask = 0x00fe
+            - Xshift = 1
+            - Ymask = 0x7f00
+            - Yshift = 8
+            - Pmask = x01
+            - Pshift = 0
+            - Width (pixel) = 128
+            - Height (pixel) = 128
+    """
+
+    def __init__(self):
+        super().__init__("DVS128", 128, 128, 0x00fe, 1, 0x7f00, 8, 0x1, 0)
+
+
+class DAVIS240(CameraSpec):
     """
         DAVIS240
 
         Camera property are:
             - Xmask = 0x003ff000
             - Xshift = 12
-            - Ymask = 0x1fc0000
+            - Ymask = 0x7fc00000
             - Yshift = 22
             - Pmask = 0x800
             - Pshift = 11
             - Width (pixel) = 240
             - Height (pixel) = 180
+
+        Kinds of addresses (bit 31 : APS / IMU, bits 10-11 : readout or trigger):
+            - polarity : bit 31 = 0, bit 10 = 0
+            - trigger : bit 31 = 0, bit 10 = 1 (external input), raw address
+            - aps : bit 31 = 1, bit 11 = 0, x, y, readout (0 reset, 1 signal) and adc sample
+            - imu : bit 31 = 1, bits 10-11 = 3, raw address
     """
 
-    @property
-    def Xmask(self):
-        return 0x003ff000
+    def __init__(self):
+        super().__init__("DAVIS240", 240, 180, 0x003ff000, 12, 0x7fc00000, 22, 0x800, 11, {
+            "polarity": (0x80000400, 0x0, {}),
+            "trigger": (0x80000400, 0x400, {"addr": (0xffffffff, 0)}),
+            "aps": (0x80000800, 0x80000000, {"x": (0x003ff000, 12), "y": (0x7fc00000, 22), "readout": (0x400, 10), "adc": (0x3ff, 0)}),
+            "imu": (0x80000c00, 0x80000c00, {"addr": (0xffffffff, 0)}),
+        })
 
-    @property
-    def Xshift(self):
-        return 12
 
-    @property
-    def Ymask(self):
-        return 0x7fc00000
+class IMX636(CameraSpec):
+    """
+        Prophesee / Sony IMX636 (EVK4), recorded with EVT2 or EVT3 formats
+
+        Camera property are (addresses decoded by EVT2 and EVT3):
+            - Xmask = 0x7ff
+            - Xshift = 0
+            - Ymask = 0x3ff800
+            - Yshift = 11
+            - Pmask = 0x400000
+            - Pshift = 22
+            - Width (pixel) = 1280
+            - Height (pixel) = 720
+    """
 
-    @property
-    def Yshift(self):
-        return 22
+    def __init__(self):
+        super().__init__("IMX636", 1280, 720, 0x7ff, 0, 0x3ff800, 11, 0x400000, 22)
 
-    @property
-    def Pmask(self):
-        return 0x800
 
-    @property
-    def Pshift(self):
-        return 11
+# registry of cameras by name
+CAMERAS = {}
 
-    @property
-    def Width(self):
-        return 240
 
-    @property
-    def Height(self):
-        return 180
+def registerCamera(camera):
+    """
+        Add a camera in registry, it can then be got by its name
+
+        Parameters
+        ----------
+            * camera : CameraFamily
+
+        Returns
+        -------
+            camera
+    """
+
+    if not isinstance(camera, CameraFamily):
+        raise TypeError("camera must be a CameraFamily, not {}".format(type(camera).__name__))
+
+    CAMERAS[camera.Name] = camera
+
+    return camera
+
+
+def getCamera(name):
+    """
+        Camera of registry
+
+        Parameters
+        ----------
+            * name : string, name of camera
+
+        Returns
+        -------
+            CameraFamily
+    """
+
+    if name not in CAMERAS:
+        raise ValueError("unknown camera {}, cameras are {}".format(name, sorted(CAMERAS)))
+
+    return CAMERAS[name]
+
+
+for _camera in (DVS128(), DAVIS240(), IMX636()):
+    registerCamera(_camera)
+
+
+def _fieldType(mask, shift):
+    # smallest unsigned type of a field
+
+    bits = (mask >> shift).bit_length()
+
+    return "u1" if bits <= 8 else "u2" if bits <= 16 else "u4"
+
+
+class AddressDecoder:
+    """
+        Decoding kernel of the addresses of a camera, built once by camera (see cameraDecoder)
+
+        Masks are stored as numpy constants, dtypes of streams are built once.
+
+        Attributes
+        ----------
+
+            * masks : (xmask, xshift, ymask, yshift, pmask, pshift)
+            * addressMask : bits of addresses read by decoder (masks of fields and of kinds)
+            * kinds : names of kinds of addresses ("polarity" first)
+            * dtypes : numpy dtype of stream of each kind (event_type for polarity)
+            * filters : True if some addresses are not polarity events
+
+        Methods
+        -------
+
+            * decode(addr, events) : write x, y, p of polarity addresses in events
+            * select(addr, kind) : addresses of a kind
+            * streams(addr, ts, kinds) : split addresses in one array by kind
+    """
+
+    __slots__ = ("masks", "addressMask", "kinds", "dtypes", "filters", "_xyp", "_types")
+
+    def __init__(self, masks, types = None):
+        """
+            Parameters
+            ----------
+                * masks : (xmask, xshift, ymask, yshift, pmask, pshift) of polarity events
+                * types : dict, optional, kinds of addresses (see CameraSpec)
+        """
+
+        self.masks = tuple(int(m) for m in masks)
+
+        xmask, xshift, ymask, yshift, pmask, pshift = self.masks
+        self._xyp = tuple(np.uint32(m) for m in (xmask, xshift, ymask, yshift, pmask, pshift))
+
+        types = types or {"polarity": (0, 0, {})}
+
+        self.kinds = ("polarity",) + tuple(k for k in types if k != "polarity")
+
+        self._types = {}
+        self.dtypes = {}
+
+        for kind in self.kinds:
+            mask, value, fields = types[kind]
+            fields = tuple((f, np.uint32(m), np.uint32(s)) for f, (m, s) in fields.items())
+
+            self._types[kind] = (np.uint32(mask), np.uint32(value), fields)
+
+            if kind == "polarity":
+                self.dtypes[kind] = event_type
+            else:
+                self.dtypes[kind] = np.dtype([("t", "u8")] + [(f, _fieldType(int(m), int(s))) for f, m, s in fields])
+
+        self.filters = bool(self._types["polarity"][0])
+
+        # other bits of addresses are never read
+        self.addressMask = xmask | ymask | pmask
+        for kind in self.kinds:
+            mask, _, fields = types[kind]
+            self.addressMask |= mask
+            for m, _ in fields.values():
+                self.addressMask |= m
+
+    def decode(self, addr, events):
+        """
+            Write x, y, p decoded from addresses in events
+
+            Parameters
+            ----------
+                * addr : numpy array of addresses (polarity events)
+                * events : event_type array or EventBatch of same len
+        """
+
+        xmask, xshift, ymask, yshift, pmask, pshift = self._xyp
+
+        addr = addr.astype(np.uint32, copy=False)
+
+        events['x'] = (addr & xmask) >> xshift
+        events['y'] = (addr & ymask) >> yshift
+        events['p'] = (addr & pmask) >> pshift
+
+    def select(self, addr, kind = "polarity"):
+        """
+            Addresses of a kind
+
+            Parameters
+            ----------
+                * addr : numpy array of addresses
+                * kind : string, "polarity" by default
+
+            Returns
+            -------
+                numpy bool array, None if all addresses are of this kind
+        """
+
+        mask, value, _ = self._types[kind]
+
+        if not mask:
+            return None
+
+        return (addr.astype(np.uint32, copy=False) & mask) == value
+
+    def streams(self, addr, ts, kinds = None):
+        """
+            Split addresses in one array by kind, in one pass by kind asked.
+            Kinds which are not asked are not decoded
+
+            Parameters
+            ----------
+                * addr : numpy array of addresses
+                * ts : numpy array of times, same len
+                * kinds : names of kinds, all kinds by default
+
+            Returns
+            -------
+                dict {kind: numpy array of dtypes[kind]}
+        """
+
+        addr = addr.astype(np.uint32, copy=False)
+        out = {}
+
+        for kind in (self.kinds if kinds is None else kinds):
+            if kind not in self._types:
+                raise ValueError("unknown kind {}, kinds are {}".format(kind, self.kinds))
+
+            selected = self.select(addr, kind)
+            a = addr if selected is None else addr[selected]
+
+            stream = np.empty(len(a), dtype=self.dtypes[kind])
+            stream['t'] = ts if selected is None else ts[selected]
+
+            if kind == "polarity":
+                self.decode(a, stream)
+            else:
+                for f, m, s in self._types[kind][2]:
+                    stream[f] = (a & m) >> s
+
+            out[kind] = stream
+
+        return out
+
+
+_decoders = {}  # decoders already built, by masks and types
+
+
+def addressDecoder(masks, types = None):
+    """
+        Decoder of addresses, built once for same masks and types
+
+        Parameters
+        ----------
+            * masks : (xmask, xshift, ymask, yshift, pmask, pshift)
+            * types : dict, optional, kinds of addresses (see CameraSpec)
+
+        Returns
+        -------
+            AddressDecoder
+    """
+
+    key = (tuple(masks), repr(types))
+
+    decoder = _decoders.get(key)
+    if decoder is None:
+        decoder = _decoders[key] = AddressDecoder(masks, types)
+
+    return decoder
+
+
+def cameraDecoder(camera):
+    """
+        Decoder of the addresses of a camera, built once by camera
+
+        Parameters
+        ----------
+            * camera : CameraFamily
+
+        Returns
+        -------
+            AddressDecoder
+    """
+
+    masks = (camera.Xmask, camera.Xshift, camera.Ymask, camera.Yshift, camera.Pmask, camera.Pshift)
 
-    
\ No newline at end of file
+    return addressDecoder(masks, camera.Types)
@@ -0,0 +1,413 @@
+import os
+import csv
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from DVSModule.DVSReader import DVSEvents
+from DVSModule.DVSCamera import CameraFamily, DVS128, getCamera
+from DVSModule.AERVersion import AERVersion, AERV1, getVersion
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+class Recording:
+    """
+        A recording of a dataset: file, camera, version and label
+    """
+
+    __slots__ = ("path", "camera", "version", "label")
+
+    def __init__(self, path, camera = DVS128(), version = AERV1(), label = None):
+        """
+            Parameters
+            ----------
+                * path : string, path of file
+                * camera : CameraFamily or name of camera, DVS128 by default
+                * version : AERVersion or name of version, AERV1 by default
+                * label : optional, label of samples of this recording
+        """
+
+        if isinstance(camera, str):
+            camera = getCamera(camera)
+        if isinstance(version, str):
+            version = getVersion(version)
+
+        if not isinstance(camera, CameraFamily):
+            raise TypeError("camera must be an instance of CameraFamily interface")
+        if not isinstance(version, AERVersion):
+            raise TypeError("version must be an instance of AERVersion")
+
+        self.path = path
+        self.camera = camera
+        self.version = version
+        self.label = label
+
+    def __repr__(self):
+        return "Recording({!r}, {}, {}, label={!r})".format(self.path, self.camera.Name, type(self.version).__name__, self.label)
+
+
+def _scanDirectory(root, camera, version):
+    # recordings of a directory (and sub directories) with the extension of version,
+    # label is the sub directory of a recording, None at root
+
+    recordings = []
+
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        rel = os.path.relpath(directory, root)
+
+        for name in sorted(files):
+            if name.endswith(version.FileExtension):
+                recordings.append(Recording(os.path.join(directory, name), camera, version, None if rel == "." else rel))
+
+    return recordings
+
+
+def _readManifest(path, camera, version):
+    # recordings of a manifest: one recording by line "path[,camera[,version[,label]]]",
+    # empty fields take default values, paths are relative to manifest, lines starting with # are ignored
+
+    root = os.path.dirname(os.path.abspath(path))
+    recordings = []
+
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            row = [c.strip() for c in row]
+
+            if not row or not row[0] or row[0].startswith('#'):
+                continue
+
+            row += [""] * (4 - len(row))
+            file, cam, ver, label = row[:4]
+
+            recordings.append(Recording(os.path.join(root, file), cam or camera, ver or version, label or None))
+
+    return recordings
+
+
+class DVSDataset:
+    """
+        Dataset of many recordings, each with its camera and version
+
+        A sample is a whole recording, or a time slice of slice_us micro-seconds of a recording.
+        Samples are decoded by a pool of threads ahead of the consumer (prefetch samples in advance),
+        and decoded samples are kept in a least recently used cache. Recordings are opened once and
+        at most max_open are open at the same time.
+
+            dataset = DVSDataset("path/to/dir", DAVIS240(), AERV2(), slice_us=100000, transform=frames)
+
+            for events, label in dataset.iterate(shuffle=True, seed=epoch):
+                ...
+
+        Sources are:
+            - a directory : files with the extension of version, label is the sub directory of a file
+            - a manifest (.csv) : one recording by line "path[,camera[,version[,label]]]", camera and
+              version are names ("DVS128", "AERV2"...), empty fields take default values
+            - a list of Recording, paths or (path, camera, version, label) tuples
+
+        Attributes
+        ----------
+
+            * recordings : list of Recording
+            * stats : counters {hits, misses, waits, wait_s}. waits counts samples which were not decoded
+              yet when the consumer asked them, wait_s is the time waited
+
+        Methods
+        -------
+
+            * len(dataset) : number of samples
+            * dataset[i] : (data, label) of sample i, data is events or transform(events)
+            * sample(i) : (recording index, start_us, end_us) of sample i, None times for a whole recording
+            * iterate(shuffle, seed) : samples in order or shuffled, decoded ahead by the pool
+            * close() : stop pool and close files. Dataset can also be used with `with`
+    """
+
+    def __init__(self, source, camera = DVS128(), version = AERV1(), slice_us = None, transform = None,
+            workers = 4, prefetch = 8, cache_size = 64, max_open = 64, index = False, batch = False):
+        """
+            Parameters
+            ----------
+                * source : directory, manifest file or list of recordings
+                * camera : CameraFamily, DVS128 by default, camera of recordings without camera
+                * version : AERVersion, AERV1 by default, version of recordings without version
+                * slice_us : int, optional, duration of a sample in micro-second, whole recordings by default
+                * transform : function, optional, applied by workers on events of each sample
+                * workers : int, 4 by default, number of threads which decode samples
+                * prefetch : int, 8 by default, number of samples decoded in advance by iterate
+                * cache_size : int, 64 by default, maximum number of decoded samples kept in memory (0 for no cache)
+                * max_open : int, 64 by default, maximum number of recordings open at the same time
+                * index : bool or string, False by default, time index of recordings (see DVSEvents)
+                * batch : bool, False by default, events are EventBatch if True
+        """
+
+        if slice_us is not None and slice_us <= 0:
+            raise ValueError("slice_us must be positive")
+        if prefetch <= 0:
+            raise ValueError("prefetch must be positive")
+
+        if isinstance(source, (str, os.PathLike)):
+            source = os.fspath(source)
+            if os.path.isdir(source):
+                recordings = _scanDirectory(source, camera, version)
+            else:
+                recordings = _readManifest(source, camera, version)
+        else:
+            recordings = [self._recording(r, camera, version) for r in source]
+
+        self.recordings = recordings
+
+        self._slice = slice_us
+        self._transform = transform
+        self._workers = max(1, workers)
+        self._prefetch = prefetch
+        self._cacheSize = cache_size
+        self._maxOpen = max(1, max_open)
+        self._index = index
+        self._batch = batch
+
+        self._lock = threading.Lock()
+        self._open = OrderedDict()     # recording index -> [DVSEvents, lock], DVSEvents is None once closed
+        self._cache = OrderedDict()    # sample index -> data
+        self._pool = None
+        self._futures = set()           # samples submitted to pool and not done
+
+        self.stats = {"hits": 0, "misses": 0, "waits": 0, "wait_s": 0.0}
+
+        self._samples = self._initSamples()
+
+    @staticmethod
+    def _recording(r, camera, version):
+        # Recording of an item of a list
+
+        if isinstance(r, Recording):
+            return r
+
+        if isinstance(r, (str, os.PathLike)):
+            return Recording(os.fspath(r), camera, version)
+
+        r = tuple(r) + (None,) * (4 - len(r))
+        return Recording(r[0], r[1] or camera, r[2] or version, r[3])
+
+    def _initSamples(self):
+        # (recording, start_us, end_us) of all samples, recordings are opened by the pool to know their times
+
+        if self._slice is None:
+            return [(k, None, None) for k in range(len(self.recordings))]
+
+        def slices(k):
+            start, end = self._read(k, lambda events: (events.start_us, events.end_us + 1) if events.nb_events else (0, 0))
+
+            return [(k, t, min(t + self._slice, end)) for t in range(start, end, self._slice)]
+
+        samples = []
+        for s in self._getPool().map(slices, range(len(self.recordings))):
+            samples.extend(s)
+
+        return samples
+
+    def _getPool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self._workers)
+
+        return self._pool
+
+    def _submit(self, i):
+        # sample i decoded by pool, future is kept until it is done so that close can cancel it
+
+        future = self._getPool().submit(self.__getitem__, i)
+
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+        return future
+
+    def _reader(self, k):
+        # [DVSEvents, lock] of recording k, opened if needed, least recently used recording is closed
+
+        with self._lock:
+            entry = self._open.get(k)
+
+            if entry is not None:
+                self._open.move_to_end(k)
+                return entry
+
+        r = self.recordings[k]
+        entry = [DVSEvents(r.path, r.camera, r.version, index=self._index, batch=self._batch), threading.Lock()]
+
+        with self._lock:
+            if k in self._open:
+                # opened by another worker at the same time
+                entry[0].close()
+                self._open.move_to_end(k)
+                return self._open[k]
+
+            self._open[k] = entry
+
+            closed = [self._open.popitem(last=False)[1] for _ in range(len(self._open) - self._maxOpen)]
+
+        for old in closed:
+            with old[1]:
+                old[0].close()
+                old[0] = None
+
+        return entry
+
+    def _read(self, k, read):
+        # read(DVSEvents) on recording k, a reader is used by one worker at a time
+
+        while True:
+            events, lock = entry = self._reader(k)
+
+            with lock:
+                # recording closed by another worker between _reader and lock: it is opened again
+                if entry[0] is not None:
+                    return read(events)
+
+    def _decode(self, i):
+        # data of sample i, not cached
+
+        k, start, end = self._samples[i]
+
+        if start is None:
+            data = self._read(k, lambda events: events.getAllData())
+        else:
+            data = self._read(k, lambda events: events.getTimeRangeData(start, end))
+
+        if self._transform is not None:
+            data = self._transform(data)
+
+        return data
+
+    def __len__(self):
+        return len(self._samples)
+
+    def sample(self, i):
+        """
+            (recording index, start_us, end_us) of sample i, times are None for a whole recording
+        """
+
+        return self._samples[i]
+
+    def __getitem__(self, i):
+        """
+            (data, label) of sample i
+        """
+
+        if not -len(self) <= i < len(self):
+            raise IndexError("sample {} is out of dataset of {} samples".format(i, len(self)))
+        i %= len(self)
+
+        label = self.recordings[self._samples[i][0]].label
+
+        with self._lock:
+            data = self._cache.get(i)
+
+            if data is not None:
+                self._cache.move_to_end(i)
+                self.stats["hits"] += 1
+                return data, label
+
+            self.stats["misses"] += 1
+
+        data = self._decode(i)
+
+        if self._cacheSize > 0:
+            with self._lock:
+                self._cache[i] = data
+
+                while len(self._cache) > self._cacheSize:
+                    self._cache.popitem(last=False)
+
+        return data, label
+
+    def iterate(self, shuffle = False, seed = None):
+        """
+            Samples of dataset, decoded ahead by the pool of workers
+
+            Parameters
+            ----------
+                * shuffle : bool, False by default, samples in random order if True
+                * seed : int, optional, seed of random order
+
+            Yields
+            ------
+                (data, label) of each sample
+        """
+
+        order = np.arange(len(self))
+
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+
+        pending = deque()
+        order = iter(order.tolist())
+
+        try:
+            for i in order:
+                pending.append(self._submit(i))
+                if len(pending) >= self._prefetch:
+                    break
+
+            while pending:
+                future = pending.popleft()
+
+                if not future.done():
+                    t0 = time.perf_counter()
+                    result = future.result()
+                    self.stats["waits"] += 1
+                    self.stats["wait_s"] += time.perf_counter() - t0
+                else:
+                    result = future.result()
+
+                # next sample is decoded while this one is used
+                for i in order:
+                    pending.append(self._submit(i))
+                    break
+
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def __iter__(self):
+        return self.iterate()
+
+    def close(self):
+        """
+            Stop pool of workers and close all recordings
+        """
+
+        if self._pool is not None:
+            # samples not started are cancelled (shutdown has no cancel_futures before python 3.9)
+            for future in list(self._futures):
+                future.cancel()
+
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+        with self._lock:
+            for entry in self._open.values():
+                entry[0].close()
+                entry[0] = None
+            self._open.clear()
+            self._cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return "DVSDataset({} recordings, {} samples)".format(len(self.recordings), len(self))
@@ -0,0 +1,213 @@
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# Prophesee EVT 2.0 / EVT 3.0 words are stateful: a word can give the high bits of time,
+# the row or the first column of next events. Each word is given the state it depends on
+# with a forward fill (maximum.accumulate of positions), never with a loop over words.
+
+# decoded records: address (x | y << 11 | p << 22) and 64 bits time
+decoded_type = np.dtype([ ("addr", "<u4"), ("ts", "<u8") ])
+
+# (xmask, xshift, ymask, yshift, pmask, pshift) of decoded addresses
+DECODED_MASKS = (0x7ff, 0, 0x7ff << 11, 11, 1 << 22, 22)
+
+
+def _records(t, x, y, p):
+    # decoded records of events
+
+    records = np.empty(len(t), dtype=decoded_type)
+
+    records["addr"] = x.astype(np.uint32) | (y.astype(np.uint32) << 11) | (p.astype(np.uint32) << 22)
+    records["ts"] = t
+
+    return records
+
+
+def _fill(mask, values, initial):
+    """
+        Value of the last word where mask is True, for each word
+
+        Parameters
+        ----------
+            * mask : numpy bool array, words which give a value
+            * values : numpy array, value of each word (only read where mask is True)
+            * initial : value before the first word where mask is True
+
+        Returns
+        -------
+            numpy array of values, same len as mask
+    """
+
+    pos = np.where(mask, np.arange(len(mask)), -1)
+    np.maximum.accumulate(pos, out=pos)
+
+    filled = values[pos]
+    filled[pos < 0] = initial
+
+    return filled
+
+
+def _unwrap(raw, bits, last):
+    """
+        Monotonic values of a counter of bits bits, which wraps
+
+        Parameters
+        ----------
+            * raw : numpy array of counter values
+            * bits : int, number of bits of counter
+            * last : int, last unwrapped value before raw, None if there is not
+
+        Returns
+        -------
+            numpy uint64 array of unwrapped values
+    """
+
+    raw = raw.astype(np.int64)
+
+    if raw.size == 0:
+        return np.empty(0, dtype=np.uint64)
+
+    prev = np.empty_like(raw)
+    prev[0] = raw[0] if last is None else last & ((1 << bits) - 1)
+    prev[1:] = raw[:-1]
+
+    # a wrap: value decreases by more than half of counter range
+    epochs = np.cumsum((prev - raw) > (1 << (bits - 1)), dtype=np.int64)
+    if last is not None:
+        epochs += last >> bits
+
+    return (raw + (epochs << bits)).astype(np.uint64)
+
+
+def decodeEvt2(words, state):
+    """
+        Decode EVT 2.0 words (32 bits)
+
+            * CD_OFF (0x0), CD_ON (0x1) : time low (bits 22-27), x (bits 11-21), y (bits 0-10)
+            * EVT_TIME_HIGH (0x8) : time high (bits 0-27), time = time high << 6 | time low
+            * other words (triggers, ...) are ignored
+
+        Parameters
+        ----------
+            * words : numpy array of uint32 words
+            * state : (time high,) before words, None at the beginning of file
+
+        Returns
+        -------
+            records (decoded_type), state after words
+    """
+
+    words = words.astype(np.uint32, copy=False)
+    timeHigh = None if state is None else state[0]
+
+    kind = words >> 28
+
+    isHigh = kind == 0x8
+    isEvent = kind <= 0x1
+
+    high = np.zeros(len(words), dtype=np.uint64)
+    high[isHigh] = _unwrap(words[isHigh] & 0x0fffffff, 28, timeHigh)
+
+    events = words[isEvent]
+
+    # only the time high of event words is needed
+    pos = np.where(isHigh, np.arange(len(words)), -1)
+    np.maximum.accumulate(pos, out=pos)
+    pos = pos[isEvent]
+
+    t = high[pos]
+    t[pos < 0] = timeHigh or 0
+    t = (t << np.uint64(6)) | ((events >> 22) & 0x3f)
+
+    records = _records(t, (events >> 11) & 0x7ff, events & 0x7ff, kind[isEvent])
+
+    if isHigh.any():
+        timeHigh = int(high[np.nonzero(isHigh)[0][-1]])
+
+    return records, (timeHigh,)
+
+
+def decodeEvt3(words, state):
+    """
+        Decode EVT 3.0 words (16 bits)
+
+            * EVT_ADDR_Y (0x0) : y (bits 0-10) of next events
+            * EVT_ADDR_X (0x2) : one event at x (bits 0-10), polarity (bit 11)
+            * VECT_BASE_X (0x3) : first x (bits 0-10) and polarity (bit 11) of next vectors
+            * VECT_12 (0x4), VECT_8 (0x5) : events at first x + k for each bit k of mask (12 or 8 bits),
+              first x moves of 12 or 8
+            * EVT_TIME_LOW (0x6), EVT_TIME_HIGH (0x8) : 12 bits of time, time = time high << 12 | time low
+            * other words (triggers, continued, ...) are ignored
+
+        Parameters
+        ----------
+            * words : numpy array of uint16 words
+            * state : (time high, time low, y, first x, polarity) before words, None at the beginning of file
+
+        Returns
+        -------
+            records (decoded_type), state after words
+    """
+
+    words = words.astype(np.uint16, copy=False)
+    timeHigh, timeLow, y0, base0, pol0 = (None, 0, 0, 0, 0) if state is None else state
+
+    kind = words >> 12
+    value = (words & 0x7ff).astype(np.int64)
+    bit11 = (words >> 11) & 1
+
+    isY = kind == 0x0
+    isX = kind == 0x2
+    isBase = kind == 0x3
+    isV12 = kind == 0x4
+    isV8 = kind == 0x5
+    isLow = kind == 0x6
+    isHigh = kind == 0x8
+
+    high = np.zeros(len(words), dtype=np.uint64)
+    high[isHigh] = _unwrap(words[isHigh] & 0xfff, 12, timeHigh)
+
+    # first x of vectors: last base + 12 or 8 for each vector after it
+    step = np.where(isV12, 12, 0) + np.where(isV8, 8, 0)
+    before = np.cumsum(step) - step
+    base = _fill(isBase, value - before, base0) + before
+    basePol = _fill(isBase, bit11, pol0)
+
+    isEvent = isX | isV12 | isV8
+    rows = np.nonzero(isEvent)[0]
+
+    # first x, polarity and mask of event words: a single event is a vector of one event
+    first = np.where(isX, value, base)[rows]
+    pol = np.where(isX, bit11, basePol)[rows]
+    mask = np.where(isV12, words & 0xfff, np.where(isV8, words & 0xff, 1))[rows]
+
+    # one event by bit of mask, in word order then bit order
+    word, k = np.nonzero((mask[:, None] >> np.arange(12, dtype=np.uint16)) & 1)
+
+    rows = rows[word]
+
+    y = _fill(isY, value, y0)
+    low = _fill(isLow, (words & 0xfff).astype(np.uint64), timeLow)
+    high = _fill(isHigh, high, timeHigh or 0)
+
+    t = (high[rows] << np.uint64(12)) | low[rows]
+
+    records = _records(t, first[word] + k, y[rows], pol[word])
+
+    # state after words
+    if len(words):
+        if isHigh.any():
+            timeHigh = int(high[-1])
+        timeLow, y0, pol0 = int(low[-1]), int(y[-1]), int(basePol[-1])
+        base0 = int(base[-1]) + int(step[-1])
+
+    return records, (timeHigh, timeLow, y0, base0, pol0)
@@ -0,0 +1,444 @@
+import hashlib
+
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# last time of a pixel which never had an event
+_NEVER = -(1 << 62)
+
+
+def _lastOfPixels(ids, t, order):
+    # pixels of events and time of their last event, events sorted by pixel then by position with order
+
+    sortedIds = ids[order]
+
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = sortedIds[1:] != sortedIds[:-1]
+
+    return sortedIds[last], t[order][last]
+
+
+class EventFilter:
+    """
+        Filter of events, used as a pipeline stage
+
+        Events are given chunk by chunk in time order (event_type arrays or EventBatch), each chunk
+        is processed with numpy operations on whole arrays. State of pixels is kept in arrays
+        preallocated once, so a stream cut in chunks is filtered as if it was one array.
+
+            events = dvs_event.getAllData()
+            events = noiseFilter(events)
+
+            for chunk in noiseFilter.iterate(reader.iterBlocks()):
+                ...
+
+        Methods
+        -------
+
+            * keep(events) : bool array, events which pass the filter, state is updated
+            * filter(events) : events which pass the filter, same type as events
+            * iterate(chunks) : filter each chunk of an iterator
+            * reset() : forget state, next events are the beginning of a stream
+            * cacheKey() : string which identifies the filter and all its parameters
+    """
+
+    def __init__(self, width, height):
+        """
+            Parameters
+            ----------
+                * width, height : int, size of camera in pixel
+        """
+
+        self.width = int(width)
+        self.height = int(height)
+
+    def keep(self, events):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def __call__(self, events):
+        """
+            Events which pass the filter, same type as events
+        """
+
+        keep = self.keep(events)
+
+        return events if keep.all() else events[keep]
+
+    def iterate(self, chunks):
+        """
+            Filter each chunk of an iterator, in order
+        """
+
+        for events in chunks:
+            yield self(events)
+
+    def _pixels(self, events):
+        # x, y (int64) and time (int64) of events, inside : events of camera
+
+        x = events['x'].astype(np.int64)
+        y = events['y'].astype(np.int64)
+        t = events['t'].astype(np.int64)
+
+        inside = (x < self.width) & (y < self.height)
+
+        return x, y, t, inside
+
+    def cacheKey(self):
+        """
+            String which identifies the filter and all its parameters, part of the key of step caches
+            (DVSProcess step_cache). repr by default: filters whose repr does not give all parameters override it
+        """
+
+        return repr(self)
+
+    def __repr__(self):
+        return "{}({}x{})".format(type(self).__name__, self.width, self.height)
+
+
+class BackgroundActivityFilter(EventFilter):
+    """
+        Nearest neighbour background activity filter
+
+        An event passes if one of its 8 neighbour pixels had an event less than dt_us before.
+        Isolated events (background activity noise) are removed. All events update the time of
+        pixels, as a noise event can support a following event.
+
+        Within a chunk, the last earlier event of each neighbour is found with a binary search on
+        events sorted by (pixel, position), without a loop over events.
+    """
+
+    def __init__(self, width, height, dt_us = 1000):
+        """
+            Parameters
+            ----------
+                * width, height : int, size of camera in pixel
+                * dt_us : int, greatest time between an event and its support in micro-second, 1000 by default
+        """
+
+        super().__init__(width, height)
+
+        self.dt_us = int(dt_us)
+
+        # time of last event of each pixel, with a border of one pixel so neighbours are never outside
+        self._stride = self.width + 2
+        self._last = np.full((self.height + 2) * self._stride, _NEVER, dtype=np.int64)
+
+        s = self._stride
+        self._offsets = np.array([-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1], dtype=np.int64)
+
+    def reset(self):
+        self._last.fill(_NEVER)
+
+    def keep(self, events):
+        x, y, t, inside = self._pixels(events)
+        keep = np.zeros(len(t), dtype=bool)
+
+        if not inside.all():
+            x, y, t = x[inside], y[inside], t[inside]
+
+        n = len(t)
+        if n == 0:
+            return keep
+
+        ids = (y + 1) * self._stride + (x + 1)
+        pos = np.arange(n, dtype=np.int64)
+
+        # events sorted by pixel, then by position (so by time). Keys of a neighbour are keys + offset * n,
+        # they are sorted too: binary searches of sorted keys are cache friendly
+        keys = ids * n + pos
+        order = np.argsort(keys)
+        sortedKeys = keys[order]
+        sortedIds = ids[order]
+        sortedT = t[order]
+
+        support = np.full(n, _NEVER, dtype=np.int64)
+
+        for offset in self._offsets:
+            neighbour = sortedIds + offset
+
+            # last event of neighbour in previous chunks
+            np.maximum(support, self._last[neighbour], out=support)
+
+            # last event of neighbour before this event in chunk
+            found = np.searchsorted(sortedKeys, sortedKeys + offset * n) - 1
+            valid = found >= 0
+            found[~valid] = 0
+            valid &= sortedIds[found] == neighbour
+
+            np.maximum(support, np.where(valid, sortedT[found], _NEVER), out=support)
+
+        pixels, last = _lastOfPixels(ids, t, order)
+        self._last[pixels] = last
+
+        passed = np.empty(n, dtype=bool)
+        passed[order] = (sortedT - support) <= self.dt_us
+
+        if len(keep) == n:
+            return passed
+
+        keep[inside] = passed
+
+        return keep
+
+    def __repr__(self):
+        return "BackgroundActivityFilter({}x{}, dt_us={})".format(self.width, self.height, self.dt_us)
+
+
+class RefractoryFilter(EventFilter):
+    """
+        Refractory filter by pixel
+
+        An event passes if the previous event of its pixel (any polarity) is at least period_us
+        before. Bursts of a pixel are reduced to their first event.
+    """
+
+    def __init__(self, width, height, period_us = 1000):
+        """
+            Parameters
+            ----------
+                * width, height : int, size of camera in pixel
+                * period_us : int, refractory period of a pixel in micro-second, 1000 by default
+        """
+
+        super().__init__(width, height)
+
+        self.period_us = int(period_us)
+
+        # time of last event of each pixel
+        self._last = np.full(self.width * self.height, _NEVER, dtype=np.int64)
+
+    def reset(self):
+        self._last.fill(_NEVER)
+
+    def keep(self, events):
+        x, y, t, inside = self._pixels(events)
+        keep = np.zeros(len(t), dtype=bool)
+
+        if not inside.all():
+            x, y, t = x[inside], y[inside], t[inside]
+
+        if len(t) == 0:
+            return keep
+
+        ids = y * self.width + x
+
+        # events sorted by pixel, in time order inside a pixel
+        order = np.argsort(ids, kind='stable')
+        sortedIds = ids[order]
+        sortedT = t[order]
+
+        previous = np.empty_like(sortedT)
+        previous[1:] = sortedT[:-1]
+
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sortedIds[1:] != sortedIds[:-1]
+        previous[first] = self._last[sortedIds[first]]
+
+        passed = np.empty(len(t), dtype=bool)
+        passed[order] = (sortedT - previous) >= self.period_us
+
+        pixels, last = _lastOfPixels(ids, t, order)
+        self._last[pixels] = last
+
+        if len(keep) == len(t):
+            return passed
+
+        keep[inside] = passed
+
+        return keep
+
+    def __repr__(self):
+        return "RefractoryFilter({}x{}, period_us={})".format(self.width, self.height, self.period_us)
+
+
+class HotPixelFilter(EventFilter):
+    """
+        Hot pixel filter
+
+        Events of each pixel are counted during the first learn_us micro-seconds of stream. A pixel
+        is hot when its count is more than sigma robust standard deviations (median absolute
+        deviation) above the median count of active pixels. Then events of hot pixels are removed.
+        Events of learning time pass.
+
+        A mask can also be learned from events with learn(events), or given.
+
+        Attributes
+        ----------
+
+            * mask : bool array (height, width), True for hot pixels, None while learning
+    """
+
+    def __init__(self, width, height, learn_us = 1000000, sigma = 5.0, mask = None):
+        """
+            Parameters
+            ----------
+                * width, height : int, size of camera in pixel
+                * learn_us : int, learning time in micro-second, 1000000 by default
+                * sigma : float, threshold of hot pixels in robust standard deviations, 5 by default
+                * mask : bool array (height, width), optional, hot pixels. It is not learned if given
+        """
+
+        super().__init__(width, height)
+
+        self.learn_us = int(learn_us)
+        self.sigma = float(sigma)
+
+        self._counts = np.zeros(self.width * self.height, dtype=np.int64)
+        self._end = None    # end of learning time
+
+        self._fixed = mask is not None
+        self.mask = None if mask is None else np.asarray(mask, dtype=bool).reshape(self.height, self.width)
+
+    def reset(self):
+        if not self._fixed:
+            self._counts.fill(0)
+            self._end = None
+            self.mask = None
+
+    def learn(self, events):
+        """
+            Learn hot pixels from all events given
+
+            Returns
+            -------
+                mask, bool array (height, width)
+        """
+
+        x, y, _, inside = self._pixels(events)
+
+        self._counts.fill(0)
+        self._count(x[inside], y[inside])
+
+        return self._learned()
+
+    def keep(self, events):
+        x, y, t, inside = self._pixels(events)
+
+        if self.mask is None:
+            if len(t) == 0:
+                return inside
+
+            if self._end is None:
+                self._end = int(t[0]) + self.learn_us
+
+            # events of learning time are counted and pass
+            learning = int(np.searchsorted(t, self._end))
+            self._count(x[:learning][inside[:learning]], y[:learning][inside[:learning]])
+
+            if learning == len(t):
+                return inside
+
+            self._learned()
+
+            keep = inside.copy()
+            keep[learning:] &= self._keepPixels(x[learning:], y[learning:], inside[learning:])
+
+            return keep
+
+        return self._keepPixels(x, y, inside)
+
+    def _count(self, x, y):
+        # add events of pixels in counts
+
+        self._counts += np.bincount(y * self.width + x, minlength=self._counts.size)
+
+    def _learned(self):
+        # hot pixels of counts
+
+        counts = self._counts
+        active = counts[counts > 0]
+
+        if len(active) == 0:
+            hot = np.zeros(counts.size, dtype=bool)
+        else:
+            median = np.median(active)
+            deviation = max(1.4826 * np.median(np.abs(active - median)), 1.0)
+            hot = counts > median + self.sigma * deviation
+
+        self.mask = hot.reshape(self.height, self.width)
+
+        return self.mask
+
+    def _keepPixels(self, x, y, inside):
+        # events which are not of a hot pixel
+
+        keep = inside.copy()
+        keep[inside] = ~self.mask.ravel()[y[inside] * self.width + x[inside]]
+
+        return keep
+
+    def cacheKey(self):
+        # a given mask is identified by its content, not by its number of hot pixels
+
+        if self._fixed:
+            return "HotPixelFilter({}x{}, mask={})".format(self.width, self.height, hashlib.sha1(self.mask.tobytes()).hexdigest())
+
+        return repr(self)
+
+    def __repr__(self):
+        if self._fixed:
+            return "HotPixelFilter({}x{}, mask={})".format(self.width, self.height, int(self.mask.sum()))
+
+        return "HotPixelFilter({}x{}, learn_us={}, sigma={})".format(self.width, self.height, self.learn_us, self.sigma)
+
+
+class FilterChain(EventFilter):
+    """
+        Filters applied one after the other, usable as one filter
+
+            chain = FilterChain([HotPixelFilter(128, 128), BackgroundActivityFilter(128, 128)])
+            events = chain(events)
+    """
+
+    def __init__(self, filters):
+        """
+            Parameters
+            ----------
+                * filters : EventFilter or list of EventFilter, in order
+        """
+
+        if isinstance(filters, EventFilter):
+            filters = [filters]
+
+        self.filters = list(filters)
+
+        for f in self.filters:
+            if not isinstance(f, EventFilter):
+                raise TypeError("filters must be EventFilter, not {}".format(type(f).__name__))
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+
+    def keep(self, events):
+        keep = np.ones(len(events), dtype=bool)
+
+        for f in self.filters:
+            selected = np.nonzero(keep)[0]
+            keep[selected] = f.keep(events[selected] if len(selected) < len(keep) else events)
+
+        return keep
+
+    def __call__(self, events):
+        for f in self.filters:
+            events = f(events)
+
+        return events
+
+    def cacheKey(self):
+        return "FilterChain([{}])".format(", ".join(f.cacheKey() for f in self.filters))
+
+    def __repr__(self):
+        return "FilterChain([{}])".format(", ".join(repr(f) for f in self.filters))
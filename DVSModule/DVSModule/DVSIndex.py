@@ -0,0 +1,217 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from DVSModule.DVSTime import TimeUnwrapper
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+class TimeIndex:
+    """
+        Sparse time index of a dvs file
+
+        Every step-th event of the file is stored as (timestamp, byte offset).
+        Index is stored beside the file (file.idx.npz) or in a cache directory and is
+        invalidated when file size, file modification time, camera or aer version change.
+
+        Attributes
+        ----------
+
+            * step : number of events between two entries of index
+            * times : timestamp of indexed events (unwrapped, 64 bits)
+            * offsets : byte offset of indexed events
+            * lastTime : timestamp of the last event of file
+            * wraps : positions of first event after each time counter wrap
+            * key : identity of file used to invalidate index
+
+        Methods
+        -------
+
+            * build(reader, step) : build index of a file in one pass
+            * load(path, key) : load index if it exists and is still valid
+            * save(path) : write index on disk
+            * path(file, cacheDir) : path of index of a file
+            * fileKey(file, camera, version) : identity of a file
+    """
+
+    STEP = 4096
+
+    SUFFIX = ".idx.npz"
+
+    def __init__(self, step, times, offsets, lastTime, wraps, key):
+        """
+            Parameters
+            ----------
+                * step : int, number of events between two entries
+                * times : numpy array, timestamp of indexed events
+                * offsets : numpy array, byte offset of indexed events
+                * lastTime : int, timestamp of the last event of file
+                * wraps : numpy array, positions of first event after each time counter wrap
+                * key : dict, identity of file (see fileKey)
+        """
+
+        self.step = int(step)
+        self.times = times
+        self.offsets = offsets
+        self.lastTime = int(lastTime)
+        self.wraps = wraps
+        self.key = key
+
+    @staticmethod
+    def fileKey(file, camera, version):
+        """
+            Identity of a file: size, modification time, camera and aer version
+
+            Returns
+            -------
+                dict
+        """
+
+        info = os.stat(file)
+
+        return {
+            "size": int(info.st_size),
+            "mtime": int(info.st_mtime_ns),
+            "camera": type(camera).__name__,
+            "masks": [camera.Xmask, camera.Xshift, camera.Ymask, camera.Yshift, camera.Pmask, camera.Pshift],
+            "version": type(version).__name__,
+            "readMode": version.ReadMode,
+            "aeLen": version.AELen,
+        }
+
+    @classmethod
+    def path(cls, file, cacheDir = None):
+        """
+            Path of the index of a file
+
+            Parameters
+            ----------
+                * file : string, path of dvs file
+                * cacheDir : string, optional
+                    directory where index is stored, beside the file by default
+
+            Returns
+            -------
+                path of index file
+        """
+
+        if cacheDir is None:
+            return str(file) + cls.SUFFIX
+
+        # several files can have the same name in different directories
+        digest = hashlib.sha1(os.path.abspath(str(file)).encode()).hexdigest()[:16]
+        name = "{}-{}{}".format(os.path.basename(str(file)), digest, cls.SUFFIX)
+
+        return os.path.join(cacheDir, name)
+
+    @classmethod
+    def build(cls, reader, key, step = STEP):
+        """
+            Build index of a file in one pass, file is read block by block
+
+            Parameters
+            ----------
+                * reader : _DVSReader, reader of the file
+                * key : dict, identity of file (see fileKey)
+                * step : int, number of events between two entries
+
+            Returns
+            -------
+                TimeIndex
+        """
+
+        n = reader.nbEvents
+
+        # block size multiple of step: indexed events are at the same place in each block
+        block = max(1, reader._BLOCK // step) * step
+
+        # time counter wraps are found in the same pass
+        unwrapper = TimeUnwrapper(reader._tsBits)
+
+        times = []
+        lastTime = 0
+        for start in range(0, n, block):
+            ts = unwrapper(reader._readRecords(start, min(start + block, n))["ts"])
+            times.append(ts[::step])
+            lastTime = ts[-1]
+
+        times = np.concatenate(times) if times else np.empty(0, dtype=np.uint64)
+        offsets = reader._headerLen + np.arange(len(times), dtype=np.uint64) * (step * reader._aeLen)
+        wraps = np.array(unwrapper.wraps, dtype=np.int64)
+
+        return cls(step, times, offsets, lastTime, wraps, key)
+
+    @classmethod
+    def load(cls, path, key):
+        """
+            Load index if it exists and if it was built for the same file
+
+            Parameters
+            ----------
+                * path : string, path of index file
+                * key : dict, identity of file (see fileKey)
+
+            Returns
+            -------
+                TimeIndex or None if index does not exist or is outdated
+        """
+
+        try:
+            with np.load(path) as data:
+                if json.loads(str(data["key"])) != key:
+                    return None
+
+                return cls(int(data["step"]), data["times"], data["offsets"], int(data["lastTime"]),
+                    data["wraps"], key)
+
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path):
+        """
+            Write index on disk
+
+            Parameters
+            ----------
+                * path : string, path of index file
+        """
+
+        # write in a temporary file so an other process never reads a partial index
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+
+        with open(tmp, "wb") as f:
+            np.savez(f, step=self.step, times=self.times, offsets=self.offsets,
+                lastTime=self.lastTime, wraps=self.wraps, key=json.dumps(self.key))
+
+        os.replace(tmp, path)
+
+    def locate(self, time):
+        """
+            Get range of positions which contains the first event where time event >= time
+
+            Parameters
+            ----------
+                * time : int, desired time in micro-second
+
+            Returns
+            -------
+                (lo, hi) : the first event where time event >= time is in [lo, hi]
+        """
+
+        # same type as times, else searchsorted converts the whole array
+        k = int(np.searchsorted(self.times, np.uint64(max(time, 0)), side='left'))
+
+        if k == 0:
+            return 0, 0
+
+        return (k - 1) * self.step + 1, k * self.step
@@ -0,0 +1,310 @@
+import math
+import time
+import bisect
+import logging
+import threading
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# messages of all modules go to children of this logger ("DVSModule.DVSReader", "DVSModule.DVSSocket"...)
+logger = logging.getLogger("DVSModule")
+logger.addHandler(logging.NullHandler())
+
+
+def enableLogging(level = logging.INFO, stream = None):
+    """
+        Print messages of DVSModule, a shortcut of logging configuration
+
+        A handler is added once to the DVSModule logger, level of logger is only lowered.
+        verbose parameters call this function: 1 for logging.INFO (file information),
+        2 and more for logging.DEBUG (file header)
+
+        Parameters
+        ----------
+            * level : logging level, logging.INFO by default
+            * stream : stream of messages, standard error by default
+    """
+
+    if not any(getattr(h, "_dvsModule", False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(name)s: %(message)s"))
+        handler._dvsModule = True
+        logger.addHandler(handler)
+
+    if logger.level == logging.NOTSET or level < logger.level:
+        logger.setLevel(level)
+
+
+def _verboseLogging(verbose):
+    # verbose parameter of previous versions
+
+    if verbose > 0:
+        enableLogging(logging.INFO if verbose == 1 else logging.DEBUG)
+
+
+class LatencyHistogram:
+    """
+        Histogram of latencies with logarithmic buckets, memory does not grow with the number of values
+
+        Percentiles are the upper bound of their bucket (about 12% above the exact value with
+        20 buckets by decade), never more than the greatest value.
+
+        Attributes
+        ----------
+
+            * count : number of values
+            * total : sum of values in second
+            * max : greatest value in second
+
+        Methods
+        -------
+
+            * add(seconds) : add a value
+            * percentile(q) : percentile q (0 to 100) in second
+            * asDict() : count, mean, percentiles and max in micro-second
+    """
+
+    def __init__(self, lowest = 1e-6, highest = 100.0, per_decade = 20):
+        """
+            Parameters
+            ----------
+                * lowest : float, upper bound of the first bucket in second, 1 µs by default
+                * highest : float, lower bound of the last bucket in second, 100 s by default
+                * per_decade : int, number of buckets by decade, 20 by default
+        """
+
+        n = int(math.ceil(math.log10(highest / lowest) * per_decade))
+
+        self._bounds = [lowest * 10 ** (k / per_decade) for k in range(n + 1)]
+        self._counts = [0] * (n + 2)
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self._counts[bisect.bisect_left(self._bounds, seconds)] += 1
+
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+            Percentile q (0 to 100) in second, nan if there is no value
+        """
+
+        if self.count == 0:
+            return math.nan
+
+        rank = max(1, int(math.ceil(q / 100 * self.count)))
+        seen = 0
+
+        for k, c in enumerate(self._counts):
+            seen += c
+            if seen >= rank:
+                break
+
+        return min(self._bounds[k], self.max) if k < len(self._bounds) else self.max
+
+    def asDict(self):
+        """
+            count, mean, p50, p90, p99, p999 and max, times in micro-second
+        """
+
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else math.nan,
+            "p50_us": self.percentile(50) * 1e6,
+            "p90_us": self.percentile(90) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "p999_us": self.percentile(99.9) * 1e6,
+            "max_us": self.max * 1e6,
+        }
+
+
+class DVSMetrics:
+    """
+        Counters of a reader and of the steps of a process
+
+        A DVSMetrics given to DVSEvents or DVSProcess is updated at each stage. Without it, readers
+        and step functions are not instrumented at all: there is no cost when metrics are disabled.
+
+            metrics = DVSMetrics()
+            process = DVSProcess("path/to/file.dat", DVS128(), AERV1(), read_type=ReadType.FLOW, metrics=metrics)
+            ...
+            metrics.asDict()["steps"]["p99_us"]
+
+        A profiler, function profiler(stage, seconds, size), is called after each stage:
+            - "read" : bytes read from file (or memory map), size is the number of bytes
+            - "decode" : raw addresses decoded, size is the number of events
+            - "seek" : search of a time (searchTime), size is the position found
+            - "step" : step function, size is the number of events in buffer (FLOW), 0 else
+
+        Attributes
+        ----------
+
+            * bytesRead, reads : bytes read and number of reads
+            * readTime : time of reads in second
+            * eventsDecoded, decodes : events decoded and number of decodes
+            * decodeTime : time of decodes in second
+            * seeks : number of searches of a time
+            * seekTime : time of searches in second
+            * steps : LatencyHistogram of step functions
+            * bufferLast, bufferMax, bufferCapacity : occupancy of the buffer of FLOW steps, in events
+            * profiler : function, optional
+
+        Methods
+        -------
+
+            * bufferMean() : mean occupancy of buffer, in events
+            * reset() : set all counters to 0
+            * asDict() : all counters as a dict
+    """
+
+    def __init__(self, profiler = None):
+        """
+            Parameters
+            ----------
+                * profiler : function profiler(stage, seconds, size), optional
+        """
+
+        self.profiler = profiler
+
+        self._lock = threading.Lock()   # readers can be used by several threads
+
+        self.reset()
+
+    def reset(self):
+        """
+            Set all counters to 0
+        """
+
+        with self._lock:
+            self.bytesRead = 0
+            self.reads = 0
+            self.readTime = 0.0
+
+            self.eventsDecoded = 0
+            self.decodes = 0
+            self.decodeTime = 0.0
+
+            self.seeks = 0
+            self.seekTime = 0.0
+
+            self.steps = LatencyHistogram()
+
+            self.bufferLast = 0
+            self.bufferMax = 0
+            self.bufferCapacity = 0
+            self._bufferTotal = 0
+
+    def addRead(self, size, seconds):
+        with self._lock:
+            self.bytesRead += size
+            self.reads += 1
+            self.readTime += seconds
+
+        if self.profiler is not None:
+            self.profiler("read", seconds, size)
+
+    def addDecode(self, n, seconds):
+        with self._lock:
+            self.eventsDecoded += n
+            self.decodes += 1
+            self.decodeTime += seconds
+
+        if self.profiler is not None:
+            self.profiler("decode", seconds, n)
+
+    def addSeek(self, pos, seconds):
+        with self._lock:
+            self.seeks += 1
+            self.seekTime += seconds
+
+        if self.profiler is not None:
+            self.profiler("seek", seconds, pos)
+
+    def addStep(self, seconds, buffer = None):
+        size = 0
+
+        with self._lock:
+            self.steps.add(seconds)
+
+            if buffer is not None:
+                size = len(buffer)
+                self.bufferLast = size
+                self.bufferMax = max(self.bufferMax, size)
+                self.bufferCapacity = buffer.capacity
+                self._bufferTotal += size
+
+        if self.profiler is not None:
+            self.profiler("step", seconds, size)
+
+    def bufferMean(self):
+        """
+            Mean occupancy of buffer after steps, in events
+        """
+
+        return self._bufferTotal / self.steps.count if self.steps.count else 0.0
+
+    def timeStep(self, step, buffer = None):
+        """
+            Step function which times step and adds its latency
+
+            Parameters
+            ----------
+                * step : step function of a process
+                * buffer : EventRingBuffer, optional, buffer of step whose occupancy is kept
+
+            Returns
+            -------
+                timed step function
+        """
+
+        clock = time.perf_counter
+
+        def timedStep(t):
+            t0 = clock()
+            out = step(t)
+            self.addStep(clock() - t0, buffer)
+            return out
+
+        return timedStep
+
+    def asDict(self):
+        """
+            All counters as a dict
+        """
+
+        with self._lock:
+            return {
+                "bytesRead": self.bytesRead,
+                "reads": self.reads,
+                "readTime": self.readTime,
+                "eventsDecoded": self.eventsDecoded,
+                "decodes": self.decodes,
+                "decodeTime": self.decodeTime,
+                "seeks": self.seeks,
+                "seekTime": self.seekTime,
+                "steps": self.steps.asDict(),
+                "buffer": {
+                    "last": self.bufferLast,
+                    "max": self.bufferMax,
+                    "mean": self.bufferMean(),
+                    "capacity": self.bufferCapacity,
+                },
+            }
+
+    def __repr__(self):
+        return "DVSMetrics({} bytes read, {} events decoded, {} seeks, {} steps)".format(
+            self.bytesRead, self.eventsDecoded, self.seeks, self.steps.count)
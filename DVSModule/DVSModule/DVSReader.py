@@ -0,0 +1,1798 @@
+import os
+import time
+import struct
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from enum import Enum
+
+from DVSModule.DVSExceptions import *
+from DVSModule.DVSCamera import *
+from DVSModule.AERVersion import *
+from DVSModule.DVSTime import TimeUnwrapper
+from DVSModule.DVSIndex import TimeIndex
+from DVSModule.DVSBuffer import EventRingBuffer, _EventFeed
+from DVSModule.DVSBatch import EventBatch, event_type
+from DVSModule.DVSEvt import decoded_type
+from DVSModule.DVSMetrics import _verboseLogging
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# reader of aer files, it does not need nengo: nengo processes are in DVSModule.dvs
+
+
+# struct format character -> numpy type code (standard sizes)
+_STRUCT_TO_NUMPY = {
+    'B': 'u1', 'b': 'i1',
+    'H': 'u2', 'h': 'i2',
+    'I': 'u4', 'i': 'i4',
+    'L': 'u4', 'l': 'i4',
+    'Q': 'u8', 'q': 'i8',
+}
+
+_STRUCT_BYTE_ORDER = {'>': '>', '!': '>', '<': '<', '=': '=', '@': '='}
+
+
+# first bytes of the last header line (AEDAT 3.x, Prophesee)
+_HEADER_ENDS = (b'#!END-HEADER', b'% end')
+
+# header of an event packet (AEDAT 3.x): eventType, eventSource, eventSize, eventTSOffset,
+# eventTSOverflow, eventCapacity, eventNumber, eventValid
+_PACKET_HEADER = struct.Struct("<hhiiiiii")
+
+_logger = logging.getLogger(__name__)
+
+
+def _recordType(readMode, aeLen):
+    """
+        Build the numpy dtype of a raw (addr, ts) record from an AER version ReadMode
+
+        Parameters
+        ----------
+            * readMode : string, struct format of one record (ex: '>HI')
+            * aeLen : int, len of one record in byte
+
+        Returns
+        -------
+            numpy dtype with fields addr and ts
+    """
+
+    order = _STRUCT_BYTE_ORDER.get(readMode[0])
+    codes = readMode[1:] if order is not None else readMode
+    order = order or '='
+
+    if len(codes) != 2 or any(c not in _STRUCT_TO_NUMPY for c in codes):
+        raise ValueError("ReadMode {} cannot be interpreted as an (addr, ts) record".format(readMode))
+
+    dtype = np.dtype([
+        ("addr", order + _STRUCT_TO_NUMPY[codes[0]]),
+        ("ts", order + _STRUCT_TO_NUMPY[codes[1]])
+    ])
+
+    if dtype.itemsize != aeLen:
+        raise ValueError("ReadMode {} does not match AELen {}".format(readMode, aeLen))
+
+    return dtype
+
+
+def _searchSorted(times, time):
+    """
+        Get position of the first time >= time in a sorted array of integer times
+
+        time is converted to the type of array: with an other type, searchsorted
+        converts the whole array at each call
+
+        Parameters
+        ----------
+            * times : numpy array of sorted integer times
+            * time : desired time
+
+        Returns
+        -------
+            position of the first time >= time, len(times) if there is not
+    """
+
+    # times are integers: t >= time <=> t >= ceil(time)
+    time = int(np.ceil(time))
+    info = np.iinfo(times.dtype)
+
+    if time > info.max:
+        return len(times)
+
+    return int(np.searchsorted(times, times.dtype.type(max(time, info.min)), side='left'))
+
+
+def _newEvents(n, batch):
+    # output of n events: EventBatch (structure of arrays) or event_type array
+
+    return EventBatch.empty(n) if batch else np.empty(n, dtype=event_type)
+
+
+def _nbWorkers(workers):
+    # number of threads, None for the number of cpu
+
+    if workers is None:
+        return os.cpu_count() or 1
+
+    return max(1, int(workers))
+
+
+class ReadType(Enum):
+    """ 
+
+    Different type of reading method.
+
+    BLOC : The file is completely read and datas aree stored in memory
+    FLOW : The file is reading step by step. Datas are not stored in memroy
+    MMAP : The file is mapped in memory. Raw datas stay on disk and are decoded slice by slice when needed
+
+    """
+    BLOC = 0
+    FLOW = 1
+    MMAP = 2
+
+
+
+class _DVSReader:
+    """ Class who's read data in file.
+
+    Attributes
+    ----------
+
+    * duration : duration of video stored on the file
+    * position : position of reading pointer
+
+    Methods
+    -------
+
+    * readAllFile() : read all dvs file and return all datas
+    * readData() : read the first polarity data from reading head and return this data
+    * readBlock(n) : read at most n datas from reading head and return these datas
+    * readEvents(start, stop) : read datas n° start to n° stop (excluded), reading head does not move
+    * iterBlocks(start, n, workers) : iterate over datas by block, blocks can be decoded by a thread pool
+    * findTime(time, start) : get position of the first data after start where time event >= time
+    * searchTime(time, start) : same as findTime but with a binary search on file (or on time index)
+    * readTimeRange(start, end) : read datas where start <= time event < end
+    * readAddresses(start, stop) : read raw addresses and times of datas n° start to n° stop (excluded)
+    * readStreams(start, stop, kinds) : split datas n° start to n° stop (excluded) by kind (polarity, aps, imu, trigger)
+    * place(pos)": place the reading head to read the data n° pos 
+    * close() : close file
+
+    """
+
+    # number of records read at once when the file is scanned
+    _BLOCK = 65536
+
+    # number of words decoded at once (stateful versions)
+    _CHUNK = 1 << 20
+
+    # number of records between two samples of the time field when time counter wraps are searched
+    _WRAP_SAMPLE = 1 << 16
+
+    def __init__(self, file, camera, version, verbose = 0, mmap = False, index = False, batch = False, metrics = None):
+        """
+            Initialize all parameter wich allow to read data
+
+            Parameters
+            ----------
+            * file : string, required
+                path of file who's contain the datas 
+            * camera : CameraFamily, required
+                Type of camera which was used to write file
+            * version : AERVersion, required
+                AER Version file 
+            * verbose : int, 0 by default
+                print messages of DVSModule logger (see DVSMetrics.enableLogging)
+                - 0 : logging configuration is not changed
+                - 1 : file information (logging.INFO)
+                - 2 and more : file header (logging.DEBUG)
+            * mmap : bool, False by default
+                if True, raw records are memory mapped and only decoded when they are read
+            * index : bool or string, False by default
+                use a sparse time index of the file, built once and stored on disk
+                - False : no index
+                - True : index is stored beside the file
+                - string : directory where index is stored
+            * batch : bool, False by default
+                default output of reading methods: EventBatch if True, event_type array else
+            * metrics : DVSMetrics, optional
+                counters of reads, decodes and seeks, reader is not instrumented without it
+        """
+
+        if not isinstance(camera, CameraFamily):
+            raise TypeError("camera must be an instance of CameraFamily interface")
+
+        if not isinstance(version, AERVersion):
+            raise TypeError("version must be an instance of AERVersion")
+
+
+        if file == None:
+            raise ValueError
+
+        _verboseLogging(verbose)
+
+        self._batch = batch     # output of reading methods is an EventBatch
+
+        # file informations
+        self._filePath = file
+        self._fileInfo = None
+
+        self._aerDataFile = None    # file ref
+
+        self._fileLen = None # size of file
+
+        # decoder of addresses (masks and kinds of addresses), the address layout of some versions does not depend on camera
+        self._kernel = addressDecoder(version.AddressMasks) if version.AddressMasks else cameraDecoder(camera)
+        self._masks = self._kernel.masks
+
+        self._xmask, self._xshift, self._ymask, self._yshift, self._pmask, self._pshift = self._masks
+
+        # reading information
+        self._readMode = version.ReadMode 
+
+        self._aeLen = version.AELen
+
+        # records of stateful versions are decoded from words (see AERVersion.decode)
+        self._recordType = decoded_type if version.Stateful else _recordType(self._readMode, self._aeLen)
+        self._tsType = self._recordType.fields["ts"][0]
+        self._tsOffset = self._recordType.fields["ts"][1]
+        self._tsBits = self._tsType.itemsize * 8
+
+        self._lineNum = None # actual line
+        self._posPtr = None  # position of reader on file
+
+        self._lock = threading.Lock()   # file access without pread
+
+        self._headerLen = 0
+
+        self._nbEvents = 0  # number of complete records after header
+        self._dataEnd = 0   # byte position of the end of the last complete record
+
+        self._initRead(version.FileExtension, version.HeaderPrefix)    # get information of datas
+
+        self._metrics = metrics
+
+        if metrics is not None:
+            self._instrument(metrics)
+
+        self._records = None    # memory mapped raw records (mmap mode only)
+
+        self._wraps = None  # positions of first data after each time counter wrap
+
+        self._packets = None    # table of event packets (packet versions only)
+        self._chunks = None     # table of decoded chunks of words (stateful versions only)
+        self._fileMap = None    # memory mapped file (packet and stateful versions in mmap mode only)
+
+        if version.PacketHeaderLen:
+            self._initPackets(version)
+
+        if version.Stateful:
+            self._initChunks(version)
+
+        if mmap:
+            self._initMmap()
+
+        self._index = None  # sparse time index (TimeIndex)
+
+        if index:
+            self._initIndex(camera, version, None if index is True else index)
+
+        # data information
+        self._duration = None # duration of video stored in file*
+
+        self._start = None 
+        self._end = None
+
+    @property
+    def duration(self):
+        """
+            duration of the video stored in file
+        """
+        if self._duration is None:
+            self._getDuration()
+
+        return self._duration
+
+    @property
+    def startTime(self):
+        """
+            data start time
+        """
+        if self._duration is None:
+            self._getDuration()
+
+        return self._start
+
+    @property
+    def endTime(self):
+        """
+            data end time
+        """
+        if self._duration is None:
+            self._getDuration()
+
+        return self._end
+
+    @property
+    def position(self):
+        """
+            position of reading head according to data numerotation and not byte numerotation 
+        """
+        return (self._posPtr-self._headerLen) // self._aeLen
+
+    @property
+    def nbEvents(self):
+        """
+            number of events stored in file (a trailing partial record is ignored)
+        """
+        return self._nbEvents
+
+
+    def _initRead(self, ext, prefix = b'#'):
+        # Open file and get informations about data in this file
+                
+        # file extension check
+        if not str(self._filePath).endswith(str(ext)):
+            actual_ext = str(self._filePath).split('.')[-1]
+            raise ValueError("Wrong file extension. Actual file extension .{0}. Excepted extension {1}".format(actual_ext, ext))
+
+
+        # open file
+        try:
+            self._aerDataFile = open(self._filePath, 'rb')
+        except FileNotFoundError as e:
+            raise FileNotFoundError(e)
+
+
+        # get file informations
+        self._fileInfo = os.stat(self._filePath)
+        self._fileLen = self._fileInfo.st_size
+
+
+        self._lineNum = 0 # line number
+        self._posPtr = 0  # pointer, position on bytes
+
+        _logger.info("%s : %d bytes", self._filePath, self._fileLen)
+
+        # get header information (v1: no head information), header lines start with prefix
+        lt = self._aerDataFile.readline()
+        while lt.startswith(prefix):
+            self._posPtr+=len(lt)
+            self._lineNum += 1
+            _logger.debug("header : %s", lt.decode('ascii', 'replace').rstrip())
+
+            # AEDAT 3.x, Prophesee: data can start with a prefix byte after the end of header
+            if lt.startswith(_HEADER_ENDS):
+                break
+
+            lt = self._aerDataFile.readline()
+
+
+        self._headerLen = self._posPtr
+
+        # a truncated file can end with a partial record, it is ignored
+        self._nbEvents = (self._fileLen - self._headerLen) // self._aeLen
+        self._dataEnd = self._headerLen + self._nbEvents * self._aeLen
+
+        if self._dataEnd != self._fileLen:
+            _logger.info("ignored trailing bytes : %d", self._fileLen - self._dataEnd)
+
+        _logger.info("masks : x %#x >> %d, y %#x >> %d, p %#x >> %d", self._xmask, self._xshift,
+            self._ymask, self._yshift, self._pmask, self._pshift)
+
+
+
+
+    def _initMmap(self):
+        # map raw records after header, pages are loaded by the OS when they are accessed
+
+        if self._packets is not None or self._chunks is not None:
+            # file is mapped as bytes, records are gathered packet by packet or decoded chunk by chunk
+            if self._fileLen:
+                self._fileMap = np.memmap(self._filePath, dtype=np.uint8, mode='r')
+            return
+
+        if self._nbEvents == 0:
+            self._records = np.empty(0, dtype=self._recordType)
+        else:
+            self._records = np.memmap(self._filePath, dtype=self._recordType, mode='r',
+                offset=self._headerLen, shape=(self._nbEvents,))
+
+        _logger.info("memory mapped records : %d", self._nbEvents)
+
+
+
+    def _initPackets(self, version):
+        # scan packet headers, only packets of version.EventType are kept, others are skipped by size
+
+        headerLen = version.PacketHeaderLen
+        eventType = version.EventType
+
+        offsets = []    # byte position of first record of packet
+        counts = []     # number of records of packet
+        overflows = []  # time overflow counter of packet
+        selections = {} # packet -> positions of valid records, when some records are not valid
+
+        pos = self._headerLen
+        while pos + headerLen <= self._fileLen:
+            kind, _, size, _, overflow, capacity, number, valid = _PACKET_HEADER.unpack(self._readBytes(pos, _PACKET_HEADER.size))
+
+            if size <= 0 or capacity < 0:
+                _logger.warning("corrupted packet header at byte %d", pos)
+                break
+
+            start = pos + headerLen
+            pos = start + size * capacity
+
+            if kind != eventType or size != self._aeLen:
+                continue
+
+            # a truncated last packet keeps its complete records
+            number = min(number, capacity, max(0, self._fileLen - start) // size)
+
+            if valid < number:
+                records = np.frombuffer(self._readBytes(start, number * size), dtype=self._recordType)
+                selection = np.nonzero(records["addr"] & 1)[0]
+                number = len(selection)
+
+                # a packet without valid record is skipped, it has no selection
+                if number:
+                    selections[len(offsets)] = selection
+
+            if number:
+                offsets.append(start)
+                counts.append(number)
+                overflows.append(overflow)
+
+        self._packets = {
+            "offset": np.array(offsets, dtype=np.int64),
+            "start": np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            "overflow": np.array(overflows, dtype=np.uint64) << np.uint64(31),
+            "selection": selections,
+        }
+
+        self._packetType = self._recordType
+
+        # records are given with their 64 bits time, time counter never wraps
+        self._recordType = np.dtype([("addr", self._packetType.fields["addr"][0]), ("ts", "u8")])
+        self._tsBits = 64
+        self._wraps = np.empty(0, dtype=np.int64)
+
+        self._nbEvents = int(self._packets["start"][-1])
+        self._dataEnd = self._headerLen + self._nbEvents * self._aeLen
+
+        _logger.info("event packets : %d, events : %d", len(offsets), self._nbEvents)
+
+
+
+    def _readPackets(self, start, stop):
+        # get records n° start to n° stop (excluded) of packets, with one read of the bytes of these packets
+
+        packets = self._packets
+        starts = packets["start"]
+        size = self._aeLen
+
+        records = np.empty(max(0, stop - start), dtype=self._recordType)
+
+        if stop <= start:
+            return records
+
+        first = int(np.searchsorted(starts, start, side='right')) - 1
+        last = int(np.searchsorted(starts, stop, side='left'))
+
+        # part of each packet which is read: packet, first byte, end byte, valid records of part
+        pieces = []
+        for k in range(first, last):
+            a = max(start, int(starts[k])) - int(starts[k])
+            b = min(stop, int(starts[k + 1])) - int(starts[k])
+
+            selection = packets["selection"].get(k)
+            if selection is not None:
+                selection = selection[a:b]
+                a, b = int(selection[0]), int(selection[-1]) + 1
+                selection = selection - a
+
+            offset = int(packets["offset"][k])
+            pieces.append((k, offset + a * size, offset + b * size, selection))
+
+        lo = pieces[0][1]
+        hi = pieces[-1][2]
+
+        if self._fileMap is not None:
+            data = self._fileMap[lo:hi]
+        else:
+            data = np.frombuffer(self._readBytes(lo, hi - lo), dtype=np.uint8)
+
+        pos = 0
+        for k, begin, end, selection in pieces:
+            packet = data[begin - lo:end - lo].view(self._packetType)
+            if selection is not None:
+                packet = packet[selection]
+
+            out = records[pos:pos + len(packet)]
+            pos += len(packet)
+
+            out["addr"] = packet["addr"]
+            np.bitwise_or(packet["ts"], packets["overflow"][k], out=out["ts"], casting='unsafe')
+
+        return records
+
+
+
+    def _initChunks(self, version):
+        # decode file once chunk by chunk, state of decoder at the beginning of each chunk is kept
+        # so any chunk can be decoded again alone
+
+        size = self._aeLen
+        words = self._CHUNK
+
+        self._decoder = version.decode
+        self._wordType = np.dtype(self._readMode)
+
+        offsets = []    # byte position of first word of chunk
+        counts = []     # number of records of chunk
+        states = []     # state of decoder before chunk
+
+        nbWords = (self._fileLen - self._headerLen) // size
+        state = None
+
+        for w in range(0, nbWords, words):
+            offset = self._headerLen + w * size
+            data = np.frombuffer(self._readBytes(offset, min(words, nbWords - w) * size), dtype=self._wordType)
+
+            offsets.append(offset)
+            states.append(state)
+
+            records, state = self._decoder(data, state)
+            counts.append(len(records))
+
+        offsets.append(self._headerLen + nbWords * size)
+
+        self._chunks = {
+            "offset": np.array(offsets, dtype=np.int64),
+            "start": np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            "state": states,
+        }
+
+        self._lastChunk = (None, None)  # last decoded chunk, sequential reads decode it once
+
+        # records are given with their 64 bits time
+        self._tsBits = 64
+        self._wraps = np.empty(0, dtype=np.int64)
+
+        self._nbEvents = int(self._chunks["start"][-1])
+        self._dataEnd = self._headerLen + self._nbEvents * self._aeLen
+
+        _logger.info("decoded words : %d, events : %d", nbWords, self._nbEvents)
+
+
+
+    def _decodeChunk(self, k):
+        # records of chunk k
+
+        last = self._lastChunk
+        if last[0] == k:
+            return last[1]
+
+        lo, hi = int(self._chunks["offset"][k]), int(self._chunks["offset"][k + 1])
+
+        if self._fileMap is not None:
+            data = self._fileMap[lo:hi].view(self._wordType)
+        else:
+            data = np.frombuffer(self._readBytes(lo, hi - lo), dtype=self._wordType)
+
+        records, _ = self._decoder(data, self._chunks["state"][k])
+
+        self._lastChunk = (k, records)
+
+        return records
+
+
+
+    def _readChunks(self, start, stop):
+        # get records n° start to n° stop (excluded), chunks which contain them are decoded
+
+        starts = self._chunks["start"]
+
+        if stop <= start:
+            return np.empty(0, dtype=self._recordType)
+
+        first = int(np.searchsorted(starts, start, side='right')) - 1
+        last = int(np.searchsorted(starts, stop, side='left'))
+
+        parts = [self._decodeChunk(k) for k in range(first, last)]
+        records = parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+        base = int(starts[first])
+
+        return records[start - base:stop - base]
+
+
+
+    def _initIndex(self, camera, version, cacheDir):
+        # load time index of file, or build it and store it if it does not exist or is outdated
+
+        key = TimeIndex.fileKey(self._filePath, camera, version)
+        path = TimeIndex.path(self._filePath, cacheDir)
+
+        self._index = TimeIndex.load(path, key)
+
+        if self._index is not None:
+            self._wraps = self._index.wraps
+            _logger.info("time index loaded : %s", path)
+            return
+
+        self._index = TimeIndex.build(self, key)
+        self._wraps = self._index.wraps
+
+        try:
+            if cacheDir is not None:
+                os.makedirs(cacheDir, exist_ok=True)
+            self._index.save(path)
+        except OSError as e:
+            # index can still be used for this reader
+            _logger.warning("time index cannot be stored : %s", e)
+        else:
+            _logger.info("time index stored : %s", path)
+
+
+
+    def _getDuration(self):
+        # duration = time of the last data - time of the first data 
+
+        if self._nbEvents == 0:
+            self._start = self._end = self._duration = 0
+            return
+
+        if self._index is not None:
+            self._start = int(self._index.times[0])
+            self._end = self._index.lastTime
+            self._duration = self._end - self._start
+            return
+
+        # time of last data depends on number of time counter wraps
+        self._end = self._readTime(self._nbEvents - 1)
+        self._start = self._readTime(0)
+
+        self._duration = self._end - self._start
+
+
+
+    def _getWraps(self):
+        # positions of first data after each time counter wrap, found once if needed, without a scan of the file:
+        # the time field is sampled every _WRAP_SAMPLE records (a strided view of the memory mapped records).
+        # Between two samples, time counter does not wrap if time increases by at most half of counter range,
+        # only the other intervals (a wrap, or a gap too long to know) are read entirely.
+        # Records _WRAP_SAMPLE apart are expected less than a whole counter range apart (71.6 minutes for 32 bits)
+
+        if self._wraps is None:
+            if self._records is not None:
+                ts = self._records["ts"]
+            elif self._nbEvents:
+                ts = np.memmap(self._filePath, dtype=self._recordType, mode='r',
+                    offset=self._headerLen, shape=(self._nbEvents,))["ts"]
+            else:
+                ts = np.empty(0, dtype=self._tsType)
+
+            half = 1 << (self._tsBits - 1)
+
+            samples = np.arange(0, len(ts) + self._WRAP_SAMPLE - 1, self._WRAP_SAMPLE)
+            samples[-1:] = min(int(samples[-1]), len(ts) - 1)
+
+            sampled = ts[samples].astype(np.int64) if len(ts) else np.empty(0, dtype=np.int64)
+            increase = sampled[1:] - sampled[:-1]
+
+            wraps = []
+
+            # a wrap is a time which decreases by more than half of counter range (see TimeUnwrapper),
+            # times are compared in the type of file, only decreasing times are converted
+            for k in np.nonzero((increase < 0) | (increase > half))[0]:
+                start = int(samples[k])
+                t = ts[start:int(samples[k + 1]) + 1]
+
+                drops = np.nonzero(t[1:] < t[:-1])[0]
+                drops = drops[(t[drops].astype(np.int64) - t[drops + 1].astype(np.int64)) > half]
+                wraps.extend((drops + start + 1).tolist())
+
+            self._wraps = np.array(wraps, dtype=np.int64)
+
+            _logger.info("time counter wraps : %d", len(self._wraps))
+
+        return self._wraps
+
+
+    def _unwrap(self, ts, start):
+        # convert raw times of datas n° start, start+1, ... into 64 bits monotonic times
+
+        wraps = self._getWraps()
+        ts = ts.astype(np.uint64)
+
+        if len(wraps) == 0 or len(ts) == 0:
+            return ts
+
+        first = int(np.searchsorted(wraps, start, side='right'))
+        last = int(np.searchsorted(wraps, start + len(ts) - 1, side='right'))
+
+        if first == last:
+            ts += np.uint64(first << self._tsBits)
+        else:
+            epochs = np.searchsorted(wraps, np.arange(start, start + len(ts)), side='right')
+            ts += epochs.astype(np.uint64) << np.uint64(self._tsBits)
+
+        return ts
+
+
+    def _newEvents(self, n, batch = None):
+        # output of n datas, batch None for the default output of reader
+
+        return _newEvents(n, self._batch if batch is None else batch)
+
+
+    def _decode(self, records, start, events = None, batch = None):
+        # convert an array of raw records (datas n° start, start+1, ...) into events, column by column
+        # events can be a preallocated array (event_type or EventBatch) where datas are written,
+        # else records which are not polarity events (APS, IMU, triggers) are ignored
+
+        ts = self._unwrap(records["ts"], start)
+
+        if events is None:
+            selected = self._kernel.select(records["addr"])
+
+            if selected is not None:
+                records = records[selected]
+                ts = ts[selected]
+
+            events = self._newEvents(len(records), batch)
+
+        self._decodeAddr(records, events)
+        events['t'] = ts
+
+        return events
+
+
+    def _decodeAddr(self, records, events):
+        # write x, y, p of raw records in events
+
+        self._kernel.decode(records["addr"], events)
+
+
+    def _parse(self, s, pos):
+        # convert bytes read (data n° pos) into understable data, one event_type record
+
+        return self._decodeOne(np.frombuffer(s, dtype=self._recordType), pos)
+
+
+    def _decodeOne(self, records, pos):
+        # convert one raw record (data n° pos) into one event_type record,
+        # None if it is not a polarity event (APS, IMU, triggers)
+
+        selected = self._kernel.select(records["addr"])
+
+        if selected is not None and not selected[0]:
+            return None
+
+        return self._decode(records, pos, _newEvents(1, False))[0]
+
+    
+    def _readRecords(self, start, stop):
+        # get raw records n° start to n° stop (excluded) without moving reading head
+
+        if self._packets is not None:
+            return self._readPackets(start, stop)
+
+        if self._chunks is not None:
+            return self._readChunks(start, stop)
+
+        if self._records is not None:
+            return self._records[start:stop]
+
+        s = self._readBytes(self._headerLen + start * self._aeLen, (stop - start) * self._aeLen)
+
+        return np.frombuffer(s, dtype=self._recordType)
+
+
+    def _readBytes(self, offset, size):
+        # read size bytes at offset, file position does not move so several threads can read
+
+        if not hasattr(os, "pread"):
+            with self._lock:
+                self._aerDataFile.seek(offset)
+                return self._aerDataFile.read(size)
+
+        fd = self._aerDataFile.fileno()
+        parts = []
+
+        # pread can return less bytes than asked (more than 2 GiB)
+        while size > 0:
+            s = os.pread(fd, size, offset)
+            if not s:
+                break
+            parts.append(s)
+            offset += len(s)
+            size -= len(s)
+
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+
+    def _read(self):
+        # read bytes and actualize the reader position
+
+        self._aerDataFile.seek(self._posPtr)
+        s = self._aerDataFile.read(self._aeLen)
+        self._posPtr += self._aeLen
+
+        return s
+
+
+    def _instrument(self, metrics):
+        # replace the methods of each stage of this reader by timed methods which update metrics,
+        # a reader without metrics keeps its methods and has no cost
+
+        clock = time.perf_counter
+
+        readBytes = self._readBytes
+        read = self._read
+        readRecords = self._readRecords
+        decodeAddr = self._decodeAddr
+        searchTime = self.searchTime
+
+        def timedReadBytes(offset, size):
+            t0 = clock()
+            s = readBytes(offset, size)
+            metrics.addRead(len(s), clock() - t0)
+            return s
+
+        def timedRead():
+            t0 = clock()
+            s = read()
+            metrics.addRead(len(s), clock() - t0)
+            return s
+
+        def timedReadRecords(start, stop):
+            # memory mapped records are not read by _readBytes: bytes of records are counted
+            if self._records is None and self._fileMap is None:
+                return readRecords(start, stop)
+
+            t0 = clock()
+            records = readRecords(start, stop)
+            metrics.addRead(max(0, stop - start) * self._aeLen, clock() - t0)
+            return records
+
+        def timedDecodeAddr(records, events):
+            t0 = clock()
+            decodeAddr(records, events)
+            metrics.addDecode(len(records), clock() - t0)
+
+        def timedSearchTime(time, start = 0):
+            t0 = clock()
+            pos = searchTime(time, start)
+            metrics.addSeek(pos, clock() - t0)
+            return pos
+
+        self._readBytes = timedReadBytes
+        self._read = timedRead
+        self._readRecords = timedReadRecords
+        self._decodeAddr = timedDecodeAddr
+        self.searchTime = timedSearchTime
+
+
+    def readAllFile(self, workers = 1, batch = None):
+        """
+            Read all data on file
+
+            Parameters
+            ----------
+                * workers : int, 1 by default
+                    number of threads which decode file, None for the number of cpu
+                * batch : bool, optional
+                    EventBatch output if True, default output of reader if None
+
+            Returns
+            -------
+                numpy array list of all event (dtype=event_type), or EventBatch
+        """
+
+        workers = _nbWorkers(workers)
+
+        if workers > 1 and self._nbEvents >= 2 * self._BLOCK:
+            events = self._readAllParallel(workers, batch)
+
+        else:
+            # one bulk read of every complete record, decoded column by column
+            records = self._readRecords(0, self._nbEvents)
+
+            # time counter wraps are found on datas already read
+            if self._wraps is None:
+                unwrapper = TimeUnwrapper(self._tsBits)
+                unwrapper(records["ts"])
+                self._wraps = np.array(unwrapper.wraps, dtype=np.int64)
+
+            events = self._decode(records, 0, batch=batch)
+
+        self._posPtr = self._dataEnd
+
+        if _logger.isEnabledFor(logging.INFO):
+            _logger.info("read %d (~ %.2fM) AE events, duration= %.2fs", len(events), len(events) / 1e6, self.duration * 1e-6)
+
+        return events
+
+
+    def _readAllParallel(self, workers, batch = None):
+        # decode record aligned ranges of file in a thread pool, directly in the output array
+
+        n = self._nbEvents
+        events = self._newEvents(n, batch)
+
+        # several ranges by thread to balance work, without empty ranges when there are more threads than records
+        bounds = np.unique(np.linspace(0, n, 4 * workers + 1).astype(np.int64))
+        ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        workers = max(1, min(workers, len(ranges)))
+
+        known = self._wraps is not None
+
+        # records which are polarity events, ranges are filtered at the end
+        keep = np.empty(n, dtype=bool) if self._kernel.filters else None
+
+        def decode(r):
+            a, b = r
+            records = self._readRecords(a, b)
+
+            if keep is not None:
+                keep[a:b] = self._kernel.select(records["addr"])
+
+            if known:
+                self._decode(records, a, events[a:b])
+                return None
+
+            # wraps are not known: times are unwrapped in the range, ranges are joined after
+            self._decodeAddr(records, events[a:b])
+
+            unwrapper = TimeUnwrapper(self._tsBits)
+            events['t'][a:b] = unwrapper(records["ts"])
+
+            return unwrapper.wraps, int(records["ts"][0]), int(records["ts"][-1])
+
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(decode, ranges))
+
+            if known:
+                return events if keep is None else events[keep]
+
+            # a wrap can also happen between two ranges
+            half = 1 << (self._tsBits - 1)
+            wraps = []
+            epochs = []
+            last = None
+
+            for (a, b), (rangeWraps, first, rangeLast) in zip(ranges, results):
+                if last is not None and last - first > half:
+                    wraps.append(a)
+
+                epochs.append(len(wraps))
+                wraps.extend(a + w for w in rangeWraps)
+                last = rangeLast
+
+            self._wraps = np.array(wraps, dtype=np.int64)
+
+            def shift(k):
+                a, b = ranges[k]
+                if epochs[k]:
+                    events['t'][a:b] += np.uint64(epochs[k] << self._tsBits)
+
+            list(pool.map(shift, range(len(ranges))))
+
+        return events if keep is None else events[keep]
+
+
+    def iterBlocks(self, start, n, workers = 1, batch = None):
+        """
+            Iterate over datas from data n° start by block of at most n datas.
+            With several workers, next blocks are decoded by a thread pool while
+            current block is used, blocks are always given in file order
+
+            Parameters
+            ----------
+                * start : int, position of first data
+                * n : int, maximum number of datas in a block
+                * workers : int, 1 by default
+                    number of threads which decode blocks, None for the number of cpu
+                * batch : bool, optional
+                    EventBatch blocks if True, default output of reader if None
+
+            Yields
+            ------
+                numpy array of event_type data, or EventBatch
+        """
+
+        workers = _nbWorkers(workers)
+        pos = max(0, start)
+
+        if workers <= 1:
+            while pos < self._nbEvents:
+                yield self.readEvents(pos, pos + n, batch)
+                pos += n
+            return
+
+        # wraps must be known before threads decode
+        self._getWraps()
+
+        pending = deque()
+
+        with ThreadPoolExecutor(workers) as pool:
+            try:
+                while pos < self._nbEvents or pending:
+                    while pos < self._nbEvents and len(pending) < workers:
+                        pending.append(pool.submit(self.readEvents, pos, pos + n, batch))
+                        pos += n
+
+                    yield pending.popleft().result()
+            finally:
+                for f in pending:
+                    f.cancel()
+
+
+    def readData(self):
+        """
+            Read just on data en return an event_type
+            records which are not polarity events (APS, IMU, triggers) are skipped like in blocks
+
+            Returns
+            -------
+                data read, one event_type record (fields are scalars: int(data['t']))
+        """
+
+        while self._posPtr + self._aeLen <= self._dataEnd:
+            pos = self.position
+
+            if self._records is not None or self._packets is not None or self._chunks is not None:
+                records = self._readRecords(pos, pos + 1)
+                self._posPtr += self._aeLen
+                data = self._decodeOne(records, pos)
+            else:
+                data = self._parse(self._read(), pos)
+
+            if data is not None:
+                return data
+
+        raise NoMoreDataError()
+
+
+    def readBlock(self, n, batch = None):
+        """
+            Read at most n datas from reading head and move reading head after these datas
+
+            Parameters
+            ----------
+                * n : int, maximum number of datas to read
+                * batch : bool, optional
+                    EventBatch output if True, default output of reader if None
+
+            Returns
+            -------
+                numpy array of event_type data, or EventBatch
+        """
+
+        start = self.position
+
+        if not (start < self._nbEvents):
+            raise NoMoreDataError()
+
+        stop = min(start + n, self._nbEvents)
+        events = self.readEvents(start, stop, batch)
+        self._posPtr = self._headerLen + stop * self._aeLen
+
+        return events
+
+
+    def readEvents(self, start, stop, batch = None):
+        """
+            Read datas n° start to n° stop (excluded). Reading head does not move
+
+            Parameters
+            ----------
+                * start : int, position of first data
+                * stop : int, position after the last data
+                * batch : bool, optional
+                    EventBatch output if True, default output of reader if None
+
+            Returns
+            -------
+                numpy array of event_type data, or EventBatch
+        """
+
+        start = max(0, start)
+        stop = min(stop, self._nbEvents)
+
+        if stop <= start:
+            return self._newEvents(0, batch)
+
+        return self._decode(self._readRecords(start, stop), start, batch=batch)
+
+
+    def _readTime(self, pos):
+        # read only the time field of data n° pos, unwrapped
+
+        if self._packets is not None or self._chunks is not None:
+            return int(self._readRecords(pos, pos + 1)["ts"][0])
+
+        if self._records is not None:
+            ts = int(self._records[pos]["ts"])
+        else:
+            s = self._readBytes(self._headerLen + pos * self._aeLen + self._tsOffset, self._tsType.itemsize)
+            ts = int(np.frombuffer(s, dtype=self._tsType)[0])
+
+        return ts + (int(np.searchsorted(self._getWraps(), pos, side='right')) << self._tsBits)
+
+
+    def _readTimes(self, start, stop):
+        # read only the time field of datas n° start to n° stop (excluded), unwrapped
+
+        return self._unwrap(self._readRecords(start, stop)["ts"], start)
+
+
+    def searchTime(self, time, start = 0):
+        """
+            Get position of the first data after data n° start where time event >= time
+            Only time field of about log2(nbEvents) datas is read, reading head does not move
+
+            Without time index, the first call (or the first findTime, duration...) also finds the
+            time counter wraps of the file from a sample of the time field (one record in 65536),
+            so its cost hardly depends on the size of file
+
+            Parameters
+            ----------
+                * time : desired time in micro-second
+                * start : int, position where search begins (0 by default)
+
+            Returns
+            -------
+                position of data, number of events if no data has an event time >= time
+        """
+
+        time = int(np.ceil(time))
+
+        # the index gives the range of the event, only this range is read
+        if self._index is not None:
+            lo, hi = self._index.locate(time)
+            hi = min(hi, self._nbEvents)
+
+            ts = self._readTimes(lo, hi)
+
+            return max(start, lo + _searchSorted(ts, time))
+
+        lo = max(0, start)
+        hi = self._nbEvents
+
+        # bisection on time field until the remaining range fits in one small read
+        while hi - lo > 256:
+            mid = (lo + hi) // 2
+
+            if self._readTime(mid) < time:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        ts = self._readTimes(lo, hi)
+
+        return lo + _searchSorted(ts, time)
+
+
+    def readTimeRange(self, start, end, batch = None):
+        """
+            Read datas where start <= time event < end. Reading head does not move
+
+            Parameters
+            ----------
+                * start : start time in micro-second
+                * end : end time in micro-second
+                * batch : bool, optional
+                    EventBatch output if True, default output of reader if None
+
+            Returns
+            -------
+                numpy array of event_type data, or EventBatch
+        """
+
+        lo = self.searchTime(start)
+        hi = self.searchTime(end, lo)
+
+        return self.readEvents(lo, hi, batch)
+
+
+    def readAddresses(self, start, stop, times = True):
+        """
+            Read raw addresses of datas n° start to n° stop (excluded), without decoding them.
+            Reading head does not move
+
+            Parameters
+            ----------
+                * start : int, position of first data
+                * stop : int, position after the last data
+                * times : bool, True by default
+                    if False, times are not read
+
+            Returns
+            -------
+                numpy array of addresses, numpy array of times (None if times is False)
+        """
+
+        start = max(0, start)
+        stop = min(stop, self._nbEvents)
+
+        records = self._readRecords(start, stop) if start < stop else np.empty(0, dtype=self._recordType)
+
+        if not times:
+            return records["addr"], None
+
+        # whole file: time counter wraps are found on datas already read
+        if self._wraps is None and start == 0 and stop == self._nbEvents:
+            unwrapper = TimeUnwrapper(self._tsBits)
+            ts = unwrapper(records["ts"])
+            self._wraps = np.array(unwrapper.wraps, dtype=np.int64)
+
+            return records["addr"], ts
+
+        return records["addr"], self._unwrap(records["ts"], start)
+
+
+    def readStreams(self, start, stop, kinds = None):
+        """
+            Split datas n° start to n° stop (excluded) by kind of address (see CameraSpec types).
+            Reading head does not move
+
+            Parameters
+            ----------
+                * start : int, position of first data
+                * stop : int, position after the last data
+                * kinds : names of kinds ("polarity", "aps", "imu", "trigger"...), all kinds of camera by default.
+                    Kinds which are not asked are not decoded
+
+            Returns
+            -------
+                dict {kind: numpy array}, polarity events are event_type arrays
+        """
+
+        start = max(0, start)
+        stop = min(stop, self._nbEvents)
+
+        records = self._readRecords(start, stop) if start < stop else np.empty(0, dtype=self._recordType)
+
+        return self._kernel.streams(records["addr"], self._unwrap(records["ts"], start), kinds)
+
+
+    def findTime(self, time, start = 0):
+        """
+            Get position of the first data after data n° start where time event >= time
+            Datas are scanned forward block by block, reading head does not move
+
+            Parameters
+            ----------
+                * time : desired time in micro-second
+                * start : int, position where scan begins (0 by default)
+
+            Returns
+            -------
+                position of data, number of events if no data has an event time >= time
+        """
+
+        pos = max(0, start)
+        block = 256
+
+        # blocks grow: a close time costs a small read
+        while pos < self._nbEvents:
+            stop = min(pos + block, self._nbEvents)
+            ts = self._readTimes(pos, stop)
+
+            i = _searchSorted(ts, time)
+
+            if i < len(ts):
+                return pos + i
+
+            pos = stop
+            block = min(2 * block, self._BLOCK)
+
+        return self._nbEvents
+
+
+
+    def place(self, pos):
+        """
+            Place reader pointer to read data at the position "pos"
+
+            Note :  the position is not depending to byte position but depending to data numerotation
+                    for example, if header len is 0, data n°2 is at the byte n°12
+                    the position after the last data (nbEvents) is the end of file
+
+            Parameters
+            ----------
+                * pos : position of data
+        """
+
+        p = self._headerLen + pos*self._aeLen
+
+        if pos < 0 or p > self._dataEnd:
+            raise ValueError("no data on this position")
+        
+        self._posPtr = p
+        self._aerDataFile.seek(p)
+
+
+
+    def close(self):
+        """
+            Close file, reader can not be used after
+        """
+
+        if self._aerDataFile is not None:
+            self._aerDataFile.close()
+
+        # memory maps are closed when they are not referenced
+        self._records = None
+        self._fileMap = None
+
+
+    
+
+
+
+
+class DVSEvents:
+    """
+        A group of events from Dynamic Vision Sensor (DVS) file.
+
+        Attributes
+        ----------
+
+            * duration_s : duration of video in second
+            * duration_us : duration of video in micro-second
+            * start_s : start time of video in second
+            * start_us : start time of video in micro-second
+            * end_s : end time of video in second
+            * end_us : end time of video in micro-second
+            * height : height of the video
+            * width : width of the video
+            * nb_events : number of events stored in file
+            * metrics : DVSMetrics of reader, None if reader is not instrumented
+
+        Methods
+        -------
+
+            * getAllData() : read all file and return a numpy array of all data
+            * getSingleData() : read just one data
+            * getBlockData(n) : read at most n data
+            * getRangeData(start, stop) : read data n° start to n° stop (excluded)
+            * getTimeRangeData(start_us, end_us) : read data where start_us <= time event < end_us
+            * getStreamData(start, stop, kinds) : split data by kind of address (polarity, aps, imu, trigger)
+            * iter_chunks(n_events) : iterate over data by group of at most n_events data
+            * iter_windows(dt_us) : iterate over data by time window of dt_us micro-second
+            * aiter_chunks(n_events) : asynchronous version of iter_chunks
+            * aiter_windows(dt_us) : asynchronous version of iter_windows
+            * searchTime(time) : place reading head of reader on the first data where time event = time
+            * close() : close file, DVSEvents can also be used with `with`
+
+        With batch=True, reading methods give EventBatch (one contiguous array by field) instead of event_type arrays
+        
+    """
+
+    def __init__(self, file, camera =DVS128(), version = AERV1(), verbose = 0, mmap = False, index = False, batch = False, metrics = None):
+        """
+            Initialize reader class to read the file and parameter of video
+
+            Parameters
+            ----------
+
+                * file : string, required
+                    path of file who's contain the datas
+                * camera : CameraFamily, DVS128 by default
+                    Type of camera which was used to write file 
+                * version : AERVersion, AERV1 by default
+                    AER Version file 
+                * verbose : int, 0 by default
+                    print messages of DVSModule logger (see DVSMetrics.enableLogging)
+                    - 0 : logging configuration is not changed
+                    - 1 : file information
+                    - 2 and more : file header
+                * mmap : bool, False by default
+                    if True, file is memory mapped: raw datas stay on disk and are decoded only when they are read
+                * index : bool or string, False by default
+                    use a sparse time index of the file, built once and stored on disk
+                    - False : no index
+                    - True : index is stored beside the file
+                    - string : directory where index is stored
+                * batch : bool, False by default
+                    if True, datas are given as EventBatch (structure of arrays) instead of event_type arrays
+                * metrics : DVSMetrics, optional
+                    counters of bytes read, events decoded and seeks, updated by reader
+        """
+
+
+        if not isinstance(camera, CameraFamily):
+            raise TypeError("camera must be an instance of CameraFamily interface")
+
+        if not isinstance(version, AERVersion):
+            raise TypeError("version must be an instance of AERVersion")
+
+        self._height = camera.Height
+        self._width = camera.Width
+
+
+        self._reader = _DVSReader(file, camera, version, verbose, mmap, index, batch, metrics)
+
+
+        
+
+    @property
+    def duration_s(self):
+        return self._reader.duration * 1e-6
+    
+    @property
+    def duration_us(self):
+        return self._reader.duration
+
+    @property
+    def start_us(self):
+        return self._reader.startTime
+
+    @property
+    def start_s(self):
+        return self._reader.startTime * 1e-6
+
+    @property
+    def end_us(self):
+        return self._reader.endTime
+
+    @property
+    def end_s(self):
+        return self._reader.endTime * 1e-6
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def nb_events(self):
+        return self._reader.nbEvents
+
+    @property
+    def metrics(self):
+        return self._reader._metrics
+
+
+    def getAllData(self, workers = 1):
+        """
+            read all file and return a numpy array of all data
+
+            Arguments
+            ---------
+                * workers : int, 1 by default
+                    number of threads which decode file, None for the number of cpu
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+        return self._reader.readAllFile(workers)
+
+    
+    def getSingleData(self):
+        """
+            read just one data, records which are not polarity events are skipped
+
+            Returns
+            -------
+                one event_type record, int(data['t']) is its time
+        """
+        return self._reader.readData()
+
+
+    def getBlockData(self, n):
+        """
+            read at most n data from reading head
+
+            Arguments
+            ---------
+                * n : int, required
+                    maximum number of data
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+        return self._reader.readBlock(n)
+
+
+    def getRangeData(self, start, stop):
+        """
+            read data n° start to n° stop (excluded), reading head does not move
+
+            Arguments
+            ---------
+                * start : int, required
+                    position of first data
+                * stop : int, required
+                    position after last data
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+        return self._reader.readEvents(start, stop)
+
+
+    def getTimeRangeData(self, start_us, end_us):
+        """
+            read data where start_us <= time event < end_us, reading head does not move
+
+            Arguments
+            ---------
+                * start_us : int, required
+                    start time in micro-second
+                * end_us : int, required
+                    end time in micro-second
+
+            Returns
+            -------
+                numpy array of event_type data
+        """
+        return self._reader.readTimeRange(start_us, end_us)
+
+
+    def getStreamData(self, start = 0, stop = None, kinds = None):
+        """
+            split data n° start to n° stop (excluded) by kind of address, reading head does not move
+            other methods only give polarity events
+
+            Arguments
+            ---------
+                * start : int, 0 by default
+                    position of first data
+                * stop : int, optional
+                    position after last data, end of file by default
+                * kinds : list of string, optional
+                    kinds to read ("polarity", "aps", "imu", "trigger" for DAVIS240), all kinds of camera by default.
+                    Kinds which are not asked are not decoded
+
+            Returns
+            -------
+                dict {kind: numpy array}
+        """
+        return self._reader.readStreams(start, self.nb_events if stop is None else stop, kinds)
+
+
+    def iter_chunks(self, n_events = 65536, workers = 1):
+        """
+            iterate over data from reading head by group of at most n_events data
+            data are read by block, reading head does not move
+
+            Arguments
+            ---------
+                * n_events : int, 65536 by default
+                    maximum number of data in a chunk
+                * workers : int, 1 by default
+                    number of threads which decode next chunks in advance, None for the number of cpu
+
+            Yields
+            ------
+                numpy array of event_type data
+        """
+
+        if n_events <= 0:
+            raise ValueError("n_events must be positive")
+
+        yield from self._reader.iterBlocks(self._reader.position, n_events, workers)
+
+
+    def iter_windows(self, dt_us, start_us = None, end_us = None, n_events = 65536, workers = 1):
+        """
+            iterate over data from reading head by time window [start_us + k*dt_us, start_us + (k+1)*dt_us[
+            windows without data are yielded as empty arrays, reading head does not move
+
+            Arguments
+            ---------
+                * dt_us : int, required
+                    duration of a window in micro-second
+                * start_us : int, optional
+                    start time of the first window, time of the first data by default
+                * end_us : int, optional
+                    no window starts after this time, end of file by default
+                * n_events : int, 65536 by default
+                    number of data read at once
+                * workers : int, 1 by default
+                    number of threads which decode next data in advance, None for the number of cpu
+
+            Yields
+            ------
+                numpy array of event_type data
+        """
+
+        if dt_us <= 0:
+            raise ValueError("dt_us must be positive")
+
+        reader = self._reader
+        pos = reader.position
+
+        if start_us is None:
+            if not (pos < reader.nbEvents):
+                return
+            start_us = int(reader.readEvents(pos, pos + 1)['t'][0])
+        else:
+            pos = reader.searchTime(start_us, pos)
+
+        # blocks are staged in a buffer of fixed size, whatever the event rate
+        feed = _EventFeed(reader.iterBlocks(pos, n_events, workers, batch=False),
+            EventRingBuffer(2 * n_events, event_type))
+
+        lower = start_us
+
+        try:
+            while end_us is None or lower < end_us:
+                upper = lower + dt_us
+
+                pieces = feed.popUntil(upper)
+                window = pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+
+                if window.size == 0 and feed.empty:
+                    return
+
+                yield EventBatch.fromEvents(window) if reader._batch else window
+
+                lower = upper
+        finally:
+            feed.close()
+
+    def aiter_chunks(self, n_events = 65536, workers = 1, prefetch = 2, executor = None):
+        """
+            asynchronous iterator over data from reading head by group of at most n_events data
+            file reading and decoding are done in an executor, out of event loop
+
+                async for chunk in events.aiter_chunks(100000):
+                    ...
+
+            Arguments
+            ---------
+                * n_events : int, 65536 by default
+                    maximum number of data in a chunk
+                * workers : int, 1 by default
+                    number of threads which decode next chunks in advance, None for the number of cpu
+                * prefetch : int, 2 by default
+                    maximum number of chunks read in advance while current chunk is used
+                * executor : concurrent.futures.Executor, optional
+                    executor where chunks are read, default executor of event loop by default
+
+            Yields
+            ------
+                numpy array of event_type data
+        """
+
+        return self._aiterate(self.iter_chunks(n_events, workers), prefetch, executor)
+
+
+    def aiter_windows(self, dt_us, start_us = None, end_us = None, n_events = 65536, workers = 1, prefetch = 2, executor = None):
+        """
+            asynchronous iterator over data from reading head by time window [start_us + k*dt_us, start_us + (k+1)*dt_us[
+            file reading and decoding are done in an executor, out of event loop
+
+                async for window in events.aiter_windows(10000):
+                    ...
+
+            Arguments
+            ---------
+                * dt_us, start_us, end_us, n_events, workers : see iter_windows
+                * prefetch : int, 2 by default
+                    maximum number of windows read in advance while current window is used
+                * executor : concurrent.futures.Executor, optional
+                    executor where windows are read, default executor of event loop by default
+
+            Yields
+            ------
+                numpy array of event_type data
+        """
+
+        return self._aiterate(self.iter_windows(dt_us, start_us, end_us, n_events, workers), prefetch, executor)
+
+
+    async def _aiterate(self, source, prefetch, executor):
+        # run a generator in an executor, next items are put in a bounded queue while current item is used
+        # asyncio is only imported by asynchronous iterators
+
+        import asyncio
+
+        if prefetch < 1:
+            raise ValueError("prefetch must be positive")
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=prefetch)
+        end = object()
+
+        inflight = [None]   # call of generator running in executor
+
+        async def produce():
+            while True:
+                # shielded: a cancelled producer never leaves generator running alone
+                inflight[0] = loop.run_in_executor(executor, next, source, end)
+
+                try:
+                    item = await asyncio.shield(inflight[0])
+                except Exception as e:
+                    await queue.put((None, e))
+                    return
+
+                # wait here when consumer is late (backpressure)
+                await queue.put((item, None))
+
+                if item is end:
+                    return
+
+        producer = loop.create_task(produce())
+
+        try:
+            while True:
+                item, error = await queue.get()
+
+                if error is not None:
+                    raise error
+
+                if item is end:
+                    return
+
+                yield item
+
+        finally:
+            producer.cancel()
+
+            # generator can only be closed when its running call is done
+            if inflight[0] is not None and not inflight[0].done():
+                await asyncio.wait([inflight[0]])
+
+            await loop.run_in_executor(executor, source.close)
+
+
+    def searchTime(self, time):
+        """
+            place reading head of reader on the first data where time event >= time
+            all next data will have an event time >= time
+            if no data has an event time >= time, reading head is placed at the end of file
+            without time index, the first call also finds time counter wraps from a sample of the time field
+
+            Arguments
+            ---------
+                * time : int, required
+                    desired time in micro-second
+
+            Returns
+            -------
+                position of reading head
+        """
+
+        pos = self._reader.searchTime(time)
+        self._reader.place(pos)
+
+        return pos
+
+
+    def close(self):
+        """
+            close file
+        """
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
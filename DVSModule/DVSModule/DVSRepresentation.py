@@ -0,0 +1,421 @@
+import numpy as np
+
+from DVSModule.DVSBatch import EventBatch
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# last time of a cell which never had an event
+_NEVER = -(1 << 62)
+
+
+def _chunks(source, start_us, n_events, workers):
+    # chunks of events of a source from time start_us (None for the first event)
+
+    if isinstance(source, (np.ndarray, EventBatch)):
+        return iter([source])
+
+    # DVSEvents: blocks of reader, from start_us
+    reader = getattr(source, "_reader", None)
+    if reader is not None:
+        pos = 0 if start_us is None else reader.searchTime(start_us)
+        return reader.iterBlocks(pos, n_events, workers, batch=True)
+
+    return iter(source)
+
+
+def _scatterAdd(flat, keys, weights = None):
+    # flat[keys] += weights, keys repeated, with a bincount on the range of keys only
+
+    if len(keys) == 0:
+        return
+
+    lo = int(keys.min())
+    counts = np.bincount(keys - lo, weights)
+
+    flat[lo:lo + len(counts)] += counts
+
+
+class Representation:
+    """
+        Tensors of events by time window, built for many windows at once
+
+        Windows are [start_us + k*dt_us, start_us + (k+1)*dt_us[. Events are read chunk by chunk,
+        window boundaries are found with a binary search on sorted times and each chunk is added
+        to the tensors of its windows with one scatter-add. Windows are yielded by group of windows,
+        so peak memory depends on the size of a group and of a chunk, not on the recording.
+
+        Layout of a window is the layout of DVSProcess output, with pool and polarity channels:
+            - channel_last True : (height, width, channels)
+            - channel_last False : (channels, height, width)
+        channels is 2 (one by polarity) or 1 when polarity is False
+
+            frames = CountFrames(128, 128, pool=(2, 2))
+
+            times, tensor = frames.build(dvs_event, dt_us=10000)
+
+            for times, tensor in frames.iterate(dvs_event, dt_us=10000, windows=64):
+                ...
+
+        Sources are DVSEvents (read from start_us with its reader), an event_type array or an
+        EventBatch, or an iterable of chunks sorted by time (DVSArchive.iter_blocks(), filters...).
+
+        Attributes
+        ----------
+
+            * shape : shape of the tensor of a window
+    """
+
+    def __init__(self, width, height, pool = (1, 1), polarity = True, channel_last = True, dtype = np.float32):
+        """
+            Parameters
+            ----------
+                * width, height : int, size of camera in pixel
+                * pool : (int, int), (1, 1) by default
+                    number of pixel to pool over in the vertical and horizontal direction respectively
+                * polarity : bool, True by default
+                    one channel by polarity if True, one channel for both polarities if False
+                * channel_last : bool, True by default
+                    polarity is the last axis if True, the first axis of a window if False
+                * dtype : numpy dtype, np.float32 by default
+        """
+
+        self.sensor = (int(width), int(height))
+        self.poolY, self.poolX = pool
+        self.polarity = bool(polarity)
+        self.channel_last = channel_last
+        self.dtype = np.dtype(dtype)
+
+        self.height = int(np.ceil(height / self.poolY))
+        self.width = int(np.ceil(width / self.poolX))
+        self.channels = 2 if self.polarity else 1
+
+        # cells of a window, same strides as DVSProcess
+        self.cells = self.height * self.width * self.channels
+
+        if channel_last:
+            self._strides = (self.channels, self.channels * self.width, 1)
+            self._layout = (self.height, self.width, self.channels)
+        else:
+            self._strides = (1, self.width, self.width * self.height)
+            self._layout = (self.channels, self.height, self.width)
+
+        if not self.polarity:
+            self._strides = self._strides[:2] + (0,)
+
+    @property
+    def shape(self):
+        return self._layout
+
+    def _cellsOf(self, events):
+        # cell of events in a window, inside : events of camera
+
+        x = events['x'].astype(np.int64)
+        y = events['y'].astype(np.int64)
+        p = events['p'].astype(np.int64)
+
+        inside = (x < self.sensor[0]) & (y < self.sensor[1])
+
+        strideX, strideY, strideP = self._strides
+        cells = (y // self.poolY) * strideY + (x // self.poolX) * strideX + p * strideP
+
+        return cells, p, inside
+
+    def _new(self, n):
+        # accumulator of n windows
+        raise NotImplementedError
+
+    def _add(self, acc, events, t, windows, lower, dt_us):
+        # add events of windows (index in group) to accumulator, lower : start time of group
+        raise NotImplementedError
+
+    def _finish(self, acc, n, ends):
+        # tensor of the n first windows of accumulator, ends : end time of each window
+        raise NotImplementedError
+
+    def iterate(self, source, dt_us, start_us = None, end_us = None, windows = 256, n_events = 65536, workers = 1):
+        """
+            Tensors of windows, group by group
+
+            Parameters
+            ----------
+                * source : DVSEvents, event_type array, EventBatch or iterable of chunks
+                * dt_us : int, duration of a window in micro-second
+                * start_us : int, optional, start time of first window, time of first event by default
+                * end_us : int, optional, no window starts after this time.
+                    End of file for DVSEvents, last event for other sources by default
+                * windows : int, 256 by default, number of windows of a group
+                * n_events : int, 65536 by default, number of events read at once from DVSEvents
+                * workers : int, 1 by default, number of threads which decode events of DVSEvents
+
+            Yields
+            ------
+                (times, tensor) : start time of windows (int64), tensor (windows, *shape)
+        """
+
+        if dt_us <= 0:
+            raise ValueError("dt_us must be positive")
+        if windows <= 0:
+            raise ValueError("windows must be positive")
+
+        dt_us = int(dt_us)
+        chunks = _chunks(source, start_us, n_events, workers)
+
+        if end_us is None and getattr(source, "_reader", None) is not None:
+            end_us = source.end_us + 1
+
+        total = None    # number of windows, known when end_us is known
+        first = 0       # first window of group
+        last = -1       # last window with events
+        acc = self._new(windows)
+
+        for events in chunks:
+            t = events['t'].astype(np.int64)
+
+            if len(t) == 0:
+                continue
+
+            if start_us is None:
+                start_us = int(t[0])
+
+            if total is None and end_us is not None:
+                total = max(0, -(-(int(end_us) - start_us) // dt_us))
+
+            lo = int(np.searchsorted(t, start_us))
+            hi = len(t) if total is None else int(np.searchsorted(t, start_us + total * dt_us))
+
+            # events after the last window: next chunks are not read
+            done = hi < len(t)
+
+            if lo or done:
+                events, t = events[lo:hi], t[lo:hi]
+
+            while len(t):
+                lower = start_us + first * dt_us
+
+                # events of this group of windows
+                k = int(np.searchsorted(t, lower + windows * dt_us))
+
+                if k:
+                    w = (t[:k] - lower) // dt_us
+                    self._add(acc, events[:k], t[:k], w, lower, dt_us)
+                    last = first + int(w[-1])
+
+                if k == len(t):
+                    break
+
+                yield self._group(acc, first, windows, start_us, dt_us)
+
+                first += windows
+                acc = self._new(windows)
+                events, t = events[k:], t[k:]
+
+            if done:
+                break
+
+        if start_us is None:
+            return
+
+        if total is None:
+            total = last + 1
+
+        while first < total:
+            yield self._group(acc, first, min(windows, total - first), start_us, dt_us)
+
+            first += windows
+            if first < total:
+                acc = self._new(windows)
+
+    def build(self, source, dt_us, start_us = None, end_us = None, windows = 256, n_events = 65536, workers = 1):
+        """
+            Tensors of all windows (see iterate)
+
+            Returns
+            -------
+                (times, tensor) : start time of windows (int64), tensor (number of windows, *shape)
+        """
+
+        if getattr(source, "_reader", None) is not None:
+            start_us = source.start_us if start_us is None else start_us
+            end_us = source.end_us + 1 if end_us is None else end_us
+
+        groups = self.iterate(source, dt_us, start_us, end_us, windows, n_events, workers)
+
+        # number of windows is not known: groups are concatenated
+        if start_us is None or end_us is None:
+            groups = list(groups)
+
+            if not groups:
+                return np.empty(0, dtype=np.int64), np.empty((0,) + self.shape, dtype=self.dtype)
+
+            return np.concatenate([g[0] for g in groups]), np.concatenate([g[1] for g in groups])
+
+        # tensor is allocated once, groups are copied in it
+        total = max(0, -(-(int(end_us) - int(start_us)) // int(dt_us)))
+
+        times = int(start_us) + np.arange(total, dtype=np.int64) * int(dt_us)
+        tensor = np.empty((total,) + self.shape, dtype=self.dtype)
+
+        pos = 0
+        for _, group in groups:
+            tensor[pos:pos + len(group)] = group
+            pos += len(group)
+
+        return times, tensor[:pos]
+
+    def _group(self, acc, first, n, start_us, dt_us):
+        # times and tensor of n windows of a group
+
+        times = start_us + (first + np.arange(n, dtype=np.int64)) * dt_us
+
+        return times, self._finish(acc, n, times + dt_us)
+
+    def __repr__(self):
+        return "{}({}x{}, pool={}, polarity={})".format(type(self).__name__, self.sensor[0], self.sensor[1],
+            (self.poolY, self.poolX), self.polarity)
+
+
+class CountFrames(Representation):
+    """
+        Number of events of each cell in each window
+    """
+
+    def _new(self, n):
+        return np.zeros((n, self.cells), dtype=self.dtype)
+
+    def _add(self, acc, events, t, windows, lower, dt_us):
+        cells, _, inside = self._cellsOf(events)
+
+        keys = windows * self.cells + cells
+
+        _scatterAdd(acc.reshape(-1), keys if inside.all() else keys[inside])
+
+    def _finish(self, acc, n, ends):
+        return acc[:n].reshape((n,) + self.shape)
+
+
+class TimeSurface(Representation):
+    """
+        Exponentially decayed time surface at the end of each window
+
+        Value of a cell is exp(-(end of window - time of last event of cell) / tau_us), 0 if the cell
+        never had an event. Last times are carried from window to window and from group to group.
+    """
+
+    def __init__(self, width, height, tau_us = 50000, pool = (1, 1), polarity = True, channel_last = True, dtype = np.float32):
+        """
+            Parameters
+            ----------
+                * tau_us : int, decay time in micro-second, 50000 by default
+                * others : see Representation
+        """
+
+        super().__init__(width, height, pool, polarity, channel_last, dtype)
+
+        self.tau_us = float(tau_us)
+
+        # last time of each cell before the current group
+        self._state = np.full(self.cells, _NEVER, dtype=np.int64)
+
+    def iterate(self, source, dt_us, start_us = None, end_us = None, windows = 256, n_events = 65536, workers = 1):
+        self._state.fill(_NEVER)
+
+        yield from super().iterate(source, dt_us, start_us, end_us, windows, n_events, workers)
+
+    iterate.__doc__ = Representation.iterate.__doc__
+
+    def _new(self, n):
+        return np.full((n, self.cells), _NEVER, dtype=np.int64)
+
+    def _add(self, acc, events, t, windows, lower, dt_us):
+        cells, _, inside = self._cellsOf(events)
+
+        keys = windows * self.cells + cells
+
+        if not inside.all():
+            keys, t = keys[inside], t[inside]
+
+        np.maximum.at(acc.reshape(-1), keys, t)
+
+    def _finish(self, acc, n, ends):
+        last = acc[:n]
+
+        # last time of each cell at each window: forward fill over windows
+        np.maximum(last[0], self._state, out=last[0])
+        np.maximum.accumulate(last, axis=0, out=last)
+        self._state[:] = last[-1]
+
+        surface = np.exp((last - ends[:, None]) / self.tau_us).astype(self.dtype, copy=False)
+
+        return surface.reshape((n,) + self.shape)
+
+    def __repr__(self):
+        return "TimeSurface({}x{}, tau_us={}, pool={}, polarity={})".format(self.sensor[0], self.sensor[1],
+            self.tau_us, (self.poolY, self.poolX), self.polarity)
+
+
+class VoxelGrid(Representation):
+    """
+        Temporal voxel grid: each window is split in bins, an event is shared between the two nearest
+        bins with bilinear weights on its normalized time (bins - 1) * (t - start of window) / dt_us
+
+        With polarity False, events are weighted by their sign (+1 on, -1 off) in one channel.
+        Layout of a window is (bins, *layout of Representation).
+    """
+
+    def __init__(self, width, height, bins = 5, pool = (1, 1), polarity = True, channel_last = True, dtype = np.float32):
+        """
+            Parameters
+            ----------
+                * bins : int, number of time bins of a window, 5 by default
+                * others : see Representation
+        """
+
+        super().__init__(width, height, pool, polarity, channel_last, dtype)
+
+        if bins <= 0:
+            raise ValueError("bins must be positive")
+
+        self.bins = int(bins)
+
+    @property
+    def shape(self):
+        return (self.bins,) + self._layout
+
+    def _new(self, n):
+        return np.zeros((n, self.bins * self.cells), dtype=self.dtype)
+
+    def _add(self, acc, events, t, windows, lower, dt_us):
+        cells, p, inside = self._cellsOf(events)
+
+        if not inside.all():
+            cells, p, t, windows = cells[inside], p[inside], t[inside], windows[inside]
+
+        # normalized time of events in their window
+        tn = (t - lower - windows * dt_us) * ((self.bins - 1) / dt_us)
+        b = tn.astype(np.int64)
+        frac = tn - b
+
+        sign = 1.0 if self.polarity else (2.0 * p - 1)
+
+        keys = (windows * self.bins + b) * self.cells + cells
+
+        _scatterAdd(acc.reshape(-1), keys, sign * (1 - frac))
+
+        # next bin of events, events of the last bin have no weight after it
+        after = b + 1 < self.bins
+        _scatterAdd(acc.reshape(-1), (keys + self.cells)[after], (sign * frac)[after])
+
+    def _finish(self, acc, n, ends):
+        return acc[:n].reshape((n,) + self.shape)
+
+    def __repr__(self):
+        return "VoxelGrid({}x{}, bins={}, pool={}, polarity={})".format(self.sensor[0], self.sensor[1],
+            self.bins, (self.poolY, self.poolX), self.polarity)
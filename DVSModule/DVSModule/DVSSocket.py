@@ -0,0 +1,576 @@
+import os
+import sys
+import time
+import socket
+import struct
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from DVSModule.DVSCamera import *
+from DVSModule.AERVersion import *
+from DVSModule.DVSTime import TimeUnwrapper
+from DVSModule.DVSBuffer import EventRingBuffer, OverflowPolicy
+from DVSModule.DVSReader import event_type, _recordType, _DVSReader
+from DVSModule.DVSMetrics import _verboseLogging
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# socket option giving the number of datagrams dropped by the kernel (linux only),
+# python does not export it
+_SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+
+_logger = logging.getLogger(__name__)
+
+_PROTOCOLS = ("udp", "tcp", "unix")
+
+
+class LiveMetrics:
+    """
+        Counters of a live source
+
+        Attributes
+        ----------
+
+            * packets : number of packets (datagrams or stream reads) received
+            * bytes : number of bytes received
+            * events : number of events decoded
+            * droppedPackets : number of datagrams dropped by the kernel (udp on linux only)
+            * truncatedBytes : bytes of incomplete records, ignored
+            * lateEvents : events received after the step which should have used them, ignored
+            * steps : number of simulator steps
+            * lags : step lags in second (wall clock - simulator clock), last ones only
+            * buffer : EventRingBuffer of source, its counters give events dropped by overflow
+
+        Methods
+        -------
+
+            * lagPercentiles(q) : percentiles of step lag
+            * asDict() : all counters as a dict
+    """
+
+    def __init__(self, maxlags = 4096, buffer = None):
+        """
+            Parameters
+            ----------
+                * maxlags : int, number of step lags kept (4096 by default)
+                * buffer : EventRingBuffer, optional
+        """
+
+        self.packets = 0
+        self.bytes = 0
+        self.events = 0
+        self.droppedPackets = 0
+        self.truncatedBytes = 0
+        self.lateEvents = 0
+        self.steps = 0
+        self.lags = deque(maxlen=maxlags)
+        self.buffer = buffer
+
+    def addLag(self, lag):
+        # lag of one simulator step
+
+        self.steps += 1
+        self.lags.append(lag)
+
+    def lagPercentiles(self, q = (50, 90, 99)):
+        """
+            Percentiles of step lag
+
+            Parameters
+            ----------
+                * q : percentiles, (50, 90, 99) by default
+
+            Returns
+            -------
+                numpy array of lags in second, nan if there is no step
+        """
+
+        if not self.lags:
+            return np.full(len(q), np.nan)
+
+        return np.percentile(np.fromiter(self.lags, dtype=np.float64), q)
+
+    def asDict(self):
+        """
+            All counters as a dict
+        """
+
+        p50, p90, p99 = self.lagPercentiles()
+
+        counters = {
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "events": self.events,
+            "droppedPackets": self.droppedPackets,
+            "truncatedBytes": self.truncatedBytes,
+            "lateEvents": self.lateEvents,
+            "steps": self.steps,
+            "lagP50": p50,
+            "lagP90": p90,
+            "lagP99": p99,
+        }
+
+        if self.buffer is not None:
+            counters["buffer"] = self.buffer.counters()
+
+        return counters
+
+
+class AERSocketSource:
+    """
+        Live source of events received on a socket
+
+        Records are sent as in an aer file (same ReadMode and AELen), without header.
+        A thread receives and decodes records, events are kept in a ring buffer of fixed size until they are taken.
+
+        Attributes
+        ----------
+
+            * width, height : size of camera
+            * origin : time of the first event received, None before
+            * lastTime : greatest time received, None before the first event
+            * buffer : EventRingBuffer where events wait until they are taken
+            * metrics : LiveMetrics of source
+
+        Methods
+        -------
+
+            * start() : open socket and start receiving, once
+            * stop() : stop receiving and close socket
+            * waitTime(time, timeout) : wait until an event with time event >= time is received
+            * popUntil(time) : take all events where time event < time
+    """
+
+    def __init__(self, address, camera = DVS128(), version = AERV1(), protocol = "udp", recv_size = 65536,
+        buffer_size = 1 << 20, policy = OverflowPolicy.DROP_OLDEST, verbose = 0):
+        """
+            Parameters
+            ----------
+
+                * address : address of socket
+                    - udp : (host, port) where datagrams are received
+                    - tcp : (host, port) of server which sends events
+                    - unix : path of server socket which sends events
+
+                * camera : CameraFamily, DVS128 by default
+
+                * version : AERVersion, AERV1 by default
+                    gives the format of records
+
+                * protocol : string, "udp", "tcp" or "unix", "udp" by default
+
+                * recv_size : int, size of receive buffer in byte (65536 by default)
+
+                * buffer_size : int, maximum number of events waiting to be taken (1 << 20 by default)
+
+                * policy : OverflowPolicy, OverflowPolicy.DROP_OLDEST by default
+                    what is done when events are not taken fast enough, with OverflowPolicy.BLOCK
+                    receiving waits and the kernel drops datagrams (udp) or slows down the sender (tcp, unix)
+
+                * verbose : int, 0 by default, messages of DVSModule logger are printed if verbose > 0
+        """
+
+        if not isinstance(camera, CameraFamily):
+            raise TypeError("camera must be a CameraFamily, not {}".format(type(camera).__name__))
+
+        if not isinstance(version, AERVersion):
+            raise TypeError("version must be an AERVersion, not {}".format(type(version).__name__))
+
+        if protocol not in _PROTOCOLS:
+            raise ValueError("protocol must be one of {}, not {}".format(_PROTOCOLS, protocol))
+
+        if version.PacketHeaderLen or version.Stateful:
+            raise ValueError("records of {} are not (addr, ts) records and cannot be received".format(type(version).__name__))
+
+        self.address = address
+        self.protocol = protocol
+        self.width = camera.Width
+        self.height = camera.Height
+
+        self._recvSize = recv_size
+        _verboseLogging(verbose)
+
+        self._recordType = _recordType(version.ReadMode, version.AELen)
+        self._aeLen = version.AELen
+        self._kernel = cameraDecoder(camera)
+        self._unwrapper = TimeUnwrapper(8 * self._recordType["ts"].itemsize)
+
+        self.buffer = EventRingBuffer(buffer_size, event_type, policy)
+        self.metrics = LiveMetrics(buffer=self.buffer)
+
+        self._socket = None
+        self._thread = None
+        self._running = False
+
+        self._origin = None
+        self._lastTime = None
+        self._released = 0      # events before this time have been taken
+
+        self._cond = threading.Condition()
+
+    @property
+    def origin(self):
+        return self._origin
+
+    @property
+    def lastTime(self):
+        return self._lastTime
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def started(self):
+        return self._socket is not None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """
+            Open socket and start the receiving thread
+
+            Returns
+            -------
+                self
+        """
+
+        if self.started:
+            return self
+
+        self._socket = self._open()
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="AERSocketSource", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        """
+            Stop the receiving thread and close socket
+        """
+
+        self._running = False
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+        with self._cond:
+            self._cond.notify_all()
+
+    def _open(self):
+        # open socket: bind for udp, connect for streams
+
+        if self.protocol == "udp":
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+
+            # kernel gives the number of dropped datagrams with each datagram
+            try:
+                s.setsockopt(socket.SOL_SOCKET, _SO_RXQ_OVFL, 1)
+                self._dropCounter = True
+            except (OSError, TypeError):
+                self._dropCounter = False
+
+            s.bind(self.address)
+
+        else:
+            family = socket.AF_UNIX if self.protocol == "unix" else socket.AF_INET
+            s = socket.socket(family, socket.SOCK_STREAM)
+            s.connect(self.address)
+
+        # the thread checks regularly if it must stop
+        s.settimeout(0.1)
+
+        _logger.info("%s socket opened on %s", self.protocol, self.address)
+
+        return s
+
+    def _recv(self):
+        # receive one packet, None if stream is closed
+
+        if self.protocol != "udp":
+            data = self._socket.recv(self._recvSize)
+            return data if data else None
+
+        if not self._dropCounter:
+            return self._socket.recv(self._recvSize)
+
+        data, ancdata, _, _ = self._socket.recvmsg(self._recvSize, socket.CMSG_SPACE(4))
+
+        for level, kind, value in ancdata:
+            if level == socket.SOL_SOCKET and kind == _SO_RXQ_OVFL and len(value) >= 4:
+                # counter of the socket since its creation
+                self.metrics.droppedPackets = struct.unpack("=I", value[:4])[0]
+
+        return data
+
+    def _run(self):
+        # receiving thread
+
+        leftover = b""
+        stream = self.protocol != "udp"
+
+        while self._running:
+            try:
+                data = self._recv()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            if data is None:
+                _logger.info("%s stream closed by server", self.protocol)
+                break
+
+            self.metrics.packets += 1
+            self.metrics.bytes += len(data)
+
+            # a record can be split between two reads of a stream
+            if stream and leftover:
+                data = leftover + data
+
+            n = len(data) // self._aeLen
+            rest = len(data) - n * self._aeLen
+
+            if stream:
+                leftover = data[n * self._aeLen:]
+            elif rest:
+                self.metrics.truncatedBytes += rest
+
+            if n:
+                self._push(np.frombuffer(data, dtype=self._recordType, count=n))
+
+        self.metrics.truncatedBytes += len(leftover)
+        self._running = False
+
+        with self._cond:
+            self._cond.notify_all()
+
+    def _push(self, records):
+        # decode records and add events
+
+        ts = self._unwrapper(records["ts"])
+
+        # only polarity events are kept (not APS, IMU or triggers)
+        selected = self._kernel.select(records["addr"])
+        if selected is not None:
+            records = records[selected]
+            ts = ts[selected]
+
+            if not len(records):
+                return
+
+        events = np.empty(len(records), dtype=event_type)
+        self._kernel.decode(records["addr"], events)
+        events['t'] = ts
+
+        # buffer is searched by time: events of a datagram are sorted here, the buffer merges
+        # datagrams received out of order
+        times = events['t']
+        if times.size > 1 and (times[1:] < times[:-1]).any():
+            events = events[np.argsort(times, kind='stable')]
+
+        with self._cond:
+            if self._origin is None:
+                self._origin = int(events['t'][0])
+
+            # step of these events is already done
+            late = events['t'] < self._released
+            if late.any():
+                self.metrics.lateEvents += int(np.count_nonzero(late))
+                events = events[~late]
+
+        if not len(events):
+            return
+
+        # lock of source is not held: with BLOCK policy, push waits for popUntil
+        k = 0
+        while self._running:
+            k += self.buffer.push(events[k:], timeout=0.1)
+            if k == len(events) or self.buffer.policy != OverflowPolicy.BLOCK:
+                break
+
+        with self._cond:
+            self.metrics.events += len(events)
+
+            t = int(events['t'][-1])
+            if self._lastTime is None or t > self._lastTime:
+                self._lastTime = t
+
+            self._cond.notify_all()
+
+    def waitTime(self, time, timeout = None):
+        """
+            Wait until an event where time event >= time is received
+
+            Parameters
+            ----------
+                * time : desired time in micro-second
+                * timeout : float, maximum waiting time in second, None to wait without limit
+
+            Returns
+            -------
+                True if such an event has been received, False after timeout or when source stops
+        """
+
+        def received():
+            return (self._lastTime is not None and self._lastTime >= time) or not self._running
+
+        with self._cond:
+            self._cond.wait_for(received, timeout)
+
+            return self._lastTime is not None and self._lastTime >= time
+
+    def waitOrigin(self, timeout = None):
+        """
+            Wait for the first event
+
+            Parameters
+            ----------
+                * timeout : float, maximum waiting time in second, None to wait without limit
+
+            Returns
+            -------
+                origin or None after timeout or when source stops
+        """
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._origin is not None or not self._running, timeout)
+
+            return self._origin
+
+    def popUntil(self, time):
+        """
+            Take all events received where time event < time, events received later
+            with time event < time are counted as late and ignored
+
+            Parameters
+            ----------
+                * time : time in micro-second
+
+            Returns
+            -------
+                events sorted by time
+        """
+
+        with self._cond:
+            self._released = max(self._released, int(np.ceil(time)))
+
+        return self.buffer.popUntil(time)
+
+
+def replay(file, address, camera = DVS128(), version = AERV1(), protocol = "udp", speed = 1.0, events_per_packet = 1024, verbose = 0):
+    """
+        Send the events of a file on a socket at the pace of their timestamps,
+        local stand-in of a camera for AERSocketSource
+
+        - udp : datagrams are sent to address
+        - tcp and unix : a server is opened on address and events are sent to the first client
+
+        Parameters
+        ----------
+
+            * file : string, path of aer file
+            * address : address of socket (see AERSocketSource)
+            * camera : CameraFamily, DVS128 by default
+            * version : AERVersion, AERV1 by default
+            * protocol : string, "udp", "tcp" or "unix", "udp" by default
+            * speed : float, replay speed, 1.0 for real time, 0 to send as fast as possible
+            * events_per_packet : int, number of events in each packet (1024 by default)
+            * verbose : int, 0 by default, messages of DVSModule logger are printed if verbose > 0
+
+        Returns
+        -------
+            number of events sent
+    """
+
+    if protocol not in _PROTOCOLS:
+        raise ValueError("protocol must be one of {}, not {}".format(_PROTOCOLS, protocol))
+
+    reader = _DVSReader(file, camera, version, verbose)
+
+    try:
+        return _sendRecords(reader, address, protocol, speed, events_per_packet)
+    finally:
+        reader.close()
+
+
+def _sendRecords(reader, address, protocol, speed, events_per_packet):
+    # send raw records of reader on a socket (see replay)
+
+    if protocol == "udp":
+        server = None
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda data: s.sendto(data, address)
+
+    else:
+        family = socket.AF_UNIX if protocol == "unix" else socket.AF_INET
+        server = socket.socket(family, socket.SOCK_STREAM)
+
+        if protocol == "unix" and os.path.exists(address):
+            os.unlink(address)
+        else:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        server.bind(address)
+        server.listen(1)
+
+        s, _ = server.accept()
+        send = s.sendall
+
+    sent = 0
+
+    try:
+        start = time.monotonic()
+        first = None
+
+        for pos in range(0, reader.nbEvents, events_per_packet):
+            records = reader._readRecords(pos, min(pos + events_per_packet, reader.nbEvents))
+
+            # raw records are sent, time of packet is time of its first event
+            t = int(reader._unwrap(records["ts"][:1], pos)[0])
+            if first is None:
+                first = t
+
+            if speed > 0:
+                delay = start + (t - first) * 1e-6 / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            send(records.tobytes())
+            sent += len(records)
+
+        _logger.info("%d events sent in %.3f s", sent, time.monotonic() - start)
+
+    finally:
+        s.close()
+
+        if server is not None:
+            server.close()
+
+            if protocol == "unix":
+                os.unlink(address)
+
+    return sent
@@ -0,0 +1,278 @@
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+_logger = logging.getLogger(__name__)
+
+
+class StepInput:
+    """
+        Precomputed input of every simulator step, stored as a CSR matrix
+
+        Step n (n >= 1) contains events where bounds[n-1] <= time event < bounds[n],
+        with bounds[n] = (t_start + n*dt) * 1e6. For step n, indices[indptr[n-1]:indptr[n]]
+        are the neurons which receive events and counts[indptr[n-1]:indptr[n]] the number of events.
+
+        Attributes
+        ----------
+
+            * dt : simulator step in second
+            * indptr : offsets of each step in indices and counts
+            * indices : neuron indices, sorted in each step
+            * counts : number of events of each neuron in each step
+            * nbSteps : number of steps
+
+        Methods
+        -------
+
+            * build(chunks, t_start, end_us, dt, size, parser) : build input of all steps
+            * fill(n, image, rate) : write input of step n in image
+    """
+
+    __slots__ = ("dt", "indptr", "indices", "counts")
+
+    def __init__(self, dt, indptr, indices, counts):
+        """
+            Parameters
+            ----------
+                * dt : float, simulator step in second
+                * indptr : numpy array, offsets of each step
+                * indices : numpy array, neuron indices
+                * counts : numpy array, number of events of each neuron
+        """
+
+        self.dt = dt
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+
+    @property
+    def nbSteps(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, chunks, t_start, end_us, dt, size, parser):
+        """
+            Build input of all steps from events, chunk by chunk
+
+            Parameters
+            ----------
+                * chunks : iterable of event_type arrays sorted by time
+                * t_start : float, time of simulator start in second
+                * end_us : int, time of the last event in micro-second
+                * dt : float, simulator step in second
+                * size : int, number of neurons
+                * parser : function, event_type array -> (times, neuron indices)
+
+            Returns
+            -------
+                StepInput
+        """
+
+        nbSteps = max(0, int(np.ceil((end_us * 1e-6 - t_start) / dt)) + 1)
+
+        # same computation as the step functions of DVSProcess, times are integers
+        bounds = np.ceil((t_start + np.arange(nbSteps + 1) * dt) * 1e6).astype(np.int64)
+
+        keys = []
+        counts = []
+
+        for events in chunks:
+            events_t, events_id = parser(events)
+
+            steps = np.searchsorted(bounds, events_t.astype(np.int64), side='right')
+            valid = (steps >= 1) & (steps <= nbSteps)
+
+            k, c = np.unique((steps[valid] - 1) * size + events_id[valid], return_counts=True)
+            keys.append(k)
+            counts.append(c)
+
+        if keys:
+            keys = np.concatenate(keys)
+            counts = np.concatenate(counts)
+
+            # a step can be split between two chunks
+            keys, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts).astype(np.uint32)
+        else:
+            keys = np.empty(0, dtype=np.int64)
+            counts = np.empty(0, dtype=np.uint32)
+
+        indptr = np.searchsorted(keys // size, np.arange(nbSteps + 1), side='left').astype(np.int64)
+        indices = (keys % size).astype(np.int32)
+
+        return cls(dt, indptr, indices, counts)
+
+    def fill(self, n, image, rate):
+        """
+            Write input of step n in image
+
+            Parameters
+            ----------
+                * n : int, step number (first step is 1)
+                * image : numpy array, output buffer
+                * rate : float, value of one event
+
+            Returns
+            -------
+                image
+        """
+
+        image.fill(0)
+
+        if 1 <= n <= self.nbSteps:
+            a = self.indptr[n - 1]
+            b = self.indptr[n]
+            image[self.indices[a:b]] = self.counts[a:b] * rate
+
+        return image
+
+
+class StepInputCache:
+    """
+        Least recently used cache of StepInput, in memory and optionally on disk
+
+        Methods
+        -------
+
+            * get(key, cacheDir) : get a StepInput, None if it is not cached
+            * put(key, stepInput, cacheDir) : add a StepInput
+            * clear() : remove all StepInput from memory
+    """
+
+    SUFFIX = ".steps.npz"
+
+    def __init__(self, maxsize = 8):
+        """
+            Parameters
+            ----------
+                * maxsize : int, maximum number of StepInput kept in memory (8 by default)
+        """
+
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _name(key):
+        # key as a string, usable as dict key and file name
+
+        return json.dumps(key, sort_keys=True)
+
+    def _path(self, name, cacheDir):
+        # path of cache file of a key
+
+        return os.path.join(cacheDir, hashlib.sha1(name.encode()).hexdigest() + self.SUFFIX)
+
+    def get(self, key, cacheDir = None):
+        """
+            Get a StepInput
+
+            Parameters
+            ----------
+                * key : dict, identity of file and step parameters
+                * cacheDir : string, optional, directory of disk cache
+
+            Returns
+            -------
+                StepInput or None if it is not cached
+        """
+
+        name = self._name(key)
+
+        if name in self._entries:
+            self._entries.move_to_end(name)
+            return self._entries[name]
+
+        if cacheDir is None:
+            return None
+
+        try:
+            with np.load(self._path(name, cacheDir)) as data:
+                if str(data["key"]) != name:
+                    return None
+
+                stepInput = StepInput(float(data["dt"]), data["indptr"], data["indices"], data["counts"])
+
+        except (OSError, KeyError, ValueError):
+            return None
+
+        self._add(name, stepInput)
+
+        return stepInput
+
+    def put(self, key, stepInput, cacheDir = None):
+        """
+            Add a StepInput in memory and on disk if a directory is given
+
+            Disk cache is best effort: if it cannot be written (read only or full directory),
+            the error is logged and StepInput is only kept in memory
+
+            Parameters
+            ----------
+                * key : dict, identity of file and step parameters
+                * stepInput : StepInput
+                * cacheDir : string, optional, directory of disk cache
+        """
+
+        name = self._name(key)
+
+        self._add(name, stepInput)
+
+        if cacheDir is None:
+            return
+
+        path = self._path(name, cacheDir)
+
+        # write in a temporary file so an other process never reads a partial cache file
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+
+        try:
+            os.makedirs(cacheDir, exist_ok=True)
+
+            with open(tmp, "wb") as f:
+                np.savez(f, key=name, dt=stepInput.dt, indptr=stepInput.indptr,
+                    indices=stepInput.indices, counts=stepInput.counts)
+
+            os.replace(tmp, path)
+
+        except OSError as e:
+            _logger.warning("step cache cannot be stored : %s", e)
+
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+            Remove all StepInput from memory
+        """
+
+        self._entries.clear()
+
+    def _add(self, name, stepInput):
+        # add entry and remove least recently used entries
+
+        self._entries[name] = stepInput
+        self._entries.move_to_end(name)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+# cache shared by all DVSProcess of the python process
+stepInputCache = StepInputCache()
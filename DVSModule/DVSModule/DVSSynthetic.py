@@ -0,0 +1,185 @@
+import numpy as np
+
+from DVSModule.DVSReader import _recordType
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSCamera import DVS128, cameraDecoder
+from DVSModule.AERVersion import AERV1
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+DISTRIBUTIONS = ("uniform", "gaussian", "bar")
+
+# number of events drawn at once
+_CHUNK = 1 << 20
+
+
+def _positions(rng, distribution, n, t, width, height):
+    # x, y of n events at times t
+
+    if distribution == "uniform":
+        return rng.integers(0, width, n), rng.integers(0, height, n)
+
+    if distribution == "gaussian":
+        # blob at the center of camera
+        sigma = min(width, height) / 6
+        x = np.clip(np.rint(rng.normal(width / 2, sigma, n)), 0, width - 1)
+        y = np.clip(np.rint(rng.normal(height / 2, sigma, n)), 0, height - 1)
+        return x.astype(np.int64), y.astype(np.int64)
+
+    if distribution == "bar":
+        # vertical bar of width / 16 pixel, crossing the camera once per second
+        bar = max(1, width // 16)
+        x = (t * width // 1000000 + rng.integers(0, bar, n)) % width
+        return x, rng.integers(0, height, n)
+
+    raise ValueError("distribution must be one of {}, not {}".format(DISTRIBUTIONS, distribution))
+
+
+def iterSynthetic(camera = DVS128(), rate = 1e6, duration_s = 1.0, distribution = "uniform", noise = 0.0, seed = 0, start_us = 0):
+    """
+        Deterministic synthetic events, chunk by chunk
+
+        Events are a Poisson process of rate events per second, position of events follows distribution:
+            - uniform : all pixels
+            - gaussian : blob at the center of camera
+            - bar : vertical bar crossing the camera once per second
+        A fraction noise of events is uniform background activity. Polarity is random.
+
+        Parameters
+        ----------
+            * camera : CameraFamily, DVS128 by default
+            * rate : float, events per second, 1e6 by default
+            * duration_s : float, duration in second, 1 by default
+            * distribution : string, "uniform" by default
+            * noise : float, fraction of uniform events, 0 by default
+            * seed : int, 0 by default, same seed gives same events
+            * start_us : int, time of the beginning in micro-second, 0 by default
+
+        Yields
+        ------
+            numpy array of event_type data, sorted by time
+    """
+
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError("distribution must be one of {}, not {}".format(DISTRIBUTIONS, distribution))
+
+    rng = np.random.default_rng(seed)
+    width, height = camera.Width, camera.Height
+
+    end = start_us + duration_s * 1e6
+    last = float(start_us)
+
+    while last < end:
+        times = last + np.cumsum(rng.exponential(1e6 / rate, _CHUNK))
+        last = float(times[-1])
+
+        times = times[times < end].astype(np.uint64)
+        n = len(times)
+
+        x, y = _positions(rng, distribution, n, times.astype(np.int64) - start_us, width, height)
+
+        if noise > 0:
+            uniform = rng.random(n) < noise
+            x[uniform] = rng.integers(0, width, int(uniform.sum()))
+            y[uniform] = rng.integers(0, height, int(uniform.sum()))
+
+        events = np.empty(n, dtype=event_type)
+        events['t'] = times
+        events['x'] = x
+        events['y'] = y
+        events['p'] = rng.integers(0, 2, n)
+
+        yield events
+
+
+def synthesize(camera = DVS128(), rate = 1e6, duration_s = 1.0, distribution = "uniform", noise = 0.0, seed = 0, start_us = 0):
+    """
+        All synthetic events (see iterSynthetic)
+
+        Returns
+        -------
+            numpy array of event_type data
+    """
+
+    chunks = list(iterSynthetic(camera, rate, duration_s, distribution, noise, seed, start_us))
+
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=event_type)
+
+
+def encodeAddresses(camera, events):
+    """
+        Raw addresses of polarity events, inverse of camera masks
+
+        Parameters
+        ----------
+            * camera : CameraFamily
+            * events : event_type array or EventBatch
+
+        Returns
+        -------
+            numpy uint32 array of addresses
+    """
+
+    x = events['x'].astype(np.uint32)
+    y = events['y'].astype(np.uint32)
+    p = events['p'].astype(np.uint32)
+
+    return (((x << np.uint32(camera.Xshift)) & np.uint32(camera.Xmask))
+        | ((y << np.uint32(camera.Yshift)) & np.uint32(camera.Ymask))
+        | ((p << np.uint32(camera.Pshift)) & np.uint32(camera.Pmask)))
+
+
+def writeSynthetic(path, camera = DVS128(), version = AERV1(), rate = 1e6, duration_s = 1.0, distribution = "uniform", noise = 0.0, seed = 0, start_us = 0):
+    """
+        Write a synthetic AER file (AERV1 or AERV2), chunk by chunk
+
+        Times are written on the 32 bits of records: they wrap after about 71.6 minutes like camera times.
+
+        Parameters
+        ----------
+            * path : string, path of file, with the extension of version
+            * camera, rate, duration_s, distribution, noise, seed, start_us : see iterSynthetic
+            * version : AERVersion, AERV1 by default
+
+        Returns
+        -------
+            number of events written
+    """
+
+    if version.Stateful or version.PacketHeaderLen:
+        raise ValueError("synthetic files are written with record versions (AERV1, AERV2), not {}".format(type(version).__name__))
+
+    recordType = _recordType(version.ReadMode, version.AELen)
+
+    if cameraDecoder(camera).addressMask.bit_length() > 8 * recordType.fields["addr"][0].itemsize:
+        raise ValueError("addresses of {} do not fit in records of {}".format(camera.Name, type(version).__name__))
+
+    tsMask = (1 << (8 * recordType.fields["ts"][0].itemsize)) - 1
+
+    header = "#!AER-DAT{}\r\n# synthetic {} events, {} ev/s, {} s, seed {}\r\n#!END-HEADER\r\n".format(
+        "1.0" if version.AELen == 6 else "2.0", distribution, rate, duration_s, seed)
+
+    count = 0
+
+    with open(path, 'wb') as f:
+        f.write(header.encode('ascii'))
+
+        for events in iterSynthetic(camera, rate, duration_s, distribution, noise, seed, start_us):
+            records = np.empty(len(events), dtype=recordType)
+            records['addr'] = encodeAddresses(camera, events)
+            records['ts'] = events['t'] & np.uint64(tsMask)
+
+            f.write(records.tobytes())
+            count += len(records)
+
+    return count
@@ -0,0 +1,87 @@
+import numpy as np
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+class TimeUnwrapper:
+    """
+        Convert timestamps of a counter which wraps (32 bits micro-second counter wraps every ~71.6 minutes)
+        into monotonic 64 bits timestamps
+
+        A wrap is detected when time decreases by more than half of counter range.
+        State is kept between calls, so a stream can be unwrapped chunk by chunk.
+
+        Attributes
+        ----------
+
+            * bits : number of bits of counter
+            * wraps : positions of the first time after each wrap, in all times given since creation
+            * count : number of times given since creation
+
+        Methods
+        -------
+
+            * __call__(ts) : unwrap next times of stream
+    """
+
+    def __init__(self, bits = 32):
+        """
+            Parameters
+            ----------
+                * bits : int, number of bits of counter (32 by default)
+        """
+
+        self.bits = bits
+        self.wraps = []
+        self.count = 0
+
+        self._half = 1 << (bits - 1)
+        self._last = None   # last raw time
+        self._epoch = 0     # number of wraps
+
+    def __call__(self, ts):
+        """
+            Unwrap next times of stream
+
+            Parameters
+            ----------
+                * ts : numpy array of raw times
+
+            Returns
+            -------
+                numpy array of unwrapped times (uint64)
+        """
+
+        ts = np.asarray(ts).astype(np.int64)
+
+        if ts.size == 0:
+            return np.empty(0, dtype=np.uint64)
+
+        prev = np.empty_like(ts)
+        prev[0] = ts[0] if self._last is None else self._last
+        prev[1:] = ts[:-1]
+
+        wrap = (prev - ts) > self._half
+
+        if wrap.any():
+            self.wraps.extend((np.nonzero(wrap)[0] + self.count).tolist())
+
+            epochs = self._epoch + np.cumsum(wrap, dtype=np.int64)
+            ts += epochs << self.bits
+
+            self._epoch = int(epochs[-1])
+
+        elif self._epoch:
+            ts += self._epoch << self.bits
+
+        self._last = int(ts[-1]) & ((1 << self.bits) - 1)
+        self.count += len(ts)
+
+        return ts.astype(np.uint64)
@@ -0,0 +1,57 @@
+import importlib
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# public api, by module. A module is imported the first time one of its names is used, so `import DVSModule`
+# imports nothing and the reader (DVSModule.DVSReader) never imports nengo: only DVSProcess and
+# DVSLiveProcess (DVSModule.dvs) need it.
+# Classes named as their module (DVSArchive, DVSDataset, DVSMetrics) are imported from their module,
+# as the package attribute of a module is the module itself once it is imported.
+_API = {
+    "DVSModule.DVSReader": ("DVSEvents", "ReadType"),
+    "DVSModule.dvs": ("DVSProcess", "DVSLiveProcess"),
+    "DVSModule.DVSCamera": ("CameraFamily", "CameraSpec", "DVS128", "DAVIS240", "IMX636", "registerCamera", "getCamera"),
+    "DVSModule.AERVersion": ("AERVersion", "AERV1", "AERV2", "AEDAT31", "EVT2", "EVT3", "getVersion"),
+    "DVSModule.DVSExceptions": ("NoMoreDataError", "UnvalaiblePositionError"),
+    "DVSModule.DVSBatch": ("EventBatch", "event_type"),
+    "DVSModule.DVSBuffer": ("EventRingBuffer", "OverflowPolicy"),
+    "DVSModule.DVSIndex": ("TimeIndex",),
+    "DVSModule.DVSArchive": ("ArchiveWriter", "convertFile"),
+    "DVSModule.DVSSocket": ("AERSocketSource", "LiveMetrics", "replay"),
+    "DVSModule.DVSFilter": ("EventFilter", "BackgroundActivityFilter", "RefractoryFilter", "HotPixelFilter", "FilterChain"),
+    "DVSModule.DVSRepresentation": ("Representation", "CountFrames", "TimeSurface", "VoxelGrid"),
+    "DVSModule.DVSDataset": ("Recording",),
+    "DVSModule.DVSSynthetic": ("iterSynthetic", "synthesize", "writeSynthetic"),
+    "DVSModule.DVSMetrics": ("LatencyHistogram", "enableLogging"),
+}
+
+_MODULES = {name: module for module, names in _API.items() for name in names}
+
+# names of `from DVSModule import *`, without the names which need nengo
+__all__ = [name for name, module in _MODULES.items() if module != "DVSModule.dvs"]
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+
+    if module is None:
+        raise AttributeError("module 'DVSModule' has no attribute '{}'".format(name))
+
+    value = getattr(importlib.import_module(module), name)
+
+    # next uses do not call __getattr__
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -1,13 +1,16 @@
-import os
-import struct   # interpret bytes as packed binary data
+import time
+import functools
 
 import numpy as np
 from nengo import Process
-from enum import Enum
 
-from DVSModule.DVSExceptions import *
-from DVSModule.DVSCamera import *
-from DVSModule.AERVersion import *
+from DVSModule.DVSReader import *
+from DVSModule.DVSReader import _searchSorted
+from DVSModule.DVSIndex import TimeIndex
+from DVSModule.DVSStepCache import StepInput, stepInputCache
+from DVSModule.DVSBuffer import EventRingBuffer, _EventFeed
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSFilter import FilterChain
 
 __author__ = "Saulquin Aurélie"
 __copyright__ = ""
@@ -18,725 +21,639 @@ __maintainer__ = "Saulquin Aurélie"
 __email__ = "clement.saulquin.etu@univ-lille.fr"
 __status__ = "Available"
 
-# define type for event
-event_type = np.dtype(
-    [ ("t", "u4"), ("x", "u2"), ("y", "u2"), ("p", "u1") ]
-)
 
-class ReadType(Enum):
-    """ 
+# nengo processes of DVSModule. The reader (DVSEvents, ReadType...) is in DVSModule.DVSReader, which does not
+# need nengo; it is imported here too so `from DVSModule.dvs import *` still gives the whole api
 
-    Different type of reading method.
 
-    BLOC : The file is completely read and datas aree stored in memory
-    FLOW : The file is reading step by step. Datas are not stored in memroy
+# greatest number of address bits of a neuron table (4 MiB table)
+_TABLE_BITS = 20
 
-    """
-    BLOC = 0
-    FLOW = 1
 
+def _stepBounds(t, dt, t_start):
+    """
+        Times of the events of the step at simulator time t: lower <= time event < upper
 
+        Bounds are computed from the step number, as StepInput.build does: the upper bound of a step
+        is the lower bound of the next one, so an event on a bound is counted in one step only
 
-class _DVSReader:
-    """ Class who's read data in file.
+        Parameters
+        ----------
+            * t : float, simulator time, n * dt for step n
+            * dt : float, simulator step in second
+            * t_start : float, time of simulator start in second
 
-    Attributes
-    ----------
+        Returns
+        -------
+            (lower, upper) in micro-second, integers
+    """
 
-    * duration : duration of video stored on the file
-    * position : position of reading pointer
+    n = int(round(t / dt))
 
-    Methods
-    -------
+    return int(np.ceil((t_start + (n - 1) * dt) * 1e6)), int(np.ceil((t_start + n * dt) * 1e6))
 
-    * readAllFile() : read all dvs file and return all datas
-    * readData() : read just the data pointed by reading head and return this data
-    * place(pos)": place the reading head to read the data n° pos 
 
+@functools.lru_cache(maxsize=32)
+def _neuronTable(kernel, size, roi, pool, strides):
     """
+        Table of the output neuron of each raw address: decoding, region of interest,
+        pooling and strides of output are done once for all addresses
 
-    def __init__(self, file, camera, version, verbose = 0):
-        """
-            Initialize all parameter wich allow to read data
-
-            Parameters
-            ----------
-            * file : string, required
-                path of file who's contain the datas 
-            * camera : CameraFamily, required
-                Type of camera which was used to write file
-            * version : AERVersion, required
-                AER Version file 
-            * verbose : int, 0 by default
-                print information
-                - 0 : mute
-                - 1 : file information
-                - 2 : file header
-                - 3 and more : datas
-        """
-
-        if not isinstance(camera, CameraFamily):
-            raise TypeError("camera must be an instance of CameraFamily interface")
+        Parameters
+        ----------
+            * kernel : AddressDecoder of addresses
+            * size : (width, height) of camera
+            * roi : (x, y, width, height) of region of interest, None for the whole camera
+            * pool : (poolY, poolX)
+            * strides : (strideX, strideY, strideP) of output
 
-        if not isinstance(version, AERVersion):
-            raise TypeError("version must be an instance of AERVersion")
+        Returns
+        -------
+            (table, mask) : neuron of address is table[address & mask], -1 if address is dropped
+            None if addresses have more than _TABLE_BITS bits
+    """
 
+    mask = kernel.addressMask
+    if mask.bit_length() > _TABLE_BITS:
+        return None
 
-        if file == None:
-            raise ValueError
+    addr = np.arange(1 << mask.bit_length(), dtype=np.uint32)
 
-        self._verbose = verbose
+    events = np.empty(len(addr), dtype=event_type)
+    kernel.decode(addr, events)
 
-        # file informations
-        self._filePath = file
-        self._fileInfo = None
+    x = events['x'].astype(np.int32)
+    y = events['y'].astype(np.int32)
+    p = events['p'].astype(np.int32)
 
-        self._aerDataFile = None    # file ref
+    x0, y0, width, height = roi or (0, 0) + size
+    x -= x0
+    y -= y0
 
-        self._fileLen = None # size of file
+    # addresses outside of camera or region of interest, and addresses which are not polarity events
+    valid = (x >= 0) & (x < width) & (y >= 0) & (y < height) & (p < 2)
 
-        # mask to recover data
-        self._xmask = camera.Xmask
-        self._xshift = camera.Xshift
+    selected = kernel.select(addr)
+    if selected is not None:
+        valid &= selected
 
-        self._ymask = camera.Ymask
-        self._yshift = camera.Yshift
+    strideX, strideY, strideP = strides
+    neurons = (y // pool[0]) * strideY + (x // pool[1]) * strideX + p * strideP
 
-        self._pmask = camera.Pmask
-        self._pshift = camera.Pshift
+    return np.where(valid, neurons, -1).astype(np.int32), addr.dtype.type(mask)
 
-        # reading information
-        self._readMode = version.ReadMode 
 
-        self._aeLen = version.AELen
 
-        self._lineNum = None # actual line
-        self._posPtr = None  # position of reader on file
 
-        self._headerLen = 0
+class DVSProcess(Process):
+    """
+        Group of event usable  by nengo simulator
 
-        self._initRead(version.FileExtension)    # get information of datas
+        When addresses of camera have at most 20 bits (DVS128) and there is no filter, raw addresses are converted to
+        output neurons with one precomputed table, without decoding events.
 
-        # data information
-        self._duration = None # duration of video stored in file*
+        Attributes
+        ----------
 
-        self._start = None 
-        self._end = None
+            * dvsClass: internal dvs class. Read Only
+            * metrics: DVSMetrics of reader and step function, None if they are not instrumented
+    """
 
-        self._getDuration()
+    # number of events read at once in flow reading method
+    _FLOW_BLOCK = 4096
 
-    @property
-    def duration(self):
-        """
-            duration of the video stored in file
-        """
-        return self._duration
+    # number of events kept in memory in flow reading method
+    _FLOW_BUFFER = 65536
 
-    @property
-    def startTime(self):
-        """
-            data start time
+    def __init__(self, file, camera = DVS128(), version = AERV1(), read_type = ReadType.BLOC, channel_last = True, pool = (1, 1), verbose = 0, index = False, dtype = np.float64, step_cache = False, roi = None, filters = None, metrics = None):
         """
+            Initialize reader class to read the file and parameter of video
 
-        return self._start
+            Parameters
+            ----------
 
-    @property
-    def endTime(self):
-        """
-            data end time
-        """
+                * file : string, required
+                    path of file who's contain the datas
 
-        return self._end
+                * camera : CameraFamily, DVS128 by default
+                    Type of camera which was used to write file
 
-    @property
-    def position(self):
-        """
-            position of reading head according to data numerotation and not byte numerotation 
-        """
-        return int( (self._posPtr-self._headerLen)/self._aeLen )
+                * version : AERVersion, AERV1 by default
+                    AER Version file
 
+                * read_type : ReadType, optional, ReadType.BLOC by default
+                    data recovery method
+                    - ReadType.BLOC : all data are readed and stored in memory
+                    - ReadType.FLOW : data are raeded block by block from the end of previous step and are not stored in memory
+                    - ReadType.MMAP : file is memory mapped and data are decoded slice by slice at each step
 
-    def _initRead(self, ext):
-        # Open file and get informations about data in this file
+                * channel_last : bool, optional, True by default
+                    - if True, polarity is the least-significant index of data
+                    - if Flase, polarity is the most-significant index of data
                 
-        # file extension check
-        if not str(self._filePath).endswith(str(ext)):
-            actual_ext = str(self._filePath).split('.')[-1]
-            raise ValueError("Wrong file extension. Actual file extension .{0}. Excepted extension {1}".format(actual_ext, ext))
-
-
-        # open file
-        try:
-            self._aerDataFile = open(self._filePath, 'rb')
-        except FileNotFoundError as e:
-            raise FileNotFoundError(e)
+                * pool : (int, int), optional, (1, 1) by default
+                    Number of pixel to pool over in the vertical and horizontal direction respectevely
 
+                * verbose : print messages of DVSModule logger (0 by default, see DVSMetrics.enableLogging)
+                    - 0 : logging configuration is not changed
+                    - 1 : file information
+                    - 2 and more : file header
 
-        # get file informations
-        self._fileInfo = os.stat(self._filePath)
-        self._fileLen = self._fileInfo.st_size
+                * index : bool or string, False by default
+                    use a sparse time index of the file (see DVSEvents)
 
+                * dtype : numpy dtype, np.float64 by default
+                    type of output data, np.float32 halves memory traffic of each step
 
-        self._lineNum = 0 # line number
-        self._posPtr = 0  # pointer, position on bytes
+                * step_cache : bool or string, False by default
+                    precompute input of every step once (CSR structure) and keep it in a cache
+                    shared by all DVSProcess using same file, dt, pool, channel_last, t_start, roi
+                    and filters (EventFilter.cacheKey)
+                    - False : no cache, read_type is used
+                    - True : cache in memory
+                    - string : cache in memory and in this directory
 
-        if self._verbose > 0:
-            print("file size : ", self._fileLen)
+                * roi : (x, y, width, height), optional
+                    region of interest in pixel, events outside are dropped. Whole camera by default
 
-        if self._verbose >= 2:
-            print("Header : ")
+                * filters : EventFilter or list of EventFilter, optional
+                    filters of events (see DVSFilter), applied in time order before events are counted.
+                    State of filters is reset when simulator goes back in time
 
-        # get header information (v1: no head information)
-        lt = self._aerDataFile.readline()
-        while lt and lt[0] == '#':
-            self._posPtr+=len(lt)
-            self._lineNum += 1
-            lt = self._aerDataFile.readline()
-            if self._verbose >= 2:
-                print("- ", str(lt))
+                * metrics : DVSMetrics, optional
+                    counters of reader and latency histogram of step function (see DVSMetrics).
+                    Without metrics, reader and step function are not instrumented
+        """
+        
+        self._dvsEvents = DVSEvents(file, camera=camera, version=version, verbose=verbose,
+            mmap=(read_type == ReadType.MMAP), index=index, metrics=metrics)
 
+        self._metrics = metrics
 
-        self._headerLen = self._posPtr
+        self._readType = read_type
 
+        self._file = file
+        self._camera = camera
+        self._version = version
 
-        if self._verbose >=1 :
-            print("mask information : ")
-            print("- xmask :\t", self._xmask)
-            print("- xshift:\t", self._xshift)
-            print("- ymask:\t", self._ymask)
-            print("- yshift:\t", self._yshift)
-            print("- pmask:\t", self._pmask)
-            print("- pshift:\t", self._pshift)
+        self._stepCache = step_cache
+        self._filters = None if filters is None else FilterChain(filters)
 
+        self._initOutput(self._dvsEvents.width, self._dvsEvents.height, channel_last, pool, dtype, roi)
 
+        super().__init__(default_size_in=0, default_size_out=self.size)
 
 
-    def _getDuration(self):
-        # duration = time of the last data - time of the first data 
-        
-        buff = np.empty(1, dtype=event_type)
 
-        self._aerDataFile.seek(self._fileLen-self._aeLen)
-        s = self._aerDataFile.read(self._aeLen)
-        buff = self._parse(s)
 
-        self._end = int(buff['t'])
+    @property
+    def dvsClass(self):
+        """
+            Function to get DVS classes to get information
+        """
+        return self._dvsEvents
 
-        self._aerDataFile.seek(self._posPtr)
-        s = self._aerDataFile.read(self._aeLen)
-        buff = self._parse(s)
+    @property
+    def metrics(self):
+        return self._metrics
 
-        self._start = int(buff['t'])
 
-        self._duration = self._end - self._start
 
+    def _initOutput(self, width, height, channel_last, pool, dtype, roi = None):
+        # init size of output
 
+        self.channel_last = channel_last
 
-    def _parse(self, s):
-        # convert bytes read into understable data
+        self.dtype = np.dtype(dtype)
 
-        buff = np.empty(1, dtype=event_type)
+        self.sensor = (width, height)
 
-        addr, ts = struct.unpack(self._readMode, s)
-        hex(ts)
-        hex(addr)
+        if roi is not None:
+            roi = tuple(int(v) for v in roi)
+            if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+                raise ValueError("roi must be (x, y, width, height) with a positive size, not {}".format(roi))
+            width, height = roi[2], roi[3]
 
-        x_addr = (addr & self._xmask) >> self._xshift
-        y_addr = (addr & self._ymask) >> self._yshift
-        a_pol = (addr & self._pmask) >> self._pshift
+        self.roi = roi
 
-        if self._verbose >= 3:
-            print("t -> ", ts)
-            print("x -> ", x_addr)
-            print("y -> ", y_addr)
-            print("p -> ", a_pol)
-            print("\n")
 
-        buff['t'] = ts
-        buff['x'] = x_addr
-        buff['y'] = y_addr
-        buff['p'] = a_pol
-        
-        return buff
+        self.height = int(np.ceil(height / pool[0]))
+        self.width = int(np.ceil(width / pool[1]))
 
-    
-    def _read(self):
-        # read bytes and actualize the reader position 
+        self.polarity = 2
+        self.size = self.height * self.width * self.polarity
 
-        self._aerDataFile.seek(self._posPtr)
-        s = self._aerDataFile.read(self._aeLen)
-        self._posPtr += self._aeLen
 
-        return s
+        self.t_start = 0
 
+        self.poolX = None
+        self.poolY = None
 
-    def readAllFile(self):
-        """
-            Read all data on file
+        self.strideX = None
+        self.strideY = None
+        self.strideP = None
 
-            Returns
-            -------
-                numpy array list of all event (dtype=event_type)
-        """
+        self._initParser(pool)
 
-        array_size = int((self._fileLen-self._headerLen) / self._aeLen )
-        buff = np.empty(1, dtype=event_type)
-        events = np.empty(array_size, dtype=event_type)
 
-        cpt = 0
 
-        # read all data
-        while (self._posPtr < self._fileLen):    
-            s = self._read()
-            
-            events[cpt] = self._parse(s)
+    def _initParser(self, pool):
+        # init stride value in function of channel_last
 
-            cpt += 1
-        
+        self.poolY, self.poolX = pool
+        self.pool = (self.poolY, self.poolX)
 
-        if self._verbose > 0:
-            try:
-                print ("read %i (~ %.2fM) AE events, duration= %.2fs" % (len(events), len(events) / float(10 ** 6), self.duration))
-            except:
-                print ("failed to print statistics")
+        if self.channel_last:
+            self.strideX = self.polarity
+            self.strideY = self.polarity * self.width
+            self.strideP = 1
+        else:
+            self.strideX = 1
+            self.strideY = self.width
+            self.strideP = self.width * self.height
 
 
-        return events
 
 
-    def readData(self):
+    def make_step(self, shape_in, shape_out, dt, rng, state):
         """
-            Read just on data en return an event_type
+            Make the step function toi display the DVS events as image frame
+
+            This function is call by nengo simulator
 
             Returns
             -------
-                data read in event_type format
+                Function to create image frame depending time
         """
-        
-        buff = np.empty(1, dtype=event_type)
 
-        if not (self._posPtr < self._fileLen):
-            raise NoMoreDataError()
+        assert shape_in == (0,)
+        assert len(shape_out) == 1
 
-        s = self._read()
-        buff = self._parse(s)
-        return buff
+        h = self.height
+        w = self.width
+        pol = self.polarity
+        t_start = self.t_start
 
+        # output buffer reused at each step, simulator copies it
+        image = np.zeros(h*w*pol, dtype=self.dtype)
 
+        # buffer of step function, its occupancy is kept by metrics
+        buffer = None
 
-    def place(self, pos):
-        """
-            Place reader pointer to read data at the position "pos"
+        # precomputed input of all steps
+        if self._stepCache:
+            stepInput = self._getStepInput(dt)
 
-            Note :  the position is not depending to byte position but depending to data numerotation
-                    for example, if header len is 0, data n°2 is at the byte n°12
+            def cacheStep(t):
 
-            Parameters
-            ----------
-                * pos : position of data
-        """
+                return stepInput.fill(int(round(t / dt)), image, 1/dt)
 
-        p = pos*self._aeLen
 
-        if p > self._fileLen or p < self._headerLen:
-            raise ValueError("no data on this position")
-        
-        self._posPtr = p
-        self._aerDataFile.seek(p)
+            func = cacheStep
 
+        # Bloc reading methods
+        elif self._readType == ReadType.BLOC:
+            reader = self._dvsEvents._reader
 
-    
+            if reader.nbEvents == 0:
+                raise ValueError("No event was has been read")
 
+            self._resetFilters()
+            event_t, event_id = self._readIds(0, reader.nbEvents)
 
+            def blocStep(t):
 
+                t_lower, t_upper = _stepBounds(t, dt, t_start)
 
-class DVSEvents:
-    """
-        A group of events from Dynamic Vision Sensor (DVS) file.
+                # events are sorted by time: the step events are a slice
+                lo = _searchSorted(event_t, t_lower)
+                hi = _searchSorted(event_t, t_upper)
 
-        Attributes
-        ----------
+                return self._accumulate(event_id[lo:hi], image, 1/dt)
 
-            * duration_s : duration of video in second
-            * duration_us : duration of video in micro-second
-            * start_s : start time of video in second
-            * start_us : start time of video in micro-second
-            * end_s : end time of video in second
-            * end_us : end time of video in micro-second
-            * height : height of the video
-            * width : width of the video
 
-        Methods
-        -------
+            func = blocStep
 
-            * getAllData() : read all file and return a numpy array of all data
-            * getSingleData() : read just one data
-            * searchTime(time) : place reading head of reader on the first data where time event = time
-        
-    """
+        # flow reading methods
+        elif self._readType == ReadType.FLOW:  
 
-    def __init__(self, file, camera =DVS128(), version = AERV1(), verbose = 0):
-        """
-            Initialize reader class to read the file and parameter of video
+            reader = self._dvsEvents._reader
+            block = self._FLOW_BLOCK
 
-            Parameters
-            ----------
+            # events read but not used yet stay in a buffer of fixed size
+            buffer = EventRingBuffer(max(self._FLOW_BUFFER, 2 * block), event_type)
 
-                * file : string, required
-                    path of file who's contain the datas
-                * camera : CameraFamily, DVS128 by default
-                    Type of camera which was used to write file 
-                * version : AERVersion, AERV1 by default
-                    AER Version file 
-                * verbose : int, 0 by default
-                    print information 
-                    - 0 : mute
-                    - 1 : file information
-                    - 2 : file header
-                    - 3 and more : datas
-        """
+            # event feed, lower time of previous step
+            cursor = [None, None]
 
+            def flowStep(t):
 
-        if not isinstance(camera, CameraFamily):
-            raise TypeError("camera must be an instance of CameraFamily interface")
+                t_lower, t_upper = _stepBounds(t, dt, t_start)
 
-        if not isinstance(version, AERVersion):
-            raise TypeError("version must be an instance of AERVersion")
+                # first step or simulator has been reset: search start position once
+                if cursor[1] is None or t_lower < cursor[1]:
+                    if cursor[0] is not None:
+                        cursor[0].close()
 
-        self._height = camera.Height
-        self._width = camera.Width
+                    buffer.clear()
+                    cursor[0] = _EventFeed(reader.iterBlocks(reader.searchTime(t_lower), block), buffer)
+                    self._resetFilters()
 
+                cursor[1] = t_lower
 
-        self._reader = _DVSReader(file, camera, version, verbose)
+                # events of a step can be more than buffer: they are counted piece by piece
+                pieces = cursor[0].popUntil(t_upper)
 
+                if self._filters is not None:
+                    pieces = [self._filters(events) for events in pieces]
 
-        
+                _, idxs = self._parseEventBloc(pieces[0])
+                self._accumulate(idxs, image, 1/dt)
 
-    @property
-    def duration_s(self):
-        return self._reader.duration * 1e-6
-    
-    @property
-    def duration_us(self):
-        return self._reader.duration
+                for events in pieces[1:]:
+                    _, idxs = self._parseEventBloc(events)
+                    np.add(image, np.bincount(idxs, minlength=image.size) * (1/dt), out=image, casting='unsafe')
 
-    @property
-    def start_us(self):
-        return self._reader.startTime
+                return image
 
-    @property
-    def start_s(self):
-        return self._reader.startTime * 1e-6
 
-    @property
-    def end_us(self):
-        return self._reader.endTime
+            func = flowStep
 
-    @property
-    def end_s(self):
-        return self._reader.endTime * 1e-6
+        # memory mapped reading methods
+        elif self._readType == ReadType.MMAP:
 
-    @property
-    def height(self):
-        return self._height
+            reader = self._dvsEvents._reader
+            cursor = [None, None]   # position of next event, lower time of previous step
 
-    @property
-    def width(self):
-        return self._width
+            def mmapStep(t):
 
+                t_lower, t_upper = _stepBounds(t, dt, t_start)
 
-    def getAllData(self):
-        """
-            read all file and return a numpy array of all data
+                # first step or simulator has been reset: search start position once
+                if cursor[1] is None or t_lower < cursor[1]:
+                    cursor[0] = reader.searchTime(t_lower)
+                    self._resetFilters()
 
-            Returns
-            -------
-                numpy array of event_type data
-        """
-        return self._reader.readAllFile()
+                lo = cursor[0]
+                hi = reader.findTime(t_upper, lo)
 
-    
-    def getSingleData(self):
-        """
-            read just one data
+                cursor[0] = hi
+                cursor[1] = t_lower
 
-            Returns
-            -------
-                event_type data
-        """
-        return self._reader.readData()
+                _, idxs = self._readIds(lo, hi, times=False)
 
-    def searchTime(self, time):
-        """
-            place reading head of reader on the first data where time event = time
-            all next data will have an event time >= time
+                return self._accumulate(idxs, image, 1/dt)
 
-            Arguments
-            ---------
-                * time : int, required
-                    desired time 
-        """
 
+            func = mmapStep
 
-        # on cherche la position de début
-        # position de début de récupération de données :
-        # si evt_t et > t -> on déplace la tete de lecture en arrière jkusuq'a ce que evt_t < t
-        # si evt_t < t -> on déplace la tete de lecture en avant jusqu'a ce que evt_t > t, puis on decremente la position
-        # pour augmenter : on lis juste les données, le seek de readData va augmenter la position
-        # pour diminuer : on prends posPtr et on fait -2 (le seek de readData va faire +1 -> +1-2 = -1)
+        # step function is timed only if there are metrics
+        if self._metrics is not None:
+            func = self._metrics.timeStep(func, buffer)
 
-        if time <= 0 or time > self.duration_s:
-            return 
+        return func
 
-        #data = self.getData()
-        evt_t = float(self.getSingleData()['t'])
 
-        if evt_t < time:
-            while evt_t < time:
-                
-                data = self._dvsReader.readData()
+    def _getStepInput(self, dt):
+        # get input of all steps from cache, or build it and add it in cache
 
-                if data is None:
-                    return
+        key = {
+            "file": TimeIndex.fileKey(self._file, self._camera, self._version),
+            "dt": dt,
+            "pool": self.pool,
+            "channel_last": self.channel_last,
+            "t_start": self.t_start,
+            "roi": self.roi,
+            "filters": None if self._filters is None else self._filters.cacheKey(),
+        }
 
-                evt_t = float(data['t'])
+        cacheDir = None if self._stepCache is True else self._stepCache
 
-            
+        stepInput = stepInputCache.get(key, cacheDir)
 
-        elif evt_t > time:
-            while evt_t > time:
-                
-                try:
-                    self._dvsReader.place(self._dvsReader.position-2)
-                except ValueError:
-                    return
+        if stepInput is None:
+            reader = self._dvsEvents._reader
+            block = reader._BLOCK
 
-                data = self._dvsReader.readData()
+            # chunks are already parsed
+            self._resetFilters()
+            chunks = (self._readIds(i, i + block) for i in range(0, reader.nbEvents, block))
 
-                if data == None:
-                    return
+            stepInput = StepInput.build(chunks, self.t_start, self._dvsEvents.end_us, dt,
+                self.size, lambda parsed: parsed)
 
-                evt_t = float(data['t'])
+            stepInputCache.put(key, stepInput, cacheDir)
 
+        return stepInput
 
-        try:
-            self._dvsReader.place(self._dvsReader.position-1)
-        except ValueError:
-            return
 
 
+    def _resetFilters(self):
+        # next events are the beginning of a stream for filters
 
+        if self._filters is not None:
+            self._filters.reset()
 
-class DVSProcess(Process):
-    """
-        Group of event usable  by nengo simulator
 
-        Attributes
-        ----------
 
-            * dvsClass: internal dvs class. Read Only
-    """
+    def _accumulate(self, idxs, image, rate):
+        # count events of each neuron in output buffer
 
-    def __init__(self, file, camera = DVS128(), version = AERV1(), read_type = ReadType.BLOC, channel_last = True, pool = (1, 1), verbose = 0):
-        """
-            Initialize reader class to read the file and parameter of video
+        np.multiply(np.bincount(idxs, minlength=image.size), rate, out=image, casting='unsafe')
 
-            Parameters
-            ----------
+        return image
 
-                * file : string, required
-                    path of file who's contain the datas
 
-                * camera : CameraFamily, DVS128 by default
-                    Type of camera which was used to write file
 
-                * version : AERVersion, AERV1 by default
-                    AER Version file
+    def _parseEventBloc(self, events):
+        # parse all events, event_type array or EventBatch
 
-                * read_type : ReadType, optional, ReadType.BLOC by default
-                    data recovery method
-                    - ReadType.BLOC : all data are readed and stored in memory
-                    - ReadType.FLOW : data are raeded one by one and are not stored in memory
+        events_t = events[:]["t"]
 
-                * channel_last : bool, optional, True by default
-                    - if True, polarity is the least-significant index of data
-                    - if Flase, polarity is the most-significant index of data
-                
-                * pool : (int, int), optional, (1, 1) by default
-                    Number of pixel to pool over in the vertical and horizontal direction respectevely
+        x = events[:]["x"].astype(np.int32)
+        y = events[:]["y"].astype(np.int32)
 
-                * verbose : print information (0 by default)
-                    - 0 : mute
-                    - 1 : file information
-                    - 2 : file header
-                    - 3 and more : datas
-        """
-        
-        self._dvsEvents = DVSEvents(file, camera=camera, version=version, verbose=verbose)
+        if self.roi is not None:
+            x0, y0, width, height = self.roi
+            x -= x0
+            y -= y0
 
-        self._readType = read_type
+            # events outside of region of interest are dropped
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            if not inside.all():
+                events_t, x, y = events_t[inside], x[inside], y[inside]
+                events = events[inside]
 
-        self.channel_last = channel_last
+        events_ids = (
+            (y // self.poolY) * self.strideY
+            + (x // self.poolX) * self.strideX
+            + events[:]["p"].astype(np.int32) * self.strideP
+        )
 
+        return events_t, events_ids
 
-        self.height = int(np.ceil(self._dvsEvents.height / pool[0]))
-        self.width = int(np.ceil(self._dvsEvents.width / pool[1]))
 
-        self.polarity = 2
-        self.size = self.height * self.width * self.polarity
 
+    def _readIds(self, start, stop, times = True):
+        # times and output neurons of events n° start to n° stop (excluded)
 
-        self.t_start = 0
+        reader = self._dvsEvents._reader
 
-        self.poolX = None
-        self.poolY = None
+        if self._filters is not None:
+            return self._parseEventBloc(self._filters(reader.readEvents(start, stop, batch=True)))
 
-        self.strideX = None
-        self.strideY = None
-        self.strideP = None
+        table = _neuronTable(reader._kernel, self.sensor, self.roi, self.pool,
+            (self.strideX, self.strideY, self.strideP))
 
-        self._initParser(pool)
+        # addresses of camera are too large for a table: events are decoded
+        if table is None:
+            return self._parseEventBloc(reader.readEvents(start, stop, batch=True))
 
-        super().__init__(default_size_in=0, default_size_out=self.size)
+        table, mask = table
 
+        addr, events_t = reader.readAddresses(start, stop, times)
 
+        events_ids = table[addr & mask]
 
+        # dropped addresses: special events, outside of region of interest
+        keep = events_ids >= 0
+        if not keep.all():
+            events_ids = events_ids[keep]
+            if events_t is not None:
+                events_t = events_t[keep]
 
-    @property
-    def dvsClass(self):
-        """
-            Function to get DVS classes to get information
-        """
-        return self._dvsEvents
+        return events_t, events_ids
 
 
 
-    def _initParser(self, pool):
-        # init stride value in function of channel_last
 
-        self.poolY, self.poolX = pool
+class DVSLiveProcess(DVSProcess):
+    """
+        Group of event received from a live source (see DVSSocket.AERSocketSource), usable by nengo simulator
 
-        if self.channel_last:
-            self.strideX = self.polarity
-            self.strideY = self.polarity * self.width
-            self.strideP = 1
-        else:
-            self.strideX = 1
-            self.strideY = self.width
-            self.strideP = self.width * self.height
+        Simulator is driven by wall clock: step at simulator time t waits until the source has received
+        an event after t, at most until wall clock reaches t + max_lag. Events of the step which arrive
+        later are counted as late by the source.
 
+        Time 0 of simulator is the time of the first event received (origin of source) + t_start.
 
+        Attributes
+        ----------
 
+            * source : live source of events
+            * metrics : metrics of source, step lags are added at each step
+    """
 
-    def make_step(self, shape_in, shape_out, dt, rng, state):
+    def __init__(self, source, channel_last = True, pool = (1, 1), dtype = np.float64, max_lag = 0.05, roi = None, filters = None):
         """
-            Make the step function toi display the DVS events as image frame
-
-            This function is call by nengo simulator
+            Parameters
+            ----------
 
-            Returns
-            -------
-                Function to create image frame depending time
-        """
+                * source : AERSocketSource, required
+                    started or not, it is started by the step function
 
-        assert shape_in == (0,)
-        assert len(shape_out) == 1
+                * channel_last : bool, optional, True by default
+                    - if True, polarity is the least-significant index of data
+                    - if False, polarity is the most-significant index of data
 
-        h = self.height
-        w = self.width
-        pol = self.polarity
-        t_start = self.t_start
+                * pool : (int, int), optional, (1, 1) by default
+                    Number of pixel to pool over in the vertical and horizontal direction respectevely
 
-        # Bloc reading methods
-        if self._readType == ReadType.BLOC:
-            evt = self._dvsEvents.getAllData()
+                * dtype : numpy dtype, np.float64 by default
+                    type of output data
 
-            if evt is None:
-                raise ValueError("No event was has been read")
+                * max_lag : float, 0.05 by default
+                    maximum waiting time of a step in second after its wall clock time
 
-            event_t, event_id = self._parseEventBloc(evt)
+                * roi : (x, y, width, height), optional
+                    region of interest in pixel, events outside are dropped. Whole camera by default
 
-            def blocStep(t):
+                * filters : EventFilter or list of EventFilter, optional
+                    filters of events (see DVSFilter), all received events go through filters
+        """
 
-                t = t_start + t
-                t_lower = (t-dt) * 1e6
-                t_upper = t * 1e6
+        self._source = source
+        self._maxLag = max_lag
 
-                idxs = event_id[(event_t >= t_lower) & (event_t < t_upper)]
+        self._dvsEvents = None
+        self._readType = None
+        self._stepCache = False
+        self._metrics = None
+        self._filters = None if filters is None else FilterChain(filters)
 
-                image = np.zeros(h*w*pol)
-                np.add.at(image, idxs, 1/dt)
+        self._initOutput(source.width, source.height, channel_last, pool, dtype, roi)
 
-                return image
+        Process.__init__(self, default_size_in=0, default_size_out=self.size)
 
+    @property
+    def source(self):
+        return self._source
 
-            func = blocStep
+    @property
+    def metrics(self):
+        return self._source.metrics
 
-        # flow reading methods
-        elif self._readType == ReadType.FLOW:  
+    def make_step(self, shape_in, shape_out, dt, rng, state):
+        """
+            Make the step function to display live events as image frame
 
-            def flowStep(t):
+            This function is call by nengo simulator
 
-                t = t_start + t
-                t_lower = (t-dt) * 1e6
-                t_upper = t * 1e6
+            Returns
+            -------
+                Function to create image frame depending time
+        """
 
+        assert shape_in == (0,)
+        assert len(shape_out) == 1
 
-                ei = []
+        source = self._source
+        maxLag = self._maxLag
+        metrics = source.metrics
+        t_start = self.t_start
 
-                self._dvsEvents.searchTime(t_lower)
+        image = np.zeros(self.size, dtype=self.dtype)
 
-                evt = self._dvsEvents.getSingleData()
+        # wall clock time of simulator time 0
+        clock = [None]
 
-                evt_t, evt_i = self._parseEventFlow(evt)
+        def liveStep(t):
 
-                while evt_t >= t_lower and evt_t < t_upper:
-                    ei.append(evt_i)
+            if not source.started:
+                source.start()
 
-                    evt = self._dvsEvents.getSingleData()
+            now = time.monotonic()
 
-                    if evt is None:
-                        break
+            if clock[0] is None:
+                clock[0] = now - t
 
-                    evt_t, evt_i = self._parseEventFlow(evt)
-                
-                image = np.zeros(h*w*pol)
-                np.add.at(image, ei, 1/dt)
+            deadline = clock[0] + t + maxLag
 
+            origin = source.waitOrigin(max(0, deadline - now))
 
+            if origin is None:
+                metrics.addLag(time.monotonic() - clock[0] - t)
+                image.fill(0)
                 return image
 
+            t_upper = origin + (t_start + t) * 1e6
+            t_lower = t_upper - dt * 1e6
 
-            func = flowStep
+            # events of step are complete when an event after the step is received
+            source.waitTime(t_upper, max(0, deadline - time.monotonic()))
 
-        
-        return func
+            events = source.popUntil(t_upper)
 
+            if self._filters is not None:
+                events = self._filters(events)
 
-    def _parseEventFlow(self, event):
-        # parse only one event
+            events = events[_searchSorted(events['t'], t_lower):]
 
-        event_t = event['t']
+            _, idxs = self._parseEventBloc(events)
 
-        event_id = (
-            (event['y'].astype(np.int32) // self.poolY) * self.strideY
-            + (event['x'].astype(np.int32) // self.poolX) * self.strideX
-            + event['p'].astype(np.int32) * self.strideP
-        )
-        
-        return int(event_t), int(event_id)
+            metrics.addLag(time.monotonic() - clock[0] - t)
 
+            return self._accumulate(idxs, image, 1/dt)
 
 
-    def _parseEventBloc(self, events):
-        # parse all events
-
-        events_t = events[:]["t"]
-
-        events_ids = (
-            (events[:]["y"].astype(np.int32) // self.poolY) * self.strideY
-            + (events[:]["x"].astype(np.int32) // self.poolX) * self.strideX
-            + events[:]["p"].astype(np.int32) * self.strideP
-        )
-
-        return events_t, events_ids
+        return liveStep
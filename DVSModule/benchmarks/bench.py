@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+
+from DVSModule.AERVersion import AERV1, AERV2
+from DVSModule.DVSCamera import DVS128, DAVIS240
+from DVSModule.DVSReader import ReadType, _DVSReader
+from DVSModule.DVSSynthetic import writeSynthetic, DISTRIBUTIONS
+
+__author__ = "Saulquin Aurélie"
+__copyright__ = ""
+__credits__ = ["Saulquin Aurélie", "Boulet Pierre", "Elbez Hammouda"]
+__license__ = ""
+__version__ = "1.0"
+__maintainer__ = "Saulquin Aurélie"
+__email__ = "clement.saulquin.etu@univ-lille.fr"
+__status__ = "Available"
+
+
+# Benchmarks of the hot paths of DVSModule on a synthetic file. Each benchmark runs in its own
+# process so its peak RSS is its own. Result is a JSON document:
+#
+#   {"meta": {parameters, versions}, "results": {benchmark: {events_per_s, latency_us, peak_rss_mb, ...}}}
+#
+#   python benchmarks/bench.py --camera DVS128 --version AERV1 --rate 1e6 --duration 10 --output before.json
+#
+# Reader benchmarks only need the reader (DVSModule.DVSReader), nengo is imported by the
+# benchmarks of DVSProcess (parseEventBloc, stepBLOC, stepFLOW) only.
+
+BENCHMARKS = ("readAllFile", "readData", "searchTime", "parseEventBloc", "stepBLOC", "stepFLOW")
+
+CAMERAS = {"DVS128": DVS128, "DAVIS240": DAVIS240}
+VERSIONS = {"AERV1": AERV1, "AERV2": AERV2}
+
+
+def _peakRss():
+    # peak resident memory of process in MiB (ru_maxrss is in KiB on Linux, in bytes on macOS)
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)
+
+
+def _percentiles(seconds):
+    # latency percentiles in micro-second
+
+    us = np.asarray(seconds) * 1e6
+
+    return {
+        "p50": float(np.percentile(us, 50)),
+        "p90": float(np.percentile(us, 90)),
+        "p99": float(np.percentile(us, 99)),
+        "max": float(us.max()),
+        "mean": float(us.mean()),
+    }
+
+
+def _best(func, repeat):
+    # smallest time of repeat calls
+
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def benchReadAllFile(args, camera, version):
+    n = _DVSReader(args.file, camera, version).nbEvents
+
+    seconds = _best(lambda: _DVSReader(args.file, camera, version).readAllFile(), args.repeat)
+
+    return {"events": n, "seconds": seconds, "events_per_s": n / seconds}
+
+
+def benchReadData(args, camera, version):
+    reader = _DVSReader(args.file, camera, version)
+    n = min(args.single, reader.nbEvents)
+
+    def loop():
+        reader.place(0)
+        for _ in range(n):
+            reader.readData()
+
+    seconds = _best(loop, args.repeat)
+
+    return {"events": n, "seconds": seconds, "events_per_s": n / seconds}
+
+
+def benchSearchTime(args, camera, version):
+    reader = _DVSReader(args.file, camera, version, index=args.index)
+
+    rng = np.random.default_rng(args.seed)
+    start, end = reader.readEvents(0, 1)['t'][0], reader.readEvents(reader.nbEvents - 1, reader.nbEvents)['t'][0]
+    times = rng.integers(int(start), int(end) + 1, args.searches)
+
+    latency = []
+    for t in times:
+        t0 = time.perf_counter()
+        reader.searchTime(int(t))
+        latency.append(time.perf_counter() - t0)
+
+    return {"searches": len(times), "searches_per_s": len(times) / sum(latency), "latency_us": _percentiles(latency)}
+
+
+def benchParseEventBloc(args, camera, version):
+    from DVSModule.dvs import DVSProcess
+
+    process = DVSProcess(args.file, camera, version, read_type=ReadType.FLOW)
+    events = process.dvsClass.getAllData()
+
+    seconds = _best(lambda: process._parseEventBloc(events), args.repeat)
+
+    return {"events": len(events), "seconds": seconds, "events_per_s": len(events) / seconds}
+
+
+def _benchSteps(args, camera, version, readType):
+    from DVSModule.dvs import DVSProcess
+
+    process = DVSProcess(args.file, camera, version, read_type=readType, dtype=np.float32)
+    dt = args.dt
+
+    t0 = time.perf_counter()
+    step = process.make_step((0,), (process.size,), dt, None, None)
+    setup = time.perf_counter() - t0
+
+    steps = min(args.steps, int(process.dvsClass.duration_s / dt))
+
+    latency = []
+    events = 0
+    for k in range(1, steps + 1):
+        t0 = time.perf_counter()
+        image = step(k * dt)
+        latency.append(time.perf_counter() - t0)
+        events += int(round(float(image.sum()) * dt))
+
+    total = sum(latency)
+
+    return {
+        "steps": steps,
+        "setup_s": setup,
+        "steps_per_s": steps / total,
+        "events_per_s": events / total,
+        "latency_us": _percentiles(latency),
+    }
+
+
+def benchStepBLOC(args, camera, version):
+    return _benchSteps(args, camera, version, ReadType.BLOC)
+
+
+def benchStepFLOW(args, camera, version):
+    return _benchSteps(args, camera, version, ReadType.FLOW)
+
+
+def runBenchmark(name, args):
+    """
+        Run one benchmark in this process
+
+        Returns
+        -------
+            dict of results, with peak_rss_mb of process
+    """
+
+    camera = CAMERAS[args.camera]()
+    version = VERSIONS[args.version]()
+
+    result = globals()["bench" + name[0].upper() + name[1:]](args, camera, version)
+    result["peak_rss_mb"] = _peakRss()
+
+    return result
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description="Benchmarks of DVSModule on a synthetic AER file")
+
+    parser.add_argument("--camera", choices=sorted(CAMERAS), default="DVS128")
+    parser.add_argument("--version", choices=sorted(VERSIONS), default="AERV1")
+    parser.add_argument("--rate", type=float, default=1e6, help="events per second of synthetic file")
+    parser.add_argument("--duration", type=float, default=10.0, help="duration of synthetic file in second")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--noise", type=float, default=0.0, help="fraction of uniform events")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--file", help="existing file to use instead of a synthetic file")
+
+    parser.add_argument("--bench", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="throughput is the best of repeat runs")
+    parser.add_argument("--single", type=int, default=100000, help="number of readData calls")
+    parser.add_argument("--searches", type=int, default=1000, help="number of searchTime calls")
+    parser.add_argument("--index", action="store_true", help="searchTime with a time index")
+    parser.add_argument("--dt", type=float, default=0.001, help="step of simulator in second")
+    parser.add_argument("--steps", type=int, default=1000, help="number of steps")
+
+    parser.add_argument("--inline", action="store_true", help="run benchmarks in this process")
+    parser.add_argument("--output", help="JSON file of results, standard output by default")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+
+    return parser
+
+
+def main(argv = None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+
+    # child process: one benchmark, results on standard output
+    if args.run:
+        json.dump(runBenchmark(args.run, args), sys.stdout)
+        return
+
+    tmp = None
+    if args.file is None:
+        tmp = tempfile.mkdtemp()
+        args.file = os.path.join(tmp, "synthetic" + VERSIONS[args.version]().FileExtension)
+
+        t0 = time.perf_counter()
+        count = writeSynthetic(args.file, CAMERAS[args.camera](), VERSIONS[args.version](),
+            args.rate, args.duration, args.distribution, args.noise, args.seed)
+        print("synthetic file: {} events in {:.2f} s".format(count, time.perf_counter() - t0), file=sys.stderr)
+
+    meta = {k: v for k, v in vars(args).items() if k not in ("run", "output", "inline")}
+    meta.update({
+        "file_size": os.path.getsize(args.file),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+
+    results = {}
+
+    try:
+        for name in args.bench:
+            print("benchmark {} ...".format(name), file=sys.stderr)
+
+            if args.inline:
+                results[name] = runBenchmark(name, args)
+                continue
+
+            argv = [sys.executable, os.path.abspath(__file__), "--run", name, "--file", args.file]
+            for key in ("camera", "version", "seed", "repeat", "single", "searches", "dt", "steps"):
+                argv += ["--" + key, str(getattr(args, key))]
+            if args.index:
+                argv.append("--index")
+
+            out = subprocess.run(argv, check=True, stdout=subprocess.PIPE).stdout
+            results[name] = json.loads(out)
+    finally:
+        if tmp is not None:
+            for name in os.listdir(tmp):
+                os.remove(os.path.join(tmp, name))
+            os.rmdir(tmp)
+
+    document = json.dumps({"meta": meta, "results": results}, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(document)
+    else:
+        print(document)
+
+
+if __name__ == '__main__':
+    main()
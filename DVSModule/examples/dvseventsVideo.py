@@ -4,6 +4,7 @@ from IPython.display import HTML
 from matplotlib.animation import ArtistAnimation
 
 from DVSModule.dvs import *
+from DVSModule.DVSRepresentation import CountFrames
 
 __author__ = "Saulquin Aurélie"
 __copyright__ = ""
@@ -26,32 +27,19 @@ if __name__ == '__main__':
 
     # init frame variables
     dt_frame_us = 20e3
-    t_frames = dt_frame_us * np.arange(int(round(t_length_us / dt_frame_us)))
 
     fig = plt.figure()
     imgs = []
 
-    # get event from DVSEvent class
-    events = dvs_event.getAllData()
+    # count "on" and "off" events of all frames at once
+    frames = CountFrames(dvs_event.width, dvs_event.height)
+    t_frames, counts = frames.build(dvs_event, dt_frame_us, start_us=0, end_us=t_length_us)
 
     # construct video
-    for t_frame in t_frames:
+    for count in counts:
 
-        t0_us = t_frame
-        t1_us = t_frame + dt_frame_us
-
-        t = events[:]["t"]  # get time values of all events
-
-        m = (t >= t0_us) & (t < t1_us)
-        events_m = events[m]
-
-        # show "off" (0) events as -1 and "on" (1) events as +1
-        events_sign = 2.0 * events_m["p"] - 1
-
-        # construct and add frame
-        frame_img = np.zeros((dvs_event.height, dvs_event.width))
-
-        frame_img[events_m["y"], events_m["x"]] = events_sign
+        # show "off" events as -1 and "on" events as +1
+        frame_img = np.clip(count[..., 1] - count[..., 0], -1, 1)
 
         img = plt.imshow(frame_img, vmin=-1, vmax=1, animated=True)
         imgs.append([img])
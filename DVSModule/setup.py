@@ -8,16 +8,20 @@ setup(
     author='Saulquin Clément',
     author_email='clement.saulquin.etu@univ.lille.fr',
     packages=['DVSModule'],
-    install_requires=['nengo',
-                      'numpy',                     
+    install_requires=['numpy',
                       ],
+    extras_require={'nengo': ['nengo']},
+    python_requires='>=3.7',
 
     classifiers=[
         'Development Status :: Fonctionnal',
         'Intended Audience :: Science/Research',
         'Operating System :: POSIX :: Linux',       
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 )
\ No newline at end of file
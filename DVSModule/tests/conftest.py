@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# tests use the package of this repository, not an installed one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DVSModule.AERVersion import AERV1
+from DVSModule.DVSCamera import DVS128
+from DVSModule.DVSReader import _recordType
+from DVSModule.DVSSynthetic import encodeAddresses, synthesize
+
+
+def writeAER(path, events, camera = DVS128(), version = AERV1()):
+    # AER file of events, times are written on the bits of records
+
+    records = np.empty(len(events), dtype=_recordType(version.ReadMode, version.AELen))
+    records['addr'] = encodeAddresses(camera, events)
+    records['ts'] = events['t'] & np.uint64((1 << (8 * records['ts'].itemsize)) - 1)
+
+    with open(path, 'wb') as f:
+        f.write(b"#!AER-DAT1.0\r\n#!END-HEADER\r\n" if version.AELen == 6 else b"#!AER-DAT2.0\r\n#!END-HEADER\r\n")
+        f.write(records.tobytes())
+
+    return path
+
+
+@pytest.fixture(scope="session")
+def events():
+    # ground truth: 0.3 s of DVS128 events, a blob with noise
+    # one event in 50 is moved back on a multiple of 1 ms: steps of 1 ms have events on their bounds
+
+    events = synthesize(DVS128(), rate=2e5, duration_s=0.3, distribution="gaussian", noise=0.2, seed=1, start_us=1000)
+    events['t'][::50] -= events['t'][::50] % 1000
+
+    return events[np.argsort(events['t'], kind='stable')]
+
+
+@pytest.fixture(scope="session")
+def aerFile(tmp_path_factory, events):
+    return writeAER(str(tmp_path_factory.mktemp("aer") / "events.dat"), events)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from DVSModule import DVSArchive as archiveModule
+from DVSModule.DVSArchive import ArchiveWriter, DVSArchive, convertFile
+from DVSModule.DVSBatch import EventBatch
+from DVSModule.DVSReader import DVSEvents
+
+
+def _fields(a, b):
+    return all(np.array_equal(a[f], b[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma", "none"])
+def test_round_trip(tmp_path, events, codec):
+    path = str(tmp_path / "events.dvsa")
+
+    with ArchiveWriter(path, block_size=5000, codec=codec) as writer:
+        # writes do not follow blocks
+        for chunk in np.array_split(events, 7):
+            writer.write(chunk)
+
+    with DVSArchive(path) as archive:
+        assert archive.nb_events == len(events)
+        assert archive.nb_blocks == -(-len(events) // 5000)
+        assert archive.start_us == int(events['t'][0])
+        assert archive.end_us == int(events['t'][-1])
+
+        assert _fields(archive.getAllData(workers=2), events)
+        assert _fields(np.concatenate(list(archive.iter_blocks())), events)
+        assert _fields(archive.getRangeData(4990, 12345), events[4990:12345])
+
+        start, end = 101234, 187654
+        inside = (events['t'] >= start) & (events['t'] < end)
+        assert _fields(archive.getTimeRangeData(start, end), events[inside])
+
+
+def test_batch_round_trip(tmp_path, events):
+    path = str(tmp_path / "events.dvsa")
+
+    with ArchiveWriter(path, block_size=4096) as writer:
+        writer.write(events)
+
+    with DVSArchive(path, batch=True) as archive:
+        batch = archive.getAllData()
+
+        assert isinstance(batch, EventBatch)
+        assert _fields(batch, events)
+
+
+def test_convert_file(tmp_path, aerFile, events):
+    archive = convertFile(aerFile, str(tmp_path / "events.dvsa"), block_size=8192)
+
+    try:
+        assert _fields(archive.getAllData(), events)
+    finally:
+        archive.close()
+
+
+def test_convert_file_closes_aer_file(tmp_path, aerFile, monkeypatch):
+    opened = []
+
+    class Events(DVSEvents):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def events(*args):
+        opened.append(Events(*args))
+        return opened[-1]
+
+    monkeypatch.setattr(archiveModule, "DVSEvents", events)
+
+    convertFile(aerFile, str(tmp_path / "events.dvsa")).close()
+    assert len(opened) == 1 and opened[0].closed
+
+    # the aer file is also closed when the archive can not be written
+    with pytest.raises(OSError):
+        convertFile(aerFile, str(tmp_path / "missing" / "events.dvsa"))
+    assert len(opened) == 2 and opened[1].closed
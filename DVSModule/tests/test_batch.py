@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from DVSModule.DVSBatch import EventBatch, event_type
+from DVSModule.DVSReader import DVSEvents
+
+
+def _fields(a, b):
+    return all(np.array_equal(a[f], b[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+def test_batch_of_events(events):
+    batch = EventBatch.fromEvents(events)
+
+    assert len(batch) == batch.size == len(events)
+    assert all(batch[f].flags.c_contiguous for f in EventBatch.fields)
+    assert batch.t is batch['t']
+    assert _fields(batch, events)
+    assert np.array_equal(np.asarray(batch), events)
+
+    # slices are views, masks and integers read events
+    part = batch[10:20]
+    assert isinstance(part, EventBatch) and np.shares_memory(part.t, batch.t)
+    assert _fields(part, events[10:20])
+    assert _fields(batch[batch.p == 1], events[events['p'] == 1])
+    assert batch[-1] == events[-1] and batch[-1].dtype == event_type
+
+    with pytest.raises(IndexError):
+        batch[len(events)]
+    with pytest.raises(KeyError):
+        batch['z']
+
+
+def test_batch_write_and_concatenate(events):
+    batch = EventBatch.empty(100)
+    batch[:50] = events[:50]
+    batch[50:] = EventBatch.fromEvents(events[50:100])
+
+    assert _fields(batch, events[:100])
+
+    copy = batch.copy()
+    copy['p'] = 0
+    assert np.array_equal(batch.p, events['p'][:100])
+
+    # batches and event_type arrays are concatenated in order
+    assert _fields(EventBatch.concatenate([batch, events[100:200]]), events[:200])
+    assert len(EventBatch.concatenate([])) == 0
+
+    with pytest.raises(ValueError):
+        EventBatch(np.zeros(2), np.zeros(1), np.zeros(2), np.zeros(2))
+
+
+def test_reader_gives_batches(aerFile, events):
+    with DVSEvents(aerFile, batch=True) as dvs:
+        chunks = list(dvs.iter_chunks(10000))
+        assert all(isinstance(c, EventBatch) for c in chunks)
+        assert _fields(EventBatch.concatenate(chunks), events)
+
+        assert isinstance(dvs.getAllData(), EventBatch)
+        assert _fields(dvs.getAllData(workers=4), events)
+        assert _fields(dvs.getRangeData(123, 4567), events[123:4567])
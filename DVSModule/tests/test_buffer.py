@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pytest
+
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSBuffer import EventRingBuffer, OverflowPolicy
+
+
+def _events(t):
+    events = np.zeros(len(t), dtype=event_type)
+    events['t'] = t
+    events['x'] = np.arange(len(t)) % 128
+
+    return events
+
+
+def test_push_and_pop_around_the_end():
+    buffer = EventRingBuffer(10, event_type)
+    events = _events(np.arange(25))
+
+    buffer.push(events[:7])
+    assert np.array_equal(buffer.popUntil(5), events[:5])
+
+    # next events are written at the end then at the beginning of the buffer
+    buffer.push(events[7:15])
+    assert len(buffer) == 10 and buffer.free == 0
+    assert buffer.firstTime == 5 and buffer.lastTime == 14
+
+    assert np.array_equal(buffer.popUntil(12.5), events[5:13])
+    assert np.array_equal(buffer.pop(), events[13:15])
+    assert buffer.pushed == buffer.popped == 15
+    assert buffer.highWater == 10
+
+
+def test_drop_oldest():
+    buffer = EventRingBuffer(10, event_type, OverflowPolicy.DROP_OLDEST)
+    events = _events(np.arange(30))
+
+    assert buffer.push(events[:8]) == 8
+    assert buffer.push(events[8:12]) == 4
+    assert buffer.droppedOldest == 2
+
+    # more events than capacity: only the newest ones are kept
+    assert buffer.push(events[12:30]) == 10
+    assert buffer.droppedOldest == 2 + 10 + 8
+    assert np.array_equal(buffer.pop(), events[20:30])
+
+
+def test_drop_newest():
+    buffer = EventRingBuffer(10, event_type, OverflowPolicy.DROP_NEWEST)
+    events = _events(np.arange(30))
+
+    assert buffer.push(events[:8]) == 8
+    assert buffer.push(events[8:20]) == 2
+    assert buffer.droppedNewest == 10
+    assert np.array_equal(buffer.pop(), events[:10])
+
+
+def test_block_waits_for_consumer():
+    buffer = EventRingBuffer(10, event_type, OverflowPolicy.BLOCK)
+    events = _events(np.arange(100))
+
+    assert buffer.push(events[:15], timeout=0) == 10
+    buffer.clear()
+
+    out = []
+
+    def consume():
+        while sum(len(e) for e in out) < len(events):
+            buffer.wait(1)
+            out.append(buffer.pop())
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+
+    assert buffer.push(events, timeout=5) == len(events)
+    consumer.join(5)
+
+    assert np.array_equal(np.concatenate(out), events)
+    assert buffer.waits > 0
+    assert buffer.droppedOldest == buffer.droppedNewest == 0
+
+
+def test_block_timeout_and_close():
+    buffer = EventRingBuffer(4, event_type, OverflowPolicy.BLOCK)
+
+    assert buffer.push(_events(np.arange(6)), timeout=0.05) == 4
+
+    # a closed buffer does not make readers wait
+    buffer.close()
+    assert buffer.wait(None)
+    assert len(buffer.pop()) == 4
+    assert not buffer.wait(None)
+
+    with pytest.raises(ValueError):
+        buffer.push(_events([10]))
+
+
+@pytest.mark.parametrize("policy", list(OverflowPolicy))
+def test_policy_type(policy):
+    assert EventRingBuffer(1, event_type, policy).policy is policy
+
+    with pytest.raises(TypeError):
+        EventRingBuffer(1, event_type, policy.value)
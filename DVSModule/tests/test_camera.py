@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from DVSModule.AERVersion import AERV2
+from DVSModule.DVSCamera import DAVIS240
+from DVSModule.DVSReader import DVSEvents, NoMoreDataError, _recordType
+from DVSModule.DVSSynthetic import encodeAddresses, synthesize
+
+
+@pytest.fixture(scope="module")
+def davis():
+    # DAVIS240 polarity events, mixed with APS, IMU and trigger records
+
+    events = synthesize(DAVIS240(), rate=1e5, duration_s=0.05, noise=0.5, seed=4, start_us=1000)
+    addr = encodeAddresses(DAVIS240(), events)
+
+    kinds = np.random.default_rng(4).choice(4, len(events), p=[0.7, 0.1, 0.1, 0.1])
+    x = events['x'].astype(np.uint32)
+    addr[kinds == 1] = (0x80000000 | (x << 12) | 0x3ff)[kinds == 1]    # aps
+    addr[kinds == 2] = 0x80000c00                                       # imu
+    addr[kinds == 3] = 0x400                                            # trigger
+
+    # last records are not polarity events
+    kinds[-3:] = 2
+    addr[-3:] = 0x80000c00
+
+    return events, addr, kinds
+
+
+@pytest.fixture(params=["file", "mmap"])
+def davisFile(request, tmp_path, davis):
+    events, addr, kinds = davis
+
+    records = np.empty(len(events), dtype=_recordType(AERV2().ReadMode, AERV2().AELen))
+    records['addr'] = addr
+    records['ts'] = events['t']
+
+    path = str(tmp_path / "davis.aedat")
+    with open(path, 'wb') as f:
+        f.write(b"#!AER-DAT2.0\r\n#!END-HEADER\r\n")
+        f.write(records.tobytes())
+
+    with DVSEvents(path, DAVIS240(), AERV2(), mmap=request.param == "mmap") as dvs:
+        yield dvs
+
+
+def _fields(a, b):
+    return all(np.array_equal(a[f], b[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+def test_streams(davisFile, davis):
+    events, addr, kinds = davis
+
+    streams = davisFile.getStreamData()
+
+    assert _fields(streams["polarity"], events[kinds == 0])
+    assert np.array_equal(streams["aps"]['x'], events['x'][kinds == 1])
+    assert np.all(streams["aps"]['adc'] == 0x3ff)
+    assert len(streams["imu"]) == np.count_nonzero(kinds == 2)
+    assert np.array_equal(streams["trigger"]['t'], events['t'][kinds == 3])
+
+    assert _fields(davisFile.getAllData(), events[kinds == 0])
+
+
+def test_single_data_skips_other_kinds(davisFile, davis):
+    events, addr, kinds = davis
+    polarity = events[kinds == 0]
+
+    for k in range(len(polarity)):
+        data = davisFile.getSingleData()
+        assert tuple(int(data[f]) for f in ('t', 'x', 'y', 'p')) == tuple(int(polarity[k][f]) for f in ('t', 'x', 'y', 'p'))
+
+    # only other kinds after the last polarity event
+    with pytest.raises(NoMoreDataError):
+        davisFile.getSingleData()
@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from DVSModule.DVSDataset import DVSDataset
+
+from conftest import writeAER
+
+
+def _fields(a, b):
+    return all(np.array_equal(a[f], b[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+@pytest.fixture(scope="module")
+def recordings(tmp_path_factory, events):
+    # three recordings in two labelled directories
+
+    root = tmp_path_factory.mktemp("dataset")
+    parts = np.array_split(events, 3)
+
+    for label, name, part in (("a", "r0.dat", parts[0]), ("a", "r1.dat", parts[1]), ("b", "r2.dat", parts[2])):
+        os.makedirs(str(root / label), exist_ok=True)
+        writeAER(str(root / label / name), part)
+
+    return str(root), parts
+
+
+def test_slices_of_directory(recordings):
+    root, parts = recordings
+
+    with DVSDataset(root, slice_us=20000, workers=3, prefetch=4, max_open=1) as dataset:
+        assert [r.label for r in dataset.recordings] == ["a", "a", "b"]
+
+        expected = []
+        for k, part in enumerate(parts):
+            t = part['t'].astype(np.int64)
+            for start in range(int(t[0]), int(t[-1]) + 1, 20000):
+                expected.append((k, part[(t >= start) & (t < start + 20000)]))
+
+        assert len(dataset) == len(expected)
+
+        for i, (data, label) in enumerate(dataset):
+            k, part = expected[i]
+            assert dataset.sample(i)[0] == k
+            assert label == dataset.recordings[k].label
+            assert _fields(data, part)
+
+        # shuffled samples are the same samples, read from cache
+        shuffled = list(dataset.iterate(shuffle=True, seed=1))
+        assert sum(len(data) for data, _ in shuffled) == sum(len(part) for part in parts)
+        assert dataset.stats["hits"] >= len(dataset)
+
+
+def test_manifest_and_transform(tmp_path, recordings):
+    root, parts = recordings
+
+    manifest = tmp_path / "dataset.csv"
+    manifest.write_text("# path, camera, version, label\n{0}/a/r0.dat,DVS128,AERV1,first\n{0}/b/r2.dat,,,\n".format(root))
+
+    with DVSDataset(str(manifest), transform=len, cache_size=0) as dataset:
+        assert [r.label for r in dataset.recordings] == ["first", None]
+        assert list(dataset) == [(len(parts[0]), "first"), (len(parts[2]), None)]
+        assert dataset[-1] == (len(parts[2]), None)
+
+        with pytest.raises(IndexError):
+            dataset[2]
+
+
+def test_close_cancels_pending_samples(recordings):
+    root, _ = recordings
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def transform(events):
+        started.set()
+        release.wait(5)
+        return len(events)
+
+    dataset = DVSDataset(root, transform=transform, workers=1)
+    futures = [dataset._submit(i) for i in range(3)]
+    started.wait(5)
+
+    closing = threading.Thread(target=dataset.close)
+    closing.start()
+
+    # samples which are not started are cancelled, the running one ends
+    deadline = time.monotonic() + 5
+    while not all(f.cancelled() for f in futures[1:]) and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    release.set()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    assert all(f.cancelled() for f in futures[1:])
+    assert futures[0].result()[0] > 0
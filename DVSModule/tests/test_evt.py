@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from DVSModule.AERVersion import EVT2, EVT3
+from DVSModule.DVSEvt import DECODED_MASKS, decodeEvt2, decodeEvt3
+from DVSModule.DVSCamera import IMX636
+from DVSModule.DVSReader import DVSEvents
+from DVSModule.DVSSynthetic import synthesize
+
+
+def _addresses(events):
+    xmask, xshift, ymask, yshift, pmask, pshift = DECODED_MASKS
+
+    return ((events['x'].astype(np.uint32) << xshift) | (events['y'].astype(np.uint32) << yshift)
+        | (events['p'].astype(np.uint32) << pshift))
+
+
+def _encodeEvt2(events):
+    # reference encoder, one word after the other
+
+    words = []
+    high = None
+
+    for t, x, y, p in zip(events['t'].tolist(), events['x'].tolist(), events['y'].tolist(), events['p'].tolist()):
+        if t >> 6 != high:
+            high = t >> 6
+            words.append(0x8 << 28 | (high & 0x0fffffff))
+
+        words.append(p << 28 | (t & 0x3f) << 22 | x << 11 | y)
+
+    return np.array(words, dtype=np.uint32)
+
+
+def _encodeEvt3(events):
+    # reference encoder, one word after the other, single events only (EVT_ADDR_X)
+
+    words = []
+    high = low = y0 = None
+
+    for t, x, y, p in zip(events['t'].tolist(), events['x'].tolist(), events['y'].tolist(), events['p'].tolist()):
+        if t >> 12 != high:
+            high = t >> 12
+            words.append(0x8 << 12 | (high & 0xfff))
+
+        if t & 0xfff != low:
+            low = t & 0xfff
+            words.append(0x6 << 12 | low)
+
+        if y != y0:
+            y0 = y
+            words.append(0x0 << 12 | y)
+
+        words.append(0x2 << 12 | p << 11 | x)
+
+    return np.array(words, dtype=np.uint16)
+
+
+def _decodeChunks(decode, words, cuts):
+    # decode words cut in chunks, state is given from chunk to chunk
+
+    state = None
+    pieces = []
+
+    for chunk in np.split(words, cuts):
+        records, state = decode(chunk, state)
+        pieces.append(records)
+
+    return np.concatenate(pieces)
+
+
+@pytest.fixture(scope="module")
+def evtEvents():
+    # times cross a wrap of EVT 2.0 (34 bits) and of EVT 3.0 (24 bits) time counters: 1 << 34 is a multiple of 1 << 24
+
+    return synthesize(IMX636(), rate=2e5, duration_s=0.2, noise=0.5, seed=2, start_us=(1 << 34) - 100000)
+
+
+def _times(events, bits):
+    # times decoded from the beginning of a stream: counter wraps before the first word are unknown
+
+    t = events['t']
+
+    return t - ((t[0] >> np.uint64(bits)) << np.uint64(bits))
+
+
+# decoder, reference encoder and number of bits of time counter
+FORMATS = [(decodeEvt2, _encodeEvt2, 34), (decodeEvt3, _encodeEvt3, 24)]
+
+
+@pytest.mark.parametrize("decode, encode, bits", FORMATS)
+def test_decoders_give_ground_truth(evtEvents, decode, encode, bits):
+    words = encode(evtEvents)
+
+    records, _ = decode(words, None)
+
+    assert np.array_equal(records['ts'], _times(evtEvents, bits))
+    assert np.array_equal(records['addr'], _addresses(evtEvents))
+
+
+@pytest.mark.parametrize("decode, encode, bits", FORMATS)
+def test_decoders_do_not_depend_on_chunks(evtEvents, decode, encode, bits):
+    words = encode(evtEvents)
+    cuts = np.sort(np.random.default_rng(0).choice(len(words), 50, replace=False))
+
+    records = _decodeChunks(decode, words, cuts)
+
+    assert np.array_equal(records['ts'], _times(evtEvents, bits))
+    assert np.array_equal(records['addr'], _addresses(evtEvents))
+
+
+@pytest.mark.parametrize("version, encode, bits", [(EVT2(), _encodeEvt2, 34), (EVT3(), _encodeEvt3, 24)])
+@pytest.mark.parametrize("mmap", [False, True])
+def test_read_evt_file(tmp_path, evtEvents, version, encode, bits, mmap):
+    path = str(tmp_path / "events.raw")
+    with open(path, 'wb') as f:
+        f.write(b"% camera IMX636\n% end\n")
+        f.write(encode(evtEvents).tobytes())
+
+    with DVSEvents(path, IMX636(), version, mmap=mmap) as dvs:
+        events = dvs.getAllData()
+
+        assert dvs.nb_events == len(evtEvents)
+        assert np.array_equal(events['t'], _times(evtEvents, bits))
+        assert all(np.array_equal(events[f], evtEvents[f]) for f in ('x', 'y', 'p'))
+
+
+def test_evt3_vectors():
+    words = np.array([
+        0x8 << 12 | 0x001,              # time high
+        0x6 << 12 | 0x002,              # time low
+        0x0 << 12 | 7,                  # y
+        0x3 << 12 | 1 << 11 | 10,       # vector base x = 10, polarity 1
+        0x4 << 12 | 0b100000000101,     # x 10, 12, 21
+        0x5 << 12 | 0b00000011,         # x 22, 23
+        0x2 << 12 | 5,                  # single event x = 5, polarity 0
+    ], dtype=np.uint16)
+
+    # same words, cut inside the vectors
+    for cuts in ([], [4], [3, 5, 6]):
+        records = _decodeChunks(decodeEvt3, words, cuts)
+
+        xmask, xshift, ymask, yshift, pmask, pshift = DECODED_MASKS
+        addr = records['addr']
+
+        assert ((addr & xmask) >> xshift).tolist() == [10, 12, 21, 22, 23, 5]
+        assert ((addr & ymask) >> yshift).tolist() == [7] * 6
+        assert ((addr & pmask) >> pshift).tolist() == [1, 1, 1, 1, 1, 0]
+        assert records['ts'].tolist() == [1 << 12 | 2] * 6
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from DVSModule.DVSBatch import EventBatch
+from DVSModule.DVSFilter import BackgroundActivityFilter, FilterChain, HotPixelFilter, RefractoryFilter
+
+W = H = 128
+
+
+def _backgroundActivity(events, dt_us):
+    # reference: events one after the other
+
+    last = np.full((H + 2, W + 2), -(1 << 62), dtype=np.int64)
+    keep = np.zeros(len(events), dtype=bool)
+
+    for k, (t, x, y) in enumerate(zip(events['t'].tolist(), events['x'].tolist(), events['y'].tolist())):
+        around = last[y:y + 3, x:x + 3].copy()
+        around[1, 1] = -(1 << 62)
+
+        keep[k] = t - around.max() <= dt_us
+        last[y + 1, x + 1] = t
+
+    return keep
+
+
+def _refractory(events, period_us):
+    # reference: events one after the other
+
+    last = np.full((H, W), -(1 << 62), dtype=np.int64)
+    keep = np.zeros(len(events), dtype=bool)
+
+    for k, (t, x, y) in enumerate(zip(events['t'].tolist(), events['x'].tolist(), events['y'].tolist())):
+        keep[k] = t - last[y, x] >= period_us
+        last[y, x] = t
+
+    return keep
+
+
+def _chunks(events, n):
+    # events cut at random positions
+
+    cuts = np.sort(np.random.default_rng(n).choice(len(events), n, replace=False))
+
+    return np.split(events, cuts)
+
+
+@pytest.fixture(scope="module")
+def sample(events):
+    return events[:20000]
+
+
+def test_background_activity_filter(sample):
+    reference = _backgroundActivity(sample, 500)
+
+    assert 0 < reference.sum() < len(sample)
+    assert np.array_equal(BackgroundActivityFilter(W, H, 500).keep(sample), reference)
+
+    f = BackgroundActivityFilter(W, H, 500)
+    assert np.array_equal(np.concatenate([f.keep(c) for c in _chunks(sample, 40)]), reference)
+
+
+def test_refractory_filter(sample):
+    reference = _refractory(sample, 5000)
+
+    assert 0 < reference.sum() < len(sample)
+    assert np.array_equal(RefractoryFilter(W, H, 5000).keep(sample), reference)
+
+    f = RefractoryFilter(W, H, 5000)
+    assert np.array_equal(np.concatenate([f.keep(c) for c in _chunks(sample, 40)]), reference)
+
+
+def test_hot_pixel_filter_chunk_invariance(events):
+    hot = events.copy()
+    hot['x'][::10] = 3
+    hot['y'][::10] = 4
+
+    whole = HotPixelFilter(W, H, learn_us=100000)
+    keep = whole.keep(hot)
+
+    assert whole.mask[4, 3]
+    assert keep[hot['t'] < hot['t'][0] + 100000].all()
+    assert not keep[(hot['t'] >= hot['t'][0] + 100000) & (hot['x'] == 3) & (hot['y'] == 4)].any()
+
+    f = HotPixelFilter(W, H, learn_us=100000)
+    assert np.array_equal(np.concatenate([f.keep(c) for c in _chunks(hot, 30)]), keep)
+    assert np.array_equal(f.mask, whole.mask)
+
+
+def test_chain_of_batches(sample):
+    chain = FilterChain([RefractoryFilter(W, H, 5000), BackgroundActivityFilter(W, H, 500)])
+    reference = chain(sample)
+
+    chain.reset()
+    out = [chain(EventBatch.fromEvents(c)) for c in _chunks(sample, 25)]
+
+    assert np.array_equal(EventBatch.concatenate(out).toEvents(), reference)
+
+
+def test_cache_key_of_given_mask_depends_on_its_content():
+    a = np.zeros((4, 4), dtype=bool)
+    b = np.zeros((4, 4), dtype=bool)
+    a[0, 0] = True
+    b[3, 3] = True
+
+    ka = FilterChain([HotPixelFilter(4, 4, mask=a), RefractoryFilter(4, 4)]).cacheKey()
+    kb = FilterChain([HotPixelFilter(4, 4, mask=b), RefractoryFilter(4, 4)]).cacheKey()
+
+    assert repr(HotPixelFilter(4, 4, mask=a)) == repr(HotPixelFilter(4, 4, mask=b))
+    assert ka != kb
+    assert ka == FilterChain([HotPixelFilter(4, 4, mask=a.copy()), RefractoryFilter(4, 4)]).cacheKey()
+
+
+def test_cache_key_of_given_mask_depends_on_its_content():
+    a = np.zeros((4, 4), dtype=bool)
+    b = np.zeros((4, 4), dtype=bool)
+    a[0, 0] = True
+    b[3, 3] = True
+
+    ka = FilterChain([HotPixelFilter(4, 4, mask=a), RefractoryFilter(4, 4)]).cacheKey()
+    kb = FilterChain([HotPixelFilter(4, 4, mask=b), RefractoryFilter(4, 4)]).cacheKey()
+
+    assert repr(HotPixelFilter(4, 4, mask=a)) == repr(HotPixelFilter(4, 4, mask=b))
+    assert ka != kb
+    assert ka == FilterChain([HotPixelFilter(4, 4, mask=a.copy()), RefractoryFilter(4, 4)]).cacheKey()
@@ -0,0 +1,85 @@
+import io
+import logging
+import math
+
+import numpy as np
+import pytest
+
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSBuffer import EventRingBuffer
+from DVSModule.DVSMetrics import DVSMetrics, LatencyHistogram, enableLogging, logger
+from DVSModule.DVSReader import DVSEvents
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert math.isnan(histogram.percentile(50))
+
+    values = np.linspace(1e-5, 1e-2, 1000)
+    for v in values:
+        histogram.add(float(v))
+
+    assert histogram.count == 1000
+    assert histogram.max == pytest.approx(1e-2)
+
+    # percentiles are the upper bound of their bucket, at most 12% above the exact value
+    for q in (50, 90, 99):
+        exact = np.percentile(values, q)
+        assert exact <= histogram.percentile(q) <= exact * 1.13
+    assert histogram.percentile(100) == histogram.max
+
+    assert histogram.asDict()["mean_us"] == pytest.approx(values.mean() * 1e6)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_reader_metrics(aerFile, events, mmap):
+    stages = []
+    metrics = DVSMetrics(profiler=lambda stage, seconds, size: stages.append((stage, size)))
+
+    with DVSEvents(aerFile, mmap=mmap, metrics=metrics) as dvs:
+        dvs.getAllData()
+        assert metrics.eventsDecoded == len(events)
+        assert metrics.bytesRead == 6 * len(events)
+
+        pos = dvs.searchTime(150000)
+
+    assert metrics.seeks == 1 and ("seek", pos) in stages
+    assert sum(size for stage, size in stages if stage == "decode") == len(events)
+
+    metrics.reset()
+    assert metrics.asDict()["eventsDecoded"] == metrics.asDict()["steps"]["count"] == 0
+
+
+def test_timed_step_keeps_buffer_occupancy():
+    metrics = DVSMetrics()
+    buffer = EventRingBuffer(100, event_type)
+
+    def step(t):
+        buffer.push(np.zeros(10, dtype=event_type))
+        return t
+
+    timed = metrics.timeStep(step, buffer)
+    assert [timed(k) for k in range(5)] == list(range(5))
+
+    assert metrics.steps.count == 5
+    assert (metrics.bufferLast, metrics.bufferMax, metrics.bufferCapacity) == (50, 50, 100)
+    assert metrics.bufferMean() == 30
+
+
+def test_enable_logging_adds_one_handler():
+    handlers = list(logger.handlers)
+    level = logger.level
+    stream = io.StringIO()
+
+    try:
+        enableLogging(logging.INFO, stream)
+        enableLogging(logging.DEBUG, stream)
+
+        assert len(logger.handlers) == len(handlers) + 1
+        assert logger.level == logging.DEBUG
+
+        logging.getLogger("DVSModule.DVSReader").debug("message %d", 1)
+        assert "DVSModule.DVSReader: message 1" in stream.getvalue()
+    finally:
+        logger.handlers[:] = handlers
+        logger.setLevel(level)
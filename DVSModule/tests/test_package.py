@@ -0,0 +1,31 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    # code run by a new interpreter, on the package of this repository
+
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+        stdout=subprocess.PIPE).stdout.decode().split()
+
+
+def test_reader_does_not_import_nengo():
+    modules = _run("import sys\n"
+        "import DVSModule\n"
+        "from DVSModule.DVSReader import DVSEvents, ReadType, _DVSReader\n"
+        "from DVSModule import *\n"
+        "DVSModule.DVSEvents, DVSModule.CountFrames\n"
+        "print('nengo' in sys.modules, 'DVSModule.dvs' in sys.modules)")
+
+    assert modules == ["False", "False"]
+
+
+def test_benchmarks_do_not_import_nengo():
+    modules = _run("import sys, runpy\n"
+        "runpy.run_path('benchmarks/bench.py')\n"
+        "print('nengo' in sys.modules)")
+
+    assert modules == ["False"]
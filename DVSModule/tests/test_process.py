@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("nengo")
+
+from DVSModule import dvs
+from DVSModule.dvs import DVSProcess, ReadType
+from DVSModule.DVSFilter import RefractoryFilter
+
+DT = 0.001
+STEPS = 299
+
+
+def _frames(events, channel_last = True):
+    # reference: step n counts events where bound(n - 1) <= time event < bound(n),
+    # bound(n) = ceil(n * dt * 1e6) as simulator times are n * dt
+
+    frames = np.zeros((STEPS, 128 * 128 * 2))
+
+    bounds = np.ceil(np.arange(STEPS + 1) * DT * 1e6).astype(np.int64)
+    n = np.searchsorted(bounds, events['t'].astype(np.int64), side='right') - 1
+    x, y, p = (events[f].astype(np.int64) for f in 'xyp')
+
+    if channel_last:
+        idx = (y * 128 + x) * 2 + p
+    else:
+        idx = p * 128 * 128 + y * 128 + x
+
+    selected = (n >= 0) & (n < STEPS)
+    np.add.at(frames, (n[selected], idx[selected]), 1 / DT)
+
+    return frames
+
+
+def _run(process, steps = range(1, STEPS + 1)):
+    step = process.make_step((0,), (process.size,), DT, None, None)
+
+    return np.array([step(k * DT).copy() for k in steps])
+
+
+def test_flow_steps(aerFile, events):
+    assert np.array_equal(_run(DVSProcess(aerFile, read_type=ReadType.FLOW)), _frames(events))
+
+
+def test_flow_reset(aerFile, events):
+    # simulator reset: steps start again from the beginning
+
+    process = DVSProcess(aerFile, read_type=ReadType.FLOW)
+    step = process.make_step((0,), (process.size,), DT, None, None)
+    frames = _frames(events)
+
+    for k in range(1, 50):
+        step(k * DT)
+
+    assert np.array_equal(step(DT), frames[0])
+    assert np.array_equal(step(2 * DT), frames[1])
+
+
+@pytest.mark.parametrize("channelLast", [True, False])
+def test_read_types_give_same_steps(aerFile, events, channelLast):
+    # events on step bounds are counted once, in the same step whatever the read type
+
+    frames = _frames(events, channelLast)
+    total = int(np.count_nonzero(events['t'] < np.ceil(STEPS * DT * 1e6)))
+
+    runs = {readType: _run(DVSProcess(aerFile, read_type=readType, channel_last=channelLast))
+        for readType in (ReadType.BLOC, ReadType.FLOW, ReadType.MMAP)}
+    runs["cache"] = _run(DVSProcess(aerFile, channel_last=channelLast, step_cache=True))
+
+    for readType, run in runs.items():
+        assert int(np.rint(run.sum() * DT)) == total, readType
+        assert np.array_equal(run.sum(axis=1), frames.sum(axis=1)), readType
+        assert np.array_equal(run, frames), readType
+
+
+@pytest.mark.parametrize("readType", [ReadType.BLOC, ReadType.FLOW, ReadType.MMAP])
+def test_steps_with_filters(aerFile, events, readType):
+    keep = RefractoryFilter(128, 128, 5000).keep(events)
+    process = DVSProcess(aerFile, read_type=readType, filters=[RefractoryFilter(128, 128, 5000)])
+
+    assert np.array_equal(_run(process), _frames(events[keep]))
+
+
+@pytest.mark.parametrize("roi, pool", [(None, (1, 1)), ((10, 20, 64, 50), (2, 4))])
+def test_neuron_table_gives_decoded_steps(aerFile, monkeypatch, roi, pool):
+    # BLOC and MMAP map raw addresses with a table, FLOW and cameras without table decode events
+
+    def run(readType):
+        return _run(DVSProcess(aerFile, read_type=readType, roi=roi, pool=pool), range(1, 100))
+
+    dvs._neuronTable.cache_clear()
+    tables = {readType: run(readType) for readType in (ReadType.BLOC, ReadType.MMAP)}
+    assert dvs._neuronTable.cache_info().currsize == 1
+    assert tables[ReadType.BLOC].any()
+
+    assert np.array_equal(tables[ReadType.BLOC], run(ReadType.FLOW))
+
+    monkeypatch.setattr(dvs, "_TABLE_BITS", 0)
+    dvs._neuronTable.cache_clear()
+
+    try:
+        for readType, table in tables.items():
+            assert np.array_equal(run(readType), table), readType
+    finally:
+        dvs._neuronTable.cache_clear()
@@ -0,0 +1,149 @@
+import os
+import struct
+import asyncio
+
+import numpy as np
+import pytest
+
+from DVSModule.AERVersion import AEDAT31
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSReader import DVSEvents
+
+from conftest import writeAER
+
+
+def _fields(a, b):
+    return all(np.array_equal(a[f], b[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+@pytest.fixture(params=["file", "mmap"])
+def dvs(request, aerFile):
+    with DVSEvents(aerFile, mmap=request.param == "mmap") as dvs:
+        yield dvs
+
+
+def test_all_data(dvs, events):
+    assert dvs.nb_events == len(events)
+    assert dvs.start_us == int(events['t'][0])
+    assert dvs.end_us == int(events['t'][-1])
+
+    assert _fields(dvs.getAllData(), events)
+    assert _fields(dvs.getAllData(workers=4), events)
+
+
+def test_single_data_is_one_record(dvs, events):
+    first = dvs.getSingleData()
+    second = dvs.getSingleData()
+
+    # one event_type record, not an array of one record
+    assert isinstance(first, np.void) and first.dtype == event_type
+    assert int(first['t']) == int(events['t'][0])
+    assert (int(second['x']), int(second['y']), int(second['p'])) == tuple(int(events[1][f]) for f in 'xyp')
+
+
+def test_ranges(dvs, events):
+    assert _fields(dvs.getRangeData(1000, 2345), events[1000:2345])
+    assert _fields(dvs.getRangeData(len(events) - 10, len(events)), events[-10:])
+
+
+def test_chunks_and_windows(dvs, events):
+    chunks = list(dvs.iter_chunks(n_events=4000))
+
+    assert max(len(c) for c in chunks) == 4000
+    assert _fields(np.concatenate(chunks), events)
+
+    start = int(events['t'][0])
+    windows = list(dvs.iter_windows(10000, n_events=3000))
+
+    for k, w in enumerate(windows):
+        assert ((w['t'] >= start + k * 10000) & (w['t'] < start + (k + 1) * 10000)).all()
+
+    assert _fields(np.concatenate(windows), events)
+
+
+def test_search_time(dvs, events):
+    for t in (0, int(events['t'][0]), 150000, int(events['t'][12345]), int(events['t'][-1]), int(events['t'][-1]) + 1):
+        assert dvs.searchTime(t) == int(np.searchsorted(events['t'], t))
+
+    pos = dvs.searchTime(150000)
+    assert _fields(dvs.getBlockData(10), events[pos:pos + 10])
+
+    start, end = 150000, 150700
+    inside = (events['t'] >= start) & (events['t'] < end)
+    assert _fields(dvs.getTimeRangeData(start, end), events[inside])
+
+
+def test_index(tmp_path, events):
+    path = writeAER(str(tmp_path / "indexed.dat"), events)
+
+    with DVSEvents(path, index=True) as dvs:
+        for t in (0, int(events['t'][12345]), 150000, int(events['t'][-1]) + 1):
+            assert dvs.searchTime(t) == int(np.searchsorted(events['t'], t))
+
+    # index is saved beside the file and used again
+    assert len(os.listdir(str(tmp_path))) == 2
+
+    with DVSEvents(path, index=True) as dvs:
+        assert dvs.searchTime(150000) == int(np.searchsorted(events['t'], 150000))
+
+
+@pytest.mark.parametrize("workers", [2, 7, 64])
+def test_parallel_read_of_few_records(tmp_path, events, workers):
+    # more ranges than records
+
+    path = writeAER(str(tmp_path / "few.dat"), events[:10])
+
+    with DVSEvents(path) as dvs:
+        dvs._reader._BLOCK = 1
+
+        assert _fields(dvs.getAllData(workers=workers), events[:10])
+
+
+def test_async_iterators(dvs, events):
+    async def collect(iterator):
+        return [c async for c in iterator]
+
+    chunks = asyncio.run(collect(dvs.aiter_chunks(n_events=5000, prefetch=2)))
+    assert _fields(np.concatenate(chunks), events)
+
+    windows = asyncio.run(collect(dvs.aiter_windows(10000, n_events=3000, prefetch=3)))
+    assert [len(w) for w in windows] == [len(w) for w in dvs.iter_windows(10000, n_events=3000)]
+
+
+def test_async_iterator_closed_early(dvs, events):
+    async def firstChunk():
+        async for chunk in dvs.aiter_chunks(n_events=1000, prefetch=4):
+            return chunk
+
+    assert _fields(asyncio.run(firstChunk()), events[:1000])
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_aedat31_packet_without_valid_event(tmp_path, events, mmap):
+    # polarity packets: all records invalid, all records valid, then one invalid record in 3
+
+    def packet(events, valid):
+        records = np.empty(len(events), dtype=[("addr", "<u4"), ("ts", "<u4")])
+        records['addr'] = (events['x'].astype(np.uint32) << 17) | (events['y'].astype(np.uint32) << 2) \
+            | (events['p'].astype(np.uint32) << 1) | valid
+        records['ts'] = events['t']
+
+        header = struct.pack("<hhiiiiii", 1, 0, 8, 4, 0, len(events), len(events), int(valid.sum()))
+        return header + records.tobytes()
+
+    valid = np.arange(50) % 3 != 0
+    valid[:20] = True
+
+    path = str(tmp_path / "packets.aedat")
+    with open(path, 'wb') as f:
+        f.write(b"#!AER-DAT3.1\r\n#!END-HEADER\r\n")
+        f.write(packet(events[:10], np.zeros(10, dtype=np.uint32)))
+        f.write(packet(events[10:30], valid[:20].astype(np.uint32)))
+        f.write(packet(events[30:60], valid[20:].astype(np.uint32)))
+
+    expected = events[10:60][valid]
+
+    with DVSEvents(path, version=AEDAT31(), mmap=mmap) as dvs:
+        assert dvs.nb_events == len(expected)
+        assert _fields(dvs.getAllData(), expected)
+        assert _fields(dvs.getRangeData(15, 25), expected[15:25])
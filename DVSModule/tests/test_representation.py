@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from DVSModule.DVSReader import DVSEvents
+from DVSModule.DVSRepresentation import CountFrames, TimeSurface, VoxelGrid
+
+DT_US = 10000
+
+
+def _windows(events, start_us, total):
+    # reference: window of each event, -1 outside of windows
+
+    w = (events['t'].astype(np.int64) - start_us) // DT_US
+
+    return np.where((w >= 0) & (w < total), w, -1)
+
+
+def _counts(events, start_us, total, pool, channel_last):
+    # reference: np.add.at, one event after the other
+
+    height, width = -(-128 // pool[0]), -(-128 // pool[1])
+    shape = (total, height, width, 2) if channel_last else (total, 2, height, width)
+    frames = np.zeros(shape)
+
+    w = _windows(events, start_us, total)
+    x, y, p = (events[f].astype(np.int64) // s for f, s in (('x', pool[1]), ('y', pool[0]), ('p', 1)))
+
+    selected = w >= 0
+    if channel_last:
+        np.add.at(frames, (w[selected], y[selected], x[selected], p[selected]), 1)
+    else:
+        np.add.at(frames, (w[selected], p[selected], y[selected], x[selected]), 1)
+
+    return frames
+
+
+@pytest.mark.parametrize("pool, channelLast", [((1, 1), True), ((2, 4), False)])
+def test_count_frames(aerFile, events, pool, channelLast):
+    frames = CountFrames(128, 128, pool=pool, channel_last=channelLast)
+
+    with DVSEvents(aerFile) as dvs:
+        times, tensor = frames.build(dvs, DT_US, windows=7, n_events=5000)
+
+    start = int(events['t'][0])
+    total = -(-(int(events['t'][-1]) + 1 - start) // DT_US)
+
+    assert np.array_equal(times, start + np.arange(total) * DT_US)
+    assert tensor.shape == (total,) + frames.shape
+    assert np.array_equal(tensor, _counts(events, start, total, pool, channelLast))
+
+    # chunks of an iterable source, from a given start
+    chunks = np.array_split(events, 13)
+    times, tensor = frames.build(chunks, DT_US, start_us=50000, end_us=250000, windows=3)
+
+    assert np.array_equal(tensor, _counts(events, 50000, 20, pool, channelLast))
+
+
+def test_time_surface(events):
+    surface = TimeSurface(128, 128, tau_us=20000, polarity=False)
+    times, tensor = surface.build(events, DT_US, windows=4)
+
+    start = int(events['t'][0])
+    t = events['t'].astype(np.int64)
+
+    for k in (0, 5, len(times) - 1):
+        end = start + (k + 1) * DT_US
+        before = events[t < end]
+
+        # last time of each pixel before the end of window
+        last = np.full((128, 128), np.iinfo(np.int64).min // 2)
+        np.maximum.at(last, (before['y'].astype(np.int64), before['x'].astype(np.int64)), before['t'].astype(np.int64))
+
+        expected = np.exp((last - end) / 20000.0)
+        assert np.allclose(tensor[k, :, :, 0], expected, atol=1e-6)
+
+
+def test_voxel_grid_shares_each_event(events):
+    grid = VoxelGrid(128, 128, bins=4)
+    times, tensor = grid.build(events, DT_US, windows=5)
+
+    start = int(events['t'][0])
+    counts = _counts(events, start, len(times), (1, 1), True)
+
+    # bilinear weights of an event sum to 1
+    assert tensor.shape == (len(times), 4, 128, 128, 2)
+    assert np.allclose(tensor.sum(axis=1), counts, atol=1e-4)
@@ -0,0 +1,132 @@
+import time
+import socket
+
+import numpy as np
+import pytest
+
+from DVSModule.AERVersion import AERV2
+from DVSModule.DVSBatch import event_type
+from DVSModule.DVSBuffer import EventRingBuffer, OverflowPolicy
+from DVSModule.DVSCamera import DVS128
+from DVSModule.DVSReader import _recordType
+from DVSModule import DVSSocket
+from DVSModule.AERVersion import AERV1
+from DVSModule.DVSSocket import AERSocketSource, replay
+from DVSModule.DVSSynthetic import encodeAddresses, synthesize
+
+
+def _datagram(events):
+    records = np.empty(len(events), dtype=_recordType(AERV2().ReadMode, AERV2().AELen))
+    records['addr'] = encodeAddresses(DVS128(), events)
+    records['ts'] = events['t']
+    return records.tobytes()
+
+
+def test_buffer_merges_older_push():
+    buffer = EventRingBuffer(64, event_type, OverflowPolicy.BLOCK)
+
+    events = np.zeros(10, dtype=event_type)
+    events['t'] = np.arange(10) * 10
+    events['x'] = np.arange(10)
+
+    buffer.push(events[5:])
+    buffer.push(events[:5])
+
+    assert buffer.merges == 1
+    out = buffer.popUntil(1000)
+    assert np.array_equal(out, events)
+
+
+def test_buffer_merge_keeps_buffered_events_first_on_equal_times():
+    buffer = EventRingBuffer(8, event_type, OverflowPolicy.BLOCK)
+
+    a = np.zeros(3, dtype=event_type)
+    a['t'] = [10, 20, 30]
+    a['x'] = 1
+    b = np.zeros(2, dtype=event_type)
+    b['t'] = [20, 25]
+    b['x'] = 2
+
+    # buffer wraps around its end
+    buffer.push(np.zeros(6, dtype=event_type))
+    buffer.pop(6)
+    buffer.push(a)
+    buffer.push(b)
+
+    out = buffer.pop()
+    assert out['t'].tolist() == [10, 20, 20, 25, 30]
+    assert out['x'].tolist() == [1, 1, 2, 2, 1]
+
+
+def test_datagrams_out_of_order_are_taken_in_time_order():
+    events = synthesize(DVS128(), rate=1e5, duration_s=0.02, seed=3)
+    half = len(events) // 2
+
+    with AERSocketSource(("127.0.0.1", 0), DVS128(), AERV2()) as source:
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        address = source._socket.getsockname()
+
+        # newest datagram first, the older one arrives before any step
+        sender.sendto(_datagram(events[half:]), address)
+        assert source.waitTime(int(events['t'][-1]), timeout=5)
+
+        sender.sendto(_datagram(events[:half]), address)
+        sender.close()
+
+        deadline = time.monotonic() + 5
+        while source.metrics.events < len(events) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        first = source.popUntil(int(events['t'][half]))
+        second = source.popUntil(int(events['t'][-1]) + 1)
+
+    out = np.concatenate((first, second))
+
+    assert source.buffer.merges == 1
+    assert source.metrics.lateEvents == 0
+    assert np.array_equal(out['t'], events['t'])
+    assert np.array_equal(out['x'], events['x'])
+    assert np.array_equal(out['y'], events['y'])
+    assert np.array_equal(out['p'], events['p'])
+
+
+def test_replay_sends_file_and_closes_it(aerFile, events, monkeypatch):
+    closed = []
+
+    class Reader(DVSSocket._DVSReader):
+        def close(self):
+            closed.append(True)
+            super().close()
+
+    monkeypatch.setattr(DVSSocket, "_DVSReader", Reader)
+
+    with AERSocketSource(("127.0.0.1", 0), DVS128(), AERV1()) as source:
+        sent = replay(aerFile, source._socket.getsockname(), speed=0, events_per_packet=2048)
+
+        deadline = time.monotonic() + 5
+        while source.metrics.events < sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        out = source.popUntil(int(events['t'][-1]) + 1)
+
+    assert closed == [True]
+    assert sent == len(events)
+    assert np.array_equal(out['t'], events['t'])
+    assert np.array_equal(out['x'], events['x'])
+
+
+def test_replay_closes_file_on_error(tmp_path, aerFile, monkeypatch):
+    closed = []
+
+    class Reader(DVSSocket._DVSReader):
+        def close(self):
+            closed.append(True)
+            super().close()
+
+    monkeypatch.setattr(DVSSocket, "_DVSReader", Reader)
+
+    # a directory can not be the path of a unix socket
+    with pytest.raises(OSError):
+        replay(aerFile, str(tmp_path), protocol="unix")
+
+    assert closed == [True]
@@ -0,0 +1,71 @@
+import logging
+
+import numpy as np
+
+from DVSModule.DVSStepCache import StepInput, StepInputCache
+
+DT = 0.001
+SIZE = 128 * 128
+
+
+def _parser(events):
+    return events['t'], events['y'].astype(np.int64) * 128 + events['x']
+
+
+def _stepInput(events, chunks = 1):
+    return StepInput.build(np.array_split(events, chunks), 0.0, int(events['t'][-1]), DT, SIZE, _parser)
+
+
+def test_build_and_fill(events):
+    stepInput = _stepInput(events)
+
+    bounds = np.ceil(np.arange(stepInput.nbSteps + 1) * DT * 1e6).astype(np.int64)
+    image = np.zeros(SIZE)
+
+    for n in (1, 2, 9, 150, stepInput.nbSteps):
+        inside = events[(events['t'] >= bounds[n - 1]) & (events['t'] < bounds[n])]
+        reference = np.bincount(_parser(inside)[1], minlength=SIZE) / DT
+
+        assert np.array_equal(stepInput.fill(n, image, 1 / DT), reference)
+
+    # steps outside of recording are empty
+    assert not stepInput.fill(stepInput.nbSteps + 1, image, 1 / DT).any()
+
+    # a step split between two chunks
+    split = _stepInput(events, 7)
+    assert np.array_equal(split.indptr, stepInput.indptr)
+    assert np.array_equal(split.indices, stepInput.indices)
+    assert np.array_equal(split.counts, stepInput.counts)
+
+
+def test_memory_and_disk_cache(tmp_path, events):
+    stepInput = _stepInput(events[:1000])
+    key = {"file": "events.dat", "dt": DT}
+
+    cache = StepInputCache(maxsize=1)
+    cache.put(key, stepInput, str(tmp_path))
+    assert cache.get(key) is stepInput
+
+    # least recently used entry leaves memory, it stays on disk
+    cache.put({"file": "other.dat", "dt": DT}, stepInput)
+    assert cache.get(key) is None
+
+    loaded = StepInputCache().get(key, str(tmp_path))
+    assert loaded.dt == DT
+    assert np.array_equal(loaded.indptr, stepInput.indptr) and np.array_equal(loaded.counts, stepInput.counts)
+
+    assert not [name for name in (p.name for p in tmp_path.iterdir()) if name.endswith(".tmp")]
+
+
+def test_disk_cache_errors_are_logged(tmp_path, events, caplog):
+    stepInput = _stepInput(events[:1000])
+    notDirectory = tmp_path / "file"
+    notDirectory.write_bytes(b"")
+
+    cache = StepInputCache()
+
+    with caplog.at_level(logging.WARNING, logger="DVSModule.DVSStepCache"):
+        cache.put({"dt": DT}, stepInput, str(notDirectory / "cache"))
+
+    assert "step cache cannot be stored" in caplog.text
+    assert cache.get({"dt": DT}) is stepInput
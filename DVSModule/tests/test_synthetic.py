@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from DVSModule.AERVersion import AERV1, AERV2
+from DVSModule.DVSCamera import DAVIS240, DVS128
+from DVSModule.DVSReader import DVSEvents
+from DVSModule.DVSSynthetic import iterSynthetic, synthesize, writeSynthetic
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "gaussian", "bar"])
+def test_synthetic_events(distribution):
+    events = synthesize(DAVIS240(), rate=1e5, duration_s=0.5, distribution=distribution, noise=0.1, seed=7, start_us=2000)
+
+    # Poisson process: about rate * duration events, sorted, inside camera
+    assert abs(len(events) - 50000) < 1000
+    assert np.all(np.diff(events['t'].astype(np.int64)) >= 0)
+    assert events['t'][0] >= 2000 and events['t'][-1] < 502000
+    assert events['x'].max() < 240 and events['y'].max() < 180
+    assert set(np.unique(events['p']).tolist()) == {0, 1}
+
+    # same seed, same events, whatever the chunks
+    assert np.array_equal(np.concatenate(list(iterSynthetic(DAVIS240(), 1e5, 0.5, distribution, 0.1, 7, 2000))), events)
+    assert not np.array_equal(synthesize(DAVIS240(), 1e5, 0.5, distribution, 0.1, 8, 2000)[:100], events[:100])
+
+
+@pytest.mark.parametrize("camera, version", [(DVS128(), AERV1()), (DAVIS240(), AERV2())])
+def test_synthetic_file(tmp_path, camera, version):
+    path = str(tmp_path / ("events" + version.FileExtension))
+    n = writeSynthetic(path, camera, version, rate=1e5, duration_s=0.2, seed=3)
+
+    events = synthesize(camera, rate=1e5, duration_s=0.2, seed=3)
+
+    with DVSEvents(path, camera, version) as dvs:
+        out = dvs.getAllData()
+
+    assert n == len(events) == len(out)
+    assert all(np.array_equal(out[f], events[f]) for f in ('t', 'x', 'y', 'p'))
+
+
+def test_synthetic_file_refuses_addresses_which_do_not_fit(tmp_path):
+    with pytest.raises(ValueError):
+        writeSynthetic(str(tmp_path / "events.dat"), DAVIS240(), AERV1(), duration_s=0.01)
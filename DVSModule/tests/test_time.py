@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from DVSModule.DVSReader import DVSEvents
+from DVSModule.DVSSynthetic import synthesize
+from DVSModule.DVSTime import TimeUnwrapper
+
+from conftest import writeAER
+
+
+def _wrapped():
+    # times cross two wraps of a 32 bits counter
+
+    a = synthesize(rate=1e5, duration_s=0.1, seed=4, start_us=(1 << 32) - 50000)
+    b = synthesize(rate=1e5, duration_s=0.1, seed=5, start_us=(2 << 32) - 50000)
+
+    return np.concatenate((a, b))
+
+
+def test_unwrapper_gives_times_by_chunk():
+    events = _wrapped()
+    raw = events['t'] & np.uint64(0xffffffff)
+
+    unwrapper = TimeUnwrapper(32)
+    cuts = np.sort(np.random.default_rng(0).choice(len(raw), 20, replace=False))
+    t = np.concatenate([unwrapper(chunk) for chunk in np.split(raw, cuts)])
+
+    wraps = np.nonzero(np.diff(events['t'] >> np.uint64(32)))[0] + 1
+
+    assert np.array_equal(t, events['t'])
+    assert unwrapper.wraps == wraps.tolist()
+    assert unwrapper.count == len(raw)
+
+
+def test_unwrapper_keeps_small_decreases():
+    # a time slightly lower than the previous one is not a wrap
+
+    assert TimeUnwrapper(16)(np.array([100, 90, 65500, 3])).tolist() == [100, 90, 65500, 65536 + 3]
+
+
+def test_reader_unwraps_file_times(tmp_path):
+    events = _wrapped()
+    path = writeAER(str(tmp_path / "wrapped.dat"), events)
+
+    with DVSEvents(path) as dvs:
+        assert np.array_equal(dvs.getAllData()['t'], events['t'])
+
+    # wraps found by parallel ranges, and between ranges
+    with DVSEvents(path) as dvs:
+        dvs._reader._BLOCK = 1
+        assert np.array_equal(dvs.getAllData(workers=5)['t'], events['t'])
+
+        # first time after the second wrap
+        t = int(events['t'][len(events) // 2 + 10])
+        pos = dvs.searchTime(t)
+
+        assert pos == int(np.searchsorted(events['t'], t))
+        assert int(dvs.getSingleData()['t']) == int(events['t'][pos])
+
+
+@pytest.mark.parametrize("sample", [5, 1000, 1 << 16])
+def test_reader_finds_wraps_from_samples(tmp_path, sample):
+    # a wrap, a gap longer than half of counter range without wrap, a wrap in a gap, an other long gap
+
+    parts = [synthesize(rate=1e4, duration_s=0.2, seed=k, start_us=start) for k, start in
+        enumerate(((1 << 32) - 100000, (1 << 32) + (1 << 31) + 1000, (2 << 32) + 2000, (2 << 32) + (1 << 31) + 5000))]
+    events = np.concatenate(parts)
+
+    path = writeAER(str(tmp_path / "gaps.dat"), events)
+
+    with DVSEvents(path) as dvs:
+        dvs._reader._WRAP_SAMPLE = sample
+
+        assert dvs.end_us == int(events['t'][-1])
+
+        for pos in (0, 1234, len(parts[0]) + 10, len(events) - len(parts[-1]), len(events) - 1):
+            t = int(events['t'][pos])
+            assert dvs.searchTime(t) == int(np.searchsorted(events['t'], t))
+            assert int(dvs.getSingleData()['t']) == t
+
+        assert np.array_equal(dvs.getRangeData(100, len(events))['t'], events['t'][100:])